@@ -1,3 +1,5 @@
+from CogEditor.caching import PAGES, invalidate
+from CogEditor.conflicts import CONFLICTS_SHOWN, find_conflicts
 from CogEditor.models import (
     AgreedStatus,
     Application,
@@ -11,6 +13,7 @@ from CogEditor.models import (
     StructuralUnit,
 )
 from django.contrib import admin, messages
+from django.db.models import Max, Min
 from django.utils.translation import gettext_lazy as _
 
 admin.site.register(AgreedStatus)
@@ -27,7 +30,7 @@ admin.site.register(StructuralUnit)
 @admin.register(Application)
 class ApplicationAdmin(admin.ModelAdmin):
     list_display = ['e_title', 'subm_date', 'status', 'organizer']
-    actions = ['reset_approval_status']
+    actions = ['reset_approval_status', 'find_schedule_conflicts']
 
     @admin.action(
         description=_("Сбросить статус согласования")
@@ -40,6 +43,7 @@ class ApplicationAdmin(admin.ModelAdmin):
         try:
             default_status = AgreedStatus.objects.get(n_stage=3)
             updated_count = queryset.update(status=default_status)
+            invalidate(PAGES)
 
             self.message_user(
                 request,
@@ -52,3 +56,51 @@ class ApplicationAdmin(admin.ModelAdmin):
                 _("Ошибка: статус по умолчанию не найден!"),
                 messages.ERROR,  # Сообщение об ошибке (красное)
             )
+
+    @admin.action(description=_("Найти пересечения бронирований"))
+    def find_schedule_conflicts(self, request, queryset):
+        """
+        Ищет пересечения бронирований выбранных заявок с другими
+        заявками за период от первого до последнего их бронирования.
+        """
+        period = queryset.aggregate(
+            event_start=Min("event_schedule__start"),
+            event_end=Max("event_schedule__end"),
+            setup_start=Min("installation_deinstallation__start"),
+            setup_end=Max("installation_deinstallation__end"),
+        )
+        starts = [
+            value
+            for value in (period["event_start"], period["setup_start"])
+            if value is not None
+        ]
+        ends = [
+            value
+            for value in (period["event_end"], period["setup_end"])
+            if value is not None
+        ]
+        if not starts:
+            self.message_user(
+                request, _("У выбранных заявок нет расписания."), messages.INFO
+            )
+            return
+
+        selected = set(queryset.values_list("pk", flat=True))
+        conflicts = [
+            (first, second)
+            for first, second in find_conflicts(min(starts), max(ends))
+            if {first.application_id, second.application_id} & selected
+        ]
+        if not conflicts:
+            self.message_user(
+                request, _("Пересечений не найдено."), messages.SUCCESS
+            )
+            return
+
+        self.message_user(
+            request,
+            _("Найдено пересечений: %(count)s.") % {"count": len(conflicts)},
+            messages.WARNING,
+        )
+        for first, second in conflicts[:CONFLICTS_SHOWN]:
+            self.message_user(request, f"{first} и {second}", messages.WARNING)
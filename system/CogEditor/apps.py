@@ -5,3 +5,6 @@ class CogeditorConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'CogEditor'
     verbose_name = 'Редактор знаний'
+
+    def ready(self):
+        from CogEditor import signals  # noqa: F401
@@ -0,0 +1,150 @@
+"""Кэширование страниц CogEditor по версиям данных.
+
+Ключ страницы содержит версии областей, от которых она зависит: PAGES -
+все страницы (шапка с организаторами, статусы), LISTING - списки заявок,
+application:<id> - страница одной заявки. Сигналы (CogEditor/signals.py)
+после фиксации транзакции увеличивают версии, поэтому устаревшие
+страницы перестают читаться и вытесняются по времени.
+
+Запись пересчитывает только процесс, получивший блокировку: пока
+устаревшая запись пересчитывается, остальные запросы получают прежнее
+значение, а при отсутствии записи ждут результата.
+"""
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+
+PAGE_KEY = "cogeditor:page:{}"
+VERSION_KEY = "cogeditor:version:{}"
+LOCK_KEY = "{}:lock"
+PAGES = "pages"
+LISTING = "listing"
+# Время хранения страницы по умолчанию, с (настройка PAGE_CACHE_TIMEOUT)
+PAGE_CACHE_TIMEOUT = 600
+# Сколько секунд устаревшая запись отдается, пока ее пересчитывают
+STALE_TIMEOUT = 60
+# Максимальное время пересчета записи одним процессом, с
+LOCK_TIMEOUT = 10
+LOCK_POLL_INTERVAL = 0.05
+
+
+def application_scope(pk):
+    return f"application:{pk}"
+
+
+def _new_version():
+    # Версия от времени: если ключ версии вытеснен из кэша, новая версия
+    # не совпадет со старой и старые страницы не будут прочитаны
+    return time.time_ns() // 1000
+
+
+def get_versions(scopes):
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, _new_version(), None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(*scopes):
+    for scope in scopes:
+        key = VERSION_KEY.format(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _new_version(), None)
+
+
+def invalidate(*scopes):
+    """Увеличивает версии областей после фиксации текущей транзакции"""
+    transaction.on_commit(lambda: bump_versions(*scopes))
+
+
+def get_or_compute(key, compute, timeout=PAGE_CACHE_TIMEOUT):
+    """Возвращает значение из кэша или вычисляет его под блокировкой.
+
+    Если compute возвращает None, значение не сохраняется.
+    """
+    lock = LOCK_KEY.format(key)
+    locked = False
+    deadline = time.monotonic() + LOCK_TIMEOUT
+    while True:
+        entry = cache.get(key)
+        if entry is not None:
+            fresh_until, value = entry
+            if time.time() < fresh_until:
+                return value
+            locked = cache.add(lock, 1, LOCK_TIMEOUT)
+            if not locked:
+                return value
+            break
+        locked = cache.add(lock, 1, LOCK_TIMEOUT)
+        if locked or time.monotonic() >= deadline:
+            break
+        time.sleep(LOCK_POLL_INTERVAL)
+
+    try:
+        value = compute()
+        if value is not None:
+            cache.set(
+                key, (time.time() + timeout, value), timeout + STALE_TIMEOUT
+            )
+        return value
+    finally:
+        if locked:
+            cache.delete(lock)
+
+
+def _has_messages(request):
+    storage = getattr(request, "_messages", None)
+    return storage is not None and len(storage) > 0
+
+
+class CachedPageMixin:
+    """Кэширует страницу целиком для GET-запросов.
+
+    Страница не кэшируется, если у пользователя есть непоказанные
+    сообщения, ответ отличается от 200 или устанавливает cookie.
+    """
+
+    def get_cache_scopes(self):
+        return [LISTING]
+
+    def get_page_key(self):
+        scopes = [PAGES, *self.get_cache_scopes()]
+        versions = ":".join(map(str, get_versions(scopes)))
+        digest = hashlib.sha256(
+            f"{self.request.get_full_path()}|{versions}".encode()
+        )
+        return PAGE_KEY.format(digest.hexdigest()[:32])
+
+    def dispatch(self, request, *args, **kwargs):
+        timeout = getattr(settings, "PAGE_CACHE_TIMEOUT", PAGE_CACHE_TIMEOUT)
+        if not timeout or request.method != "GET" or _has_messages(request):
+            return super().dispatch(request, *args, **kwargs)
+
+        response = None
+
+        def render_page():
+            nonlocal response
+            response = super(CachedPageMixin, self).dispatch(
+                request, *args, **kwargs
+            )
+            if hasattr(response, "render"):
+                response.render()
+            if response.status_code != 200 or response.cookies:
+                return None
+            return response.content, response["Content-Type"]
+
+        page = get_or_compute(self.get_page_key(), render_page, timeout)
+        if response is not None:
+            return response
+        content, content_type = page
+        return HttpResponse(content, content_type=content_type)
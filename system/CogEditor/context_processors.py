@@ -1,5 +1,37 @@
-from .models import StructuralUnit  # Или ваша модель организаторов
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import SimpleLazyObject
+
+from .caching import PAGE_CACHE_TIMEOUT, PAGES, invalidate
+from .models import StructuralUnit
+
+# Список организаторов для выбора в шапке сайта. Ключ удаляется сигналами
+# при изменении StructuralUnit (CogEditor/signals.py), а без них
+# вытесняется по времени
+ORGANIZERS_KEY = "cogeditor:organizers"
+
+
+def invalidate_organizers():
+    """Сбрасывает список организаторов и страницы с ним.
+
+    Вызывается сигналами StructuralUnit и после массовых изменений
+    (bulk_create, update), которые сигналы не вызывают.
+    """
+    # После фиксации транзакции, чтобы параллельный запрос не сохранил в
+    # кэш старый список
+    transaction.on_commit(lambda: cache.delete(ORGANIZERS_KEY))
+    invalidate(PAGES)
+
+
+def get_organizers():
+    """Возвращает организаторов из кэша, загружая их при промахе"""
+    return cache.get_or_set(
+        ORGANIZERS_KEY,
+        lambda: list(StructuralUnit.objects.order_by("unit")),
+        PAGE_CACHE_TIMEOUT,
+    )
 
 
 def organizers_processor(request):
-    return {"organizers": StructuralUnit.objects.all().order_by("unit")}
+    # Кэш и база данных читаются, только если шаблон использует organizers
+    return {"organizers": SimpleLazyObject(get_organizers)}
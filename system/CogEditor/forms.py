@@ -1,6 +1,7 @@
 import datetime
 
 from bootstrap_datepicker_plus.widgets import DatePickerInput
+from CogEditor.conflicts import CONFLICTS_SHOWN, bookings
 from CogEditor.models import (
     AgreedStatus,
     Application,
@@ -10,6 +11,7 @@ from CogEditor.models import (
     Sources,
 )
 from django import forms
+from django.conf import settings
 from django.utils import timezone
 
 
@@ -135,6 +137,7 @@ class ApplicationForm(forms.ModelForm):
         self, *args, default_status=None, default_source=None, **kwargs
     ):
         super().__init__(*args, **kwargs)
+        self.schedule_conflicts = []
 
         # Делаем поля необязательными для формы
         self.fields['subm_date'].required = False
@@ -222,6 +225,10 @@ class ApplicationForm(forms.ModelForm):
                 event_date, time_end
             )
 
+        self.check_conflicts(
+            cleaned_data['event_start'], cleaned_data['event_end']
+        )
+
         # Гарантируем установку обязательных полей
         if not cleaned_data.get('subm_date'):
             cleaned_data['subm_date'] = timezone.now()
@@ -231,6 +238,26 @@ class ApplicationForm(forms.ModelForm):
 
         return cleaned_data
 
+    def check_conflicts(self, start, end):
+        """Проверяет пересечение с бронированиями других заявок.
+
+        При SCHEDULE_CONFLICTS="flag" (по умолчанию) пересечения
+        сохраняются в schedule_conflicts, при "reject" пересечение - ошибка
+        формы.
+        """
+        mode = getattr(settings, 'SCHEDULE_CONFLICTS', 'flag')
+        if mode == 'off':
+            return
+        exclude = [self.instance.pk] if self.instance.pk else []
+        self.schedule_conflicts = bookings(start, end, exclude)
+        if self.schedule_conflicts and mode == 'reject':
+            shown = ', '.join(
+                map(str, self.schedule_conflicts[:CONFLICTS_SHOWN])
+            )
+            raise forms.ValidationError(
+                f"Площадка уже забронирована на это время: {shown}"
+            )
+
     def save(self, commit=True):
         instance = super().save(commit=False)
 
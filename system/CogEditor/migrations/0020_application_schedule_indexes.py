@@ -0,0 +1,54 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:57
+
+from django.db import migrations, models
+
+
+# Связь заявки с расписанием создается Django автоматически и не имеет
+# Meta.indexes, поэтому индекс (schedule_id, application_id) для поиска
+# заявок по периоду расписания без чтения таблицы связи создается SQL
+SCHEDULE_COVER_INDEX_SQL = (
+    'CREATE INDEX "application_schedule_cover_idx" '
+    'ON "CogEditor_application_event_schedule" '
+    '("schedule_id", "application_id");'
+)
+SCHEDULE_COVER_INDEX_REVERSE_SQL = (
+    'DROP INDEX "application_schedule_cover_idx";'
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CogEditor', '0019_alter_application_technical_requirements'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(
+                fields=['subm_date', 'id'], name='application_subm_date_idx'
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(
+                fields=['organizer', 'subm_date'],
+                name='application_organizer_date_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(
+                fields=['status', 'subm_date'],
+                name='application_status_date_idx',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['start'], name='schedule_start_idx'),
+        ),
+        migrations.RunSQL(
+            SCHEDULE_COVER_INDEX_SQL,
+            reverse_sql=SCHEDULE_COVER_INDEX_REVERSE_SQL,
+        ),
+    ]
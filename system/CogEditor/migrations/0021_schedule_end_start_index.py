@@ -0,0 +1,19 @@
+# Generated by Django 5.2.1 on 2026-10-18 14:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CogEditor', '0020_application_schedule_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(
+                fields=['end', 'start'], name='schedule_end_start_idx'
+            ),
+        ),
+    ]
@@ -238,6 +238,13 @@ class Schedule(models.Model):
         ordering = [
             "start",
         ]
+        indexes = [
+            models.Index(fields=["start"], name="schedule_start_idx"),
+            # Поиск пересечений бронирований (CogEditor/conflicts.py)
+            models.Index(
+                fields=["end", "start"], name="schedule_end_start_idx"
+            ),
+        ]
 
 
 class Sources(models.Model):
@@ -260,9 +267,52 @@ class Sources(models.Model):
         ]
 
 
+class ApplicationQuerySet(models.QuerySet):
+    """Заявки со связанными объектами, которые показывают шаблоны"""
+
+    def for_listing(self):
+        """Для таблицы заявок (application_table.html)"""
+        return self.select_related(
+            "status", "organizer", "e_format"
+        ).prefetch_related("event_schedule")
+
+    def scheduled_in(self, year, month=None):
+        """Заявки с периодом расписания в указанном году или месяце.
+
+        Условие записывается диапазоном по start, а не __year/__month,
+        чтобы использовался индекс schedule_start_idx.
+        """
+        try:
+            start = datetime.datetime(year, month or 1, 1)
+            if month is None or month == 12:
+                end = start.replace(year=year + 1, month=1)
+            else:
+                end = start.replace(month=month + 1)
+        except ValueError:
+            # Несуществующий месяц или год вне диапазона datetime
+            return self.none()
+        return self.filter(
+            event_schedule__start__gte=timezone.make_aware(start),
+            event_schedule__start__lt=timezone.make_aware(end),
+        ).distinct()
+
+    def for_detail(self):
+        """Для страницы заявки (detail.html)"""
+        return self.select_related(
+            "status",
+            "organizer",
+            "organizer_employee",
+            "e_format",
+            "application_source",
+            "order",
+        ).prefetch_related("event_schedule", "roles")
+
+
 class Application(models.Model):
     """Заявка на мероприятие"""
 
+    objects = ApplicationQuerySet.as_manager()
+
     subm_date = models.DateTimeField(
         blank=False,
         verbose_name="Время регистрации заявки",
@@ -373,3 +423,17 @@ class Application(models.Model):
         verbose_name = "заявка"
         verbose_name_plural = "Заявки"
         ordering = ["subm_date"]
+        indexes = [
+            # Постраничный вывод по ключу (subm_date, id)
+            models.Index(
+                fields=["subm_date", "id"], name="application_subm_date_idx"
+            ),
+            models.Index(
+                fields=["organizer", "subm_date"],
+                name="application_organizer_date_idx",
+            ),
+            models.Index(
+                fields=["status", "subm_date"],
+                name="application_status_date_idx",
+            ),
+        ]
@@ -0,0 +1,151 @@
+"""Постраничный вывод заявок по ключу (subm_date, id).
+
+Вместо OFFSET следующая страница выбирается условием по последней
+заявке предыдущей страницы, поэтому стоимость запроса не зависит от
+номера страницы. Общее количество заявок для надписи «Страница N из M»
+кэшируется.
+"""
+
+import datetime
+import hashlib
+import math
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import Http404
+
+COUNT_KEY = "pagination:count:{}"
+# Время хранения количества записей в кэше, с
+COUNT_TIMEOUT = 300
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+MAX_PK = 2**63 - 1
+
+
+def encode_cursor(number, application):
+    """Курсор страницы: номер, subm_date в мкс и id заявки"""
+    micros = (application.subm_date - EPOCH) // datetime.timedelta(
+        microseconds=1
+    )
+    return f"{number}:{micros}:{application.pk}"
+
+
+def decode_cursor(cursor):
+    try:
+        number, micros, pk = map(int, cursor.split(":"))
+        # Дата вне диапазона datetime или id вне диапазона BigAutoField
+        subm_date = EPOCH + datetime.timedelta(microseconds=micros)
+        if not 0 <= pk <= MAX_PK:
+            raise ValueError(pk)
+    except (ValueError, OverflowError):
+        raise Http404("Некорректный курсор страницы")
+    return max(number, 1), subm_date, pk
+
+
+class KeysetPage:
+    """Страница заявок, совместимая с шаблоном includes/pagination.html"""
+
+    def __init__(self, object_list, number, paginator, has_previous, has_next):
+        self.object_list = object_list
+        self.number = number
+        self.paginator = paginator
+        self._has_previous = has_previous
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_next(self):
+        return self._has_next
+
+    def has_other_pages(self):
+        return self._has_previous or self._has_next
+
+    def previous_cursor(self):
+        return encode_cursor(self.number - 1, self.object_list[0])
+
+    def next_cursor(self):
+        return encode_cursor(self.number + 1, self.object_list[-1])
+
+
+class KeysetPaginator:
+    """Разбивает заявки на страницы по убыванию (subm_date, id)"""
+
+    keyset = True
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset.order_by("-subm_date", "-pk")
+        self.per_page = per_page
+
+    @property
+    def count(self):
+        queryset = self.queryset.order_by()
+        key = COUNT_KEY.format(
+            hashlib.sha256(str(queryset.query).encode()).hexdigest()[:16]
+        )
+        return cache.get_or_set(key, queryset.count, COUNT_TIMEOUT)
+
+    @property
+    def num_pages(self):
+        return max(math.ceil(self.count / self.per_page), 1)
+
+    def page(self, after=None, before=None, last=False):
+        """Возвращает страницу после курсора after или перед before.
+
+        Без курсоров возвращается первая страница, при last - последняя.
+        """
+        limit = self.per_page + 1
+        if after:
+            number, subm_date, pk = decode_cursor(after)
+            rows = list(
+                self.queryset.filter(
+                    Q(subm_date__lt=subm_date)
+                    | Q(subm_date=subm_date, pk__lt=pk)
+                )[:limit]
+            )
+            return self._page(
+                rows[: self.per_page], number, True, len(rows) == limit
+            )
+
+        if before or last:
+            if before:
+                number, subm_date, pk = decode_cursor(before)
+                queryset = self.queryset.filter(
+                    Q(subm_date__gt=subm_date)
+                    | Q(subm_date=subm_date, pk__gt=pk)
+                )
+            else:
+                number = self.num_pages
+                queryset = self.queryset
+            rows = list(queryset.reverse()[:limit])
+            has_previous = len(rows) == limit
+            rows = rows[: self.per_page][::-1]
+            if not has_previous:
+                number = 1
+            return self._page(rows, number, has_previous, bool(before))
+
+        rows = list(self.queryset[:limit])
+        return self._page(rows[: self.per_page], 1, False, len(rows) == limit)
+
+    def _page(self, rows, number, has_previous, has_next):
+        return KeysetPage(rows, number, self, has_previous, has_next)
+
+
+class KeysetPaginationMixin:
+    """Постраничный вывод ListView по ключу вместо OFFSET"""
+
+    paginator_class = KeysetPaginator
+
+    def paginate_queryset(self, queryset, page_size):
+        paginator = self.paginator_class(queryset, page_size)
+        page = paginator.page(
+            after=self.request.GET.get("after"),
+            before=self.request.GET.get("before"),
+            last="last" in self.request.GET,
+        )
+        return paginator, page, page.object_list, page.has_other_pages()
@@ -0,0 +1,90 @@
+"""Сброс кэшированных справочников и страниц при изменении данных"""
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from .caching import LISTING, PAGES, application_scope, invalidate
+from .context_processors import invalidate_organizers
+from .models import (
+    AgreedStatus,
+    Application,
+    Employee,
+    EventFormat,
+    Order,
+    ParticipatoryRole,
+    Schedule,
+    Sources,
+    StructuralUnit,
+)
+
+
+def _linked_applications(through, instance):
+    """Возвращает id заявок, связанных с instance таблицей through"""
+    return list(
+        through.objects.filter(
+            **{f"{instance._meta.model_name}_id": instance.pk}
+        ).values_list("application_id", flat=True)
+    )
+
+
+@receiver(post_save, sender=StructuralUnit)
+@receiver(post_delete, sender=StructuralUnit)
+def structural_unit_changed(sender, **kwargs):
+    invalidate_organizers()
+
+
+# Справочники, значения которых выводятся на страницах заявок
+REFERENCE_MODELS = (
+    AgreedStatus,
+    Employee,
+    EventFormat,
+    Order,
+    ParticipatoryRole,
+    Sources,
+)
+
+
+def reference_changed(sender, **kwargs):
+    invalidate(PAGES)
+
+
+for model in REFERENCE_MODELS:
+    post_save.connect(reference_changed, sender=model)
+    post_delete.connect(reference_changed, sender=model)
+
+
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+def application_changed(sender, instance, **kwargs):
+    invalidate(LISTING, application_scope(instance.pk))
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(pre_delete, sender=Schedule)
+def schedule_changed(sender, instance, **kwargs):
+    # pre_delete: после удаления периода связи с заявками уже удалены
+    ids = _linked_applications(Application.event_schedule.through, instance)
+    invalidate(LISTING, *map(application_scope, ids))
+
+
+@receiver(m2m_changed, sender=Application.event_schedule.through)
+@receiver(m2m_changed, sender=Application.roles.through)
+def application_relations_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if not reverse:
+        ids = [instance.pk]
+    elif action == "pre_clear":
+        ids = _linked_applications(sender, instance)
+    else:
+        ids = pk_set
+    # Роли выводятся только на странице заявки
+    scopes = [LISTING] if sender is Application.event_schedule.through else []
+    invalidate(*scopes, *map(application_scope, ids))
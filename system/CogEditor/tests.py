@@ -1,8 +1,31 @@
 import datetime
+import time
+from io import StringIO
+from unittest import mock
 
-from django.test import Client, TestCase
+from CogEditor.admin import ApplicationAdmin
+from CogEditor.caching import LOCK_KEY, PAGE_CACHE_TIMEOUT, get_or_compute
+from CogEditor.conflicts import booking_rows, bookings, find_conflicts
+from CogEditor.context_processors import (
+    ORGANIZERS_KEY,
+    organizers_processor,
+)
+from CogEditor.forms import ApplicationForm
+from CogEditor.pagination import KeysetPaginator
+from django.contrib import admin
+from django.contrib.messages import constants
+from django.contrib.messages.storage.base import Message
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
+from mysite.profiling import parse_server_timing, query_budget, view_stats
+from mysite.testing import LOCMEM_CACHES
 
 from .models import (
     AgreedStatus,
@@ -17,6 +40,7 @@ from .models import (
 )
 
 
+@override_settings(CACHES=LOCMEM_CACHES, PAGE_CACHE_TIMEOUT=0)
 class ApplicationViewsTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -136,3 +160,594 @@ class ApplicationViewsTest(TestCase):
             },
         )
         self.assertEqual(response.status_code, 200)  # Или 302 если редирект
+
+    def test_prediction_error_does_not_break_submission(self):
+        AgreedStatus.objects.create(status="Новая", n_stage=5)
+        event_date = timezone.localdate() + datetime.timedelta(days=3)
+        with (
+            mock.patch(
+                "CogNeural.prediction.predict", side_effect=RuntimeError
+            ),
+            self.assertLogs("CogEditor.views", "ERROR"),
+        ):
+            response = self.client.post(
+                reverse("CogEditor:application_classifier"),
+                {
+                    'e_title': 'Новое мероприятие',
+                    'e_description': 'Описание',
+                    'organizer_employee_name': 'Сотрудник',
+                    'event_date': event_date,
+                    'event_time_start': datetime.time(10, 0),
+                    'event_time_end': datetime.time(12, 0),
+                    'organizer': self.unit.id,
+                    'e_format': self.event_format.id,
+                    'number_of_participants': 10,
+                    'roles': [self.role.id],
+                },
+            )
+
+        self.assertRedirects(response, '/', fetch_redirect_response=False)
+        self.assertTrue(
+            Application.objects.filter(e_title='Новое мероприятие').exists()
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PAGE_CACHE_TIMEOUT=0)
+class RequestProfilingTest(TestCase):
+    setUp = ApplicationViewsTest.setUp
+
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse("CogEditor:archive"))
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(REQUEST_PROFILING=True)
+    def test_server_timing_and_stats(self):
+        url = reverse("CogEditor:detail", args=[self.application.id])
+        with query_budget(100) as queries:
+            response = Client().get(url)
+
+        timing = parse_server_timing(response["Server-Timing"])
+        self.assertEqual(int(timing["db"]["desc"]), len(queries))
+        self.assertGreater(timing["tpl"]["dur"], 0)
+        self.assertGreaterEqual(timing["total"]["dur"], timing["db"]["dur"])
+
+        Client().get(url)
+        stats = {s["view"]: s for s in view_stats()}
+        self.assertEqual(stats["CogEditor:detail"]["requests"], 2)
+        self.assertEqual(sum(stats["CogEditor:detail"]["latency"].values()), 2)
+
+        with self.settings(REQUEST_PROFILING=False):
+            out = StringIO()
+            call_command("slowest_views", "--reset", stdout=out)
+        self.assertIn("CogEditor:detail", out.getvalue())
+        self.assertEqual(view_stats(), [])
+
+    def test_query_budgets(self):
+        # Бюджеты не должны расти с количеством заявок на странице
+        year = timezone.now().year
+        month = timezone.now().month
+        budgets = [
+            (reverse("CogEditor:index"), 4),
+            (reverse("CogEditor:archive"), 4),
+            (reverse("CogEditor:archive_by_year", args=[year]), 4),
+            (
+                reverse("CogEditor:archive_by_year_month", args=[year, month]),
+                4,
+            ),
+            (reverse("CogEditor:detail", args=[self.application.id]), 4),
+        ]
+        for url, budget in budgets:
+            with self.subTest(url=url), query_budget(budget):
+                self.client.get(url)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PAGE_CACHE_TIMEOUT=0)
+class ListingQueryCountTest(TestCase):
+    setUp = ApplicationViewsTest.setUp
+
+    def add_applications(self, count):
+        """Заявки с разными связанными объектами и двумя периодами"""
+        now = timezone.now()
+        for i in range(count):
+            unit = StructuralUnit.objects.create(unit=f"Unit {i}")
+            application = Application.objects.create(
+                subm_date=now - datetime.timedelta(minutes=i + 1),
+                application_source=Sources.objects.create(name=f"S {i}"),
+                e_title=f"Event {i}",
+                e_format=EventFormat.objects.create(name=f"F {i}"),
+                organizer=self.unit if i % 2 else unit,
+                organizer_employee=Employee.objects.create(
+                    full_name=f"Employee {i}",
+                    position=self.position,
+                    structural_unit=unit,
+                ),
+                status=AgreedStatus.objects.create(
+                    status=f"Status {i}", n_stage=i
+                ),
+            )
+            application.roles.add(
+                ParticipatoryRole.objects.create(role=f"Role {i}")
+            )
+            for day in (1, 2):
+                start = now + datetime.timedelta(days=day)
+                application.event_schedule.add(
+                    Schedule.objects.create(
+                        start=start, end=start + datetime.timedelta(hours=1)
+                    )
+                )
+
+    def urls(self):
+        now = timezone.now()
+        return [
+            reverse("CogEditor:index"),
+            reverse("CogEditor:archive"),
+            reverse("CogEditor:archive_by_year", args=[now.year]),
+            reverse(
+                "CogEditor:archive_by_year_month", args=[now.year, now.month]
+            ),
+            reverse("CogEditor:organizer_events", args=[self.unit.id]),
+            reverse("CogEditor:detail", args=[self.application.id]),
+        ]
+
+    def count_queries(self):
+        cache.clear()
+        counts = {}
+        for url in self.urls():
+            # Количество заявок для пагинации кэшируется первым запросом
+            self.client.get(url)
+            with query_budget(100) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            counts[url] = len(queries)
+        return counts
+
+    def test_query_count_does_not_depend_on_page_size(self):
+        single = self.count_queries()
+        self.add_applications(15)
+        self.application.roles.add(
+            *ParticipatoryRole.objects.exclude(pk=self.role.pk)
+        )
+        self.assertEqual(self.count_queries(), single)
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PAGE_CACHE_TIMEOUT=0)
+class KeysetPaginationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        unit = StructuralUnit.objects.create(unit="Unit")
+        status = AgreedStatus.objects.create(status="Status", n_stage=1)
+        now = timezone.now()
+        # Несколько заявок с одинаковой датой подачи
+        Application.objects.bulk_create(
+            Application(
+                subm_date=now - datetime.timedelta(hours=i // 3),
+                e_title=f"Event {i}",
+                organizer=unit,
+                status=status,
+            )
+            for i in range(25)
+        )
+        self.expected = list(
+            Application.objects.order_by("-subm_date", "-pk").values_list(
+                "pk", flat=True
+            )
+        )
+        self.url = reverse("CogEditor:archive")
+
+    def get_page(self, params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        page = response.context["page_obj"]
+        return page, [app.pk for app in page]
+
+    def test_walk_forward_and_back(self):
+        pages = []
+        page, ids = self.get_page({})
+        pages.append(ids)
+        while page.has_next():
+            page, ids = self.get_page({"after": page.next_cursor()})
+            pages.append(ids)
+        self.assertEqual(sum(pages, []), self.expected)
+        self.assertEqual(page.number, 3)
+        self.assertEqual(page.paginator.num_pages, 3)
+
+        page, ids = self.get_page({"before": page.previous_cursor()})
+        self.assertEqual(ids, pages[1])
+        self.assertEqual(page.number, 2)
+        self.assertTrue(page.has_next())
+
+        page, ids = self.get_page({"last": ""})
+        self.assertEqual(ids, self.expected[-10:])
+        self.assertFalse(page.has_next())
+
+    def test_deep_page_costs_the_same(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as first:
+            self.client.get(self.url)
+        page, _ = self.get_page({"last": ""})
+        with CaptureQueriesContext(connection) as deep:
+            self.client.get(self.url, {"after": page.previous_cursor()})
+
+        self.assertEqual(len(deep), len(first))
+        self.assertFalse(
+            any("OFFSET" in q["sql"] for q in deep.captured_queries)
+        )
+
+    def test_invalid_cursor(self):
+        for cursor in (
+            "abc",
+            "2:1",
+            "2:99999999999999999999:0",
+            "2:-99999999999999999999:0",
+            f"2:0:{2**63}",
+        ):
+            for param in ("after", "before"):
+                response = self.client.get(self.url, {param: cursor})
+                self.assertEqual(response.status_code, 404, cursor)
+
+
+class ArchiveIndexTest(TestCase):
+    def plan(self, queryset):
+        """План запроса первой страницы постраничного вывода"""
+        return KeysetPaginator(queryset, 10).queryset[:11].explain()
+
+    def test_archive_queries_use_indexes(self):
+        listing = Application.objects.for_listing()
+        cases = [
+            (listing, ["application_subm_date_idx"]),
+            (
+                listing.scheduled_in(2026),
+                ["schedule_start_idx", "application_schedule_cover_idx"],
+            ),
+            (
+                listing.scheduled_in(2026, 12),
+                ["schedule_start_idx", "application_schedule_cover_idx"],
+            ),
+            (
+                listing.filter(organizer_id=1),
+                ["application_organizer_date_idx"],
+            ),
+            (
+                Application.objects.filter(status_id=1),
+                ["application_status_date_idx"],
+            ),
+        ]
+        for queryset, indexes in cases:
+            plan = self.plan(queryset)
+            for index in indexes:
+                with self.subTest(index=index):
+                    self.assertIn(index, plan)
+
+    def test_scheduled_in_month_bounds(self):
+        unit = StructuralUnit.objects.create(unit="Unit")
+        status = AgreedStatus.objects.create(status="Status", n_stage=1)
+        dates = [
+            timezone.make_aware(datetime.datetime(2025, 12, 31, 23, 30)),
+            timezone.make_aware(datetime.datetime(2026, 1, 1, 0, 0)),
+            timezone.make_aware(datetime.datetime(2026, 12, 31, 23, 59)),
+        ]
+        for start in dates:
+            application = Application.objects.create(
+                subm_date=start,
+                e_title=f"Event {start}",
+                organizer=unit,
+                status=status,
+            )
+            application.event_schedule.add(
+                Schedule.objects.create(start=start, end=start)
+            )
+
+        def starts(queryset):
+            return sorted(app.subm_date for app in queryset)
+
+        self.assertEqual(
+            starts(Application.objects.scheduled_in(2026)), dates[1:]
+        )
+        self.assertEqual(
+            starts(Application.objects.scheduled_in(2026, 1)), dates[1:2]
+        )
+        self.assertEqual(
+            starts(Application.objects.scheduled_in(2025, 12)), dates[:1]
+        )
+        self.assertFalse(Application.objects.scheduled_in(2026, 13))
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PAGE_CACHE_TIMEOUT=0)
+class OrganizersProcessorTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.unit = StructuralUnit.objects.create(unit="Unit B")
+        StructuralUnit.objects.create(unit="Unit A")
+
+    def organizers_html(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("CogEditor:archive"))
+        loaded = any(
+            q["sql"].startswith('SELECT "CogEditor_structuralunit"')
+            for q in queries
+        )
+        return response.content.decode(), loaded
+
+    def test_organizers_cached_until_changed(self):
+        html, loaded = self.organizers_html()
+        self.assertTrue(loaded)
+        html, loaded = self.organizers_html()
+        self.assertFalse(loaded)
+        self.assertLess(html.index("Unit A"), html.index("Unit B"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unit.unit = "Unit C"
+            self.unit.save()
+        self.assertIsNone(cache.get(ORGANIZERS_KEY))
+        self.assertIn("Unit C", self.organizers_html()[0])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.unit.delete()
+        self.assertNotIn("Unit C", self.organizers_html()[0])
+
+    def test_not_loaded_when_unused(self):
+        with self.assertNumQueries(0):
+            context = organizers_processor(RequestFactory().get("/"))
+        self.assertIsNone(cache.get(ORGANIZERS_KEY))
+        self.assertEqual(len(context["organizers"]), 2)
+        self.assertEqual(len(cache.get(ORGANIZERS_KEY)), 2)
+
+    def test_organizers_expire(self):
+        self.organizers_html()
+        expired = time.time() + PAGE_CACHE_TIMEOUT + 1
+        with mock.patch(
+            "django.core.cache.backends.locmem.time.time",
+            return_value=expired,
+        ):
+            self.assertIsNone(cache.get(ORGANIZERS_KEY))
+
+    def test_reset_after_generated_units(self):
+        from CogSolver.datagen import generate_reference_data
+
+        self.organizers_html()
+        with self.captureOnCommitCallbacks(execute=True):
+            generate_reference_data(units=2, employees=1, roles=1)
+
+        self.assertIsNone(cache.get(ORGANIZERS_KEY))
+        self.assertIn("Бенчмарк: подразделение 1", self.organizers_html()[0])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, PAGE_CACHE_TIMEOUT=600)
+class PageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        ApplicationViewsTest.setUp(self)
+        self.other = Application.objects.create(
+            subm_date=timezone.now(),
+            application_source=self.source,
+            e_title="Other Event",
+            e_format=self.event_format,
+            organizer=self.unit,
+            organizer_employee=self.employee,
+            status=self.status,
+        )
+
+    def get(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode(), len(queries)
+
+    def test_cached_pages_skip_database(self):
+        for url in (
+            reverse("CogEditor:index"),
+            reverse("CogEditor:archive"),
+            reverse("CogEditor:organizer_events", args=[self.unit.id]),
+            reverse("CogEditor:detail", args=[self.application.id]),
+        ):
+            html, queries = self.get(url)
+            self.assertGreater(queries, 0)
+            self.assertEqual(self.get(url), (html, 0))
+
+    def test_invalidated_by_signals(self):
+        archive = reverse("CogEditor:archive")
+        detail = reverse("CogEditor:detail", args=[self.application.id])
+        other = reverse("CogEditor:detail", args=[self.other.id])
+        for url in (archive, detail, other):
+            self.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.application.e_title = "Renamed Event"
+            self.application.save()
+        html, queries = self.get(archive)
+        self.assertIn("Renamed Event", html)
+        self.assertIn("Renamed Event", self.get(detail)[0])
+        # Страницы других заявок остаются в кэше
+        self.assertEqual(self.get(other)[1], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.schedule.start = datetime.datetime(
+                2020, 5, 4, 10, tzinfo=datetime.timezone.utc
+            )
+            self.schedule.save()
+        self.assertIn("04.05.2020", self.get(detail)[0])
+        self.assertEqual(self.get(other)[1], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.status.status = "Renamed Status"
+            self.status.save()
+        self.assertIn("Renamed Status", self.get(other)[0])
+
+    def test_invalidated_by_reference_changes(self):
+        detail = reverse("CogEditor:detail", args=[self.application.id])
+        self.get(detail)
+
+        for obj, field, value in (
+            (self.employee, "full_name", "Renamed Employee"),
+            (self.event_format, "name", "Renamed Format"),
+            (self.source, "name", "Renamed Source"),
+            (self.role, "role", "Renamed Role"),
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                setattr(obj, field, value)
+                obj.save()
+            self.assertIn(value, self.get(detail)[0])
+
+    def test_invalidated_by_bulk_status_update(self):
+        from CogSolver.models import Rule, RuleEngine
+
+        url = reverse("CogEditor:detail", args=[self.application.id])
+        self.get(url)
+        Rule.objects.create(
+            name="Text length",
+            condition_type="text_length",
+            min_text_length=1000,
+            new_status=AgreedStatus.objects.create(
+                status="Rule Status", n_stage=2
+            ),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            RuleEngine.apply_rules_in_db()
+        self.assertIn("Rule Status", self.get(url)[0])
+
+    def test_not_cached_with_pending_messages(self):
+        url = reverse("CogEditor:archive")
+        self.get(url)
+        storage = CookieStorage(RequestFactory().get(url))
+        self.client.cookies[storage.cookie_name] = storage._encode(
+            [Message(constants.INFO, "Test Message")]
+        )
+        html, queries = self.get(url)
+        self.assertIn("Test Message", html)
+        self.assertGreater(queries, 0)
+        html, queries = self.get(url)
+        self.assertNotIn("Test Message", html)
+        self.assertEqual(queries, 0)
+
+    def test_stale_value_served_while_locked(self):
+        key = "test:stampede"
+        self.assertEqual(get_or_compute(key, lambda: 1, timeout=0), 1)
+        # Запись устарела, другой процесс пересчитывает ее
+        cache.add(LOCK_KEY.format(key), 1)
+        self.assertEqual(get_or_compute(key, lambda: 2), 1)
+        cache.delete(LOCK_KEY.format(key))
+        self.assertEqual(get_or_compute(key, lambda: 3), 3)
+        self.assertEqual(get_or_compute(key, lambda: 4), 3)
+
+
+class ScheduleConflictsTest(TestCase):
+    def setUp(self):
+        ApplicationViewsTest.setUp(self)
+        # Этап 1 (отклонено) площадку не занимает
+        self.status.n_stage = 2
+        self.status.save()
+
+    def book(self, title, start, hours, setup=False):
+        application = Application.objects.create(
+            subm_date=timezone.now(),
+            e_title=title,
+            organizer=self.unit,
+            status=self.status,
+        )
+        schedule = Schedule.objects.create(
+            start=start, end=start + datetime.timedelta(hours=hours)
+        )
+        if setup:
+            application.installation_deinstallation = schedule
+            application.save()
+        else:
+            application.event_schedule.add(schedule)
+        return application
+
+    def test_bookings_overlapping_period(self):
+        start = self.schedule.start
+        hour = datetime.timedelta(hours=1)
+        setup = self.book("Setup", start - 3 * hour, 3, setup=True)
+
+        self.assertEqual(
+            [b.application_id for b in bookings(start - hour, start + hour)],
+            [setup.id, self.application.id],
+        )
+        # Периоды, только касающиеся друг друга, не пересекаются
+        self.assertEqual(
+            bookings(self.schedule.end, self.schedule.end + hour), []
+        )
+        self.assertEqual(
+            bookings(start, start + hour, exclude=[self.application.id]), []
+        )
+
+    def test_find_conflicts(self):
+        start = self.schedule.start
+        hour = datetime.timedelta(hours=1)
+        other = self.book("Other", start + hour, 3)
+        self.book("Later", start + 5 * hour, 1)
+        # Монтаж своей заявки не пересекается с ее мероприятием
+        self.application.installation_deinstallation = Schedule.objects.create(
+            start=start - hour, end=start + 3 * hour
+        )
+        self.application.save()
+
+        conflicts = find_conflicts(start - 2 * hour, start + 10 * hour)
+        self.assertEqual(
+            sorted(
+                (first.application_id, second.application_id)
+                for first, second in conflicts
+            ),
+            [(self.application.id, other.id)] * 2,
+        )
+
+    def test_form_check(self):
+        start = self.schedule.start + datetime.timedelta(minutes=30)
+        end = start + datetime.timedelta(hours=1)
+        form = ApplicationForm()
+        with (
+            self.settings(SCHEDULE_CONFLICTS="reject"),
+            self.assertRaisesMessage(ValidationError, "Test Event"),
+        ):
+            form.check_conflicts(start, end)
+
+        # По умолчанию пересечения только отмечаются
+        form.check_conflicts(start, end)
+        self.assertEqual(
+            [b.application_id for b in form.schedule_conflicts],
+            [self.application.id],
+        )
+
+        form = ApplicationForm(instance=self.application)
+        form.check_conflicts(start, end)
+        self.assertEqual(form.schedule_conflicts, [])
+
+    def test_released_stages_do_not_book(self):
+        start = self.schedule.start
+        hour = datetime.timedelta(hours=1)
+        rejected = AgreedStatus.objects.create(status="Rejected", n_stage=1)
+        setup = self.book("Setup", start - hour, 2, setup=True)
+        setup.status = rejected
+        setup.save()
+
+        self.assertEqual(
+            [b.application_id for b in bookings(start, start + hour)],
+            [self.application.id],
+        )
+        with self.settings(SCHEDULE_RELEASED_STAGES=[1, 2]):
+            self.assertEqual(bookings(start, start + hour), [])
+
+    def test_admin_action_covers_setup_period(self):
+        start = self.schedule.start
+        hour = datetime.timedelta(hours=1)
+        setup = self.book("Setup", start + hour, 3, setup=True)
+        model_admin = ApplicationAdmin(Application, admin.site)
+
+        with mock.patch.object(model_admin, "message_user") as message_user:
+            model_admin.find_schedule_conflicts(
+                RequestFactory().get("/"),
+                Application.objects.filter(pk=setup.pk),
+            )
+
+        self.assertEqual(
+            message_user.call_args_list[0].args[1], "Найдено пересечений: 1."
+        )
+        self.assertIn("Setup", message_user.call_args_list[1].args[1])
+
+    def test_query_uses_indexes(self):
+        start = self.schedule.start
+        plan = booking_rows(
+            start, start + datetime.timedelta(hours=1)
+        ).explain()
+        self.assertIn("schedule_end_start_idx", plan)
+        self.assertIn("application_schedule_cover_idx", plan)
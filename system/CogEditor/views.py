@@ -1,11 +1,18 @@
+import logging
+
+from CogEditor.caching import CachedPageMixin, application_scope
 from CogEditor.forms import ApplicationForm
 from CogEditor.models import Application, StructuralUnit
+from CogEditor.pagination import KeysetPaginationMixin
+from django.contrib import messages
 from django.shortcuts import render
 from django.views import generic
 from django.views.generic.edit import CreateView
 
+logger = logging.getLogger(__name__)
+
 
-class IndexView(generic.ListView):
+class IndexView(CachedPageMixin, generic.ListView):
     template_name = "CogEditor/index.html"
     context_object_name = "latest_application_list"
     paginate_by = 10
@@ -13,27 +20,27 @@ class IndexView(generic.ListView):
     def get_queryset(self):
         # TODO - исправить
         """Возвращает 5 ближайших мероприятий"""
-        return Application.objects.order_by("-subm_date")[:5]
+        return Application.objects.for_listing().order_by("-subm_date")[:5]
 
 
-class DetailView(generic.DetailView):
-    model = Application
+class DetailView(CachedPageMixin, generic.DetailView):
+    queryset = Application.objects.for_detail()
     template_name = "CogEditor/detail.html"
 
+    def get_cache_scopes(self):
+        return [application_scope(self.kwargs["pk"])]
+
 
-class ArchiveByYearView(generic.ListView):
+class ArchiveByYearView(
+    CachedPageMixin, KeysetPaginationMixin, generic.ListView
+):
     template_name = "CogEditor/archive_list.html"
     context_object_name = "application_list"
     paginate_by = 10
 
     def get_queryset(self):
         year = self.kwargs["year"]
-        return (
-            Application.objects.filter(event_schedule__start__year=year)
-            .distinct()
-            .order_by("-subm_date")
-            .prefetch_related("event_schedule")
-        )
+        return Application.objects.for_listing().scheduled_in(year)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -42,7 +49,9 @@ class ArchiveByYearView(generic.ListView):
         return context
 
 
-class ArchiveByYearMonthView(generic.ListView):
+class ArchiveByYearMonthView(
+    CachedPageMixin, KeysetPaginationMixin, generic.ListView
+):
     template_name = "CogEditor/archive_list.html"
     context_object_name = "application_list"
     paginate_by = 10
@@ -50,15 +59,7 @@ class ArchiveByYearMonthView(generic.ListView):
     def get_queryset(self):
         year = self.kwargs["year"]
         month = self.kwargs["month"]
-        return (
-            Application.objects.filter(
-                event_schedule__start__year=year,
-                event_schedule__start__month=month,
-            )
-            .distinct()
-            .order_by("-subm_date")
-            .prefetch_related("event_schedule")
-        )
+        return Application.objects.for_listing().scheduled_in(year, month)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -68,17 +69,17 @@ class ArchiveByYearMonthView(generic.ListView):
         return context
 
 
-class OrganizerEventsView(generic.ListView):
+class OrganizerEventsView(
+    CachedPageMixin, KeysetPaginationMixin, generic.ListView
+):
     template_name = "CogEditor/organizer_events.html"
     context_object_name = "application_list"
     paginate_by = 10
 
     def get_queryset(self):
         organizer_id = self.kwargs["id"]
-        return (
-            Application.objects.filter(organizer_id=organizer_id)
-            .order_by("-subm_date")
-            .prefetch_related("event_schedule")
+        return Application.objects.for_listing().filter(
+            organizer_id=organizer_id
         )
 
     def get_context_data(self, **kwargs):
@@ -87,10 +88,12 @@ class OrganizerEventsView(generic.ListView):
         return context
 
 
-class FullArchiveView(generic.ListView):
+class FullArchiveView(
+    CachedPageMixin, KeysetPaginationMixin, generic.ListView
+):
     template_name = "CogEditor/archive_list.html"
     context_object_name = "application_list"
-    queryset = Application.objects.all().order_by("-subm_date")
+    queryset = Application.objects.for_listing()
     paginate_by = 10
 
 
@@ -126,6 +129,35 @@ class ApplicationCreateView(CreateView):
         )
         return kwargs
 
+    def form_valid(self, form):
+        response = super().form_valid(form)
+
+        if form.schedule_conflicts:
+            messages.warning(
+                self.request,
+                'Время пересекается с бронированиями: '
+                + ', '.join(map(str, form.schedule_conflicts)),
+            )
+
+        # Прогноз согласования по уже обученной модели
+        from CogNeural.prediction import predict
+
+        # Ошибка прогноза не должна мешать отправке заявки
+        try:
+            prediction = predict(self.object)
+        except Exception:
+            logger.exception(
+                f"Prediction failed for application {self.object.pk}"
+            )
+            prediction = None
+        if prediction and prediction['approval_probability'] is not None:
+            messages.info(
+                self.request,
+                'Заявка отправлена. Вероятность согласования: '
+                f'{prediction["approval_probability"]:.0%}',
+            )
+        return response
+
 
 def personal(request):
     template = 'CogEditor/personal-data-consent.html'
@@ -1,5 +1,6 @@
 import pandas as pd
 from CogEditor.models import Application
+from CogNeural.features import schedule_aggregates
 from django.db.models import DurationField, ExpressionWrapper, F
 
 
@@ -22,14 +23,15 @@ def process_time_features(df):
     # Оставляем только те столбцы, которые есть в DataFrame
     actual_cols_to_drop = [col for col in cols_to_drop if col in existing_cols]
 
-    # Преобразуем timedelta в часы (если столбцы существуют)
+    # Преобразуем timedelta в часы (если столбцы существуют). Без
+    # расписания столбцы состоят из None и не имеют типа timedelta
     if "processing_time" in existing_cols:
         df["processing_time_hours"] = (
-            df["processing_time"].dt.total_seconds() / 3600
+            pd.to_timedelta(df["processing_time"]).dt.total_seconds() / 3600
         )
     if "event_duration" in existing_cols:
         df["event_duration_hours"] = (
-            df["event_duration"].dt.total_seconds() / 3600
+            pd.to_timedelta(df["event_duration"]).dt.total_seconds() / 3600
         )
 
     # Извлекаем признаки из дат (если столбцы существуют)
@@ -56,53 +58,70 @@ def process_time_features(df):
     return df
 
 
-def main():
-    # 1. Собираем данные и сразу преобразуем в DataFrame
-    applications = Application.objects.annotate(
-        processing_time=ExpressionWrapper(
-            F("event_schedule__start") - F("subm_date"),
-            output_field=DurationField(),
-        ),
-        event_duration=ExpressionWrapper(
-            F("event_schedule__end") - F("event_schedule__start"),
-            output_field=DurationField(),
-        ),
-    ).values(
-        "id",
-        "subm_date",
-        "status_id",
-        "number_of_participants",
-        "requires_technical_support",
-        "processing_time",
-        "event_duration",
-        "event_schedule__start",
-        "event_schedule__end",
-        "installation_deinstallation__start",
-        "installation_deinstallation__end",
+def load_frame():
+    """Загружает заявки в DataFrame с временными признаками"""
+    # 1. Собираем данные: одна строка на заявку, расписание агрегируется
+    # в базе данных
+    applications = (
+        Application.objects.order_by()
+        .annotate(**schedule_aggregates())
+        .annotate(
+            processing_time=ExpressionWrapper(
+                F("first_start") - F("subm_date"),
+                output_field=DurationField(),
+            ),
+            event_duration=ExpressionWrapper(
+                F("last_end") - F("first_start"),
+                output_field=DurationField(),
+            ),
+        )
+        .values(
+            "id",
+            "subm_date",
+            "status_id",
+            "number_of_participants",
+            "requires_technical_support",
+            "processing_time",
+            "event_duration",
+            "first_start",
+            "last_end",
+            "schedule_count",
+            "booked_time",
+        )
     )
 
-    df = pd.DataFrame.from_records(applications)
+    df = pd.DataFrame.from_records(applications).rename(
+        columns={
+            "first_start": "event_schedule__start",
+            "last_end": "event_schedule__end",
+        }
+    )
+    df["booked_hours"] = (
+        pd.to_timedelta(df.pop("booked_time")).dt.total_seconds() / 3600
+    )
 
     # 2. Преобразуем строки в datetime
     datetime_cols = [
         "subm_date",
         "event_schedule__start",
         "event_schedule__end",
-        "installation_deinstallation__start",
-        "installation_deinstallation__end",
     ]
 
+    # utc=True: столбцы без значений иначе получают тип без часового пояса
     for col in datetime_cols:
-        df[col] = pd.to_datetime(df[col])
+        df[col] = pd.to_datetime(df[col], utc=True)
 
     # Применяем функцию только после преобразования типов
-    df = process_time_features(df)
+    return process_time_features(df)
+
+
+def main():
+    df = load_frame()
 
     # Дальнейшая обработка и моделирование...
     print(df.head())
 
     import matplotlib.pyplot as plt
-    import pandas as pd
     import seaborn as sns
     from sklearn.linear_model import LogisticRegression
     from sklearn.metrics import classification_report, confusion_matrix
@@ -137,6 +156,8 @@ def main():
         "processing_time_hours",
         "event_duration_hours",
         "days_until_event",
+        "schedule_count",
+        "booked_hours",
     ]
 
     x_train[num_cols] = scaler.fit_transform(x_train[num_cols])
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CogneuralConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'CogNeural'
+
+    def ready(self):
+        from CogNeural import signals  # noqa: F401
@@ -0,0 +1,168 @@
+"""Сравнение моделей на скользящем разбиении по дате подачи.
+
+Заявки упорядочиваются по subm_date: в каждой проверке модель обучается
+на заявках до некоторой даты и проверяется на следующих за ними
+(TimeSeriesSplit по заявкам), поэтому будущие заявки не попадают в
+обучение. Модели и разбиения обучаются параллельно (joblib), результаты
+кэшируются по отпечатку данных.
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+from CogNeural.training import NUM_COLS, load_dataset
+from django.core.cache import cache
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import HistGradientBoostingClassifier
+from sklearn.impute import SimpleImputer
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import balanced_accuracy_score, f1_score
+from sklearn.model_selection import TimeSeriesSplit
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import LinearSVC
+
+N_SPLITS = 5
+# Метрика, по которой выбирается лучшая модель
+SCORING = "f1_macro"
+EVALUATION_KEY = "cogneural:evaluation:{}"
+
+
+def _scaled(columns, model):
+    """Масштабирует числовые признаки и заполняет пропуски перед model"""
+    return make_pipeline(
+        SimpleImputer(strategy="median"),
+        ColumnTransformer(
+            [
+                (
+                    "scale",
+                    StandardScaler(),
+                    [columns.index(c) for c in NUM_COLS if c in columns],
+                )
+            ],
+            remainder="passthrough",
+        ),
+        model,
+    )
+
+
+def candidate_models(columns):
+    """Возвращает сравниваемые модели по имени"""
+    return {
+        "logistic_regression": _scaled(
+            columns,
+            LogisticRegression(
+                max_iter=1000, random_state=42, class_weight="balanced"
+            ),
+        ),
+        "gradient_boosting": HistGradientBoostingClassifier(
+            class_weight="balanced", random_state=42
+        ),
+        "calibrated_linear_svm": _scaled(
+            columns,
+            CalibratedClassifierCV(
+                LinearSVC(class_weight="balanced", random_state=42), cv=3
+            ),
+        ),
+    }
+
+
+def time_splits(application_ids, n_splits=N_SPLITS):
+    """Возвращает пары (обучение, проверка) булевых масок по строкам.
+
+    application_ids должны быть упорядочены по дате подачи. Строки одной
+    заявки всегда попадают в одну часть разбиения.
+    """
+    codes, uniques = pd.factorize(np.asarray(application_ids))
+    splits = []
+    for train, test in TimeSeriesSplit(n_splits=n_splits).split(uniques):
+        splits.append((codes <= train[-1], np.isin(codes, test)))
+    return splits
+
+
+def fingerprint(df, models, n_splits):
+    """Отпечаток данных и параметров сравнения"""
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy())
+    digest.update(repr(list(df.columns)).encode())
+    for name, model in sorted(models.items()):
+        digest.update(f"{name}:{model!r}".encode())
+    digest.update(str(n_splits).encode())
+    return digest.hexdigest()[:16]
+
+
+def _evaluate_fold(name, model, fold, features, labels, train, test):
+    try:
+        model = clone(model).fit(features[train], labels[train])
+    except ValueError as e:
+        # Например, в первых разбиениях может оказаться один класс
+        return {"model": name, "fold": fold, "error": str(e)}
+
+    predicted = model.predict(features[test])
+    return {
+        "model": name,
+        "fold": fold,
+        "train_size": int(train.sum()),
+        "test_size": int(test.sum()),
+        "f1_macro": float(f1_score(labels[test], predicted, average="macro")),
+        "balanced_accuracy": float(
+            balanced_accuracy_score(labels[test], predicted)
+        ),
+    }
+
+
+def compare_models(df=None, n_splits=N_SPLITS, n_jobs=-1, refresh=False):
+    """Сравнивает модели и возвращает результаты, лучшая модель первая.
+
+    Результат: словарь с отпечатком данных (fingerprint), списком
+    результатов по моделям (results) и именем лучшей модели (best).
+    Повторный запуск на неизменных данных берет результат из кэша.
+    """
+    if df is None:
+        df = load_dataset()
+
+    X = df.drop(columns=["id", "status_id"])
+    models = candidate_models(list(X.columns))
+    key = EVALUATION_KEY.format(fingerprint(df, models, n_splits))
+    if not refresh and (cached := cache.get(key)) is not None:
+        return cached
+
+    y = df["status_id"].to_numpy()
+    X = X.to_numpy(dtype=float)
+    splits = list(enumerate(time_splits(df["id"], n_splits)))
+    folds = Parallel(n_jobs=n_jobs)(
+        delayed(_evaluate_fold)(name, model, fold, X, y, train, test)
+        for name, model in models.items()
+        for fold, (train, test) in splits
+    )
+
+    results = []
+    for name in models:
+        scores = [f for f in folds if f["model"] == name and "error" not in f]
+        result = {
+            "model": name,
+            "folds": [f for f in folds if f["model"] == name],
+        }
+        for metric in ("f1_macro", "balanced_accuracy"):
+            values = [f[metric] for f in scores]
+            result[metric] = float(np.mean(values)) if values else None
+            result[f"{metric}_std"] = float(np.std(values)) if values else None
+        results.append(result)
+
+    results.sort(
+        key=lambda r: -1 if r[SCORING] is None else r[SCORING], reverse=True
+    )
+    comparison = {
+        "fingerprint": key.rsplit(":", 1)[-1],
+        "n_splits": n_splits,
+        "results": results,
+        "best": (
+            results[0]["model"] if results[0][SCORING] is not None else None
+        ),
+    }
+    cache.set(key, comparison, None)
+    return comparison
@@ -0,0 +1,145 @@
+"""Признаки заявки для модели прогнозирования статуса.
+
+Модуль не зависит от pandas и NumPy и используется при сохранении заявок
+для обновления ApplicationFeatures.
+"""
+
+import datetime
+import math
+
+from django.db.models import (
+    Count,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    Max,
+    Min,
+    Sum,
+)
+
+# Версия набора признаков. При изменении состава или способа вычисления
+# признаков версию нужно увеличить, тогда хранилище признаков заполнится
+# заново
+FEATURE_SCHEMA_VERSION = 2
+
+# Признаки в порядке обучения
+FEATURE_COLUMNS = [
+    "description_len",
+    "number_of_participants",
+    "requires_technical_support",
+    "processing_time_hours",
+    "event_duration_hours",
+    "subm_day_of_week",
+    "subm_hour",
+    "event_start_hour",
+    "event_day_of_week",
+    "days_until_event",
+    "schedule_count",
+    "booked_hours",
+]
+
+
+def schedule_aggregates(prefix="event_schedule__"):
+    """Агрегаты расписания заявки для annotate().
+
+    Одна строка на заявку вместо строки на каждый период расписания:
+    начало первого периода, окончание последнего, число периодов и
+    суммарная продолжительность забронированного времени.
+    """
+    return {
+        "first_start": Min(f"{prefix}start"),
+        "last_end": Max(f"{prefix}end"),
+        "schedule_count": Count(f"{prefix}pk"),
+        "booked_time": Sum(
+            ExpressionWrapper(
+                F(f"{prefix}end") - F(f"{prefix}start"),
+                output_field=DurationField(),
+            )
+        ),
+    }
+
+
+def time_features(subm_date, start=None, end=None):
+    """Вычисляет временные признаки одной заявки.
+
+    start - начало первого периода расписания, end - окончание
+    последнего. Отсутствующие значения заменяются на NaN.
+    """
+    subm_date = subm_date.astimezone(datetime.timezone.utc)
+    features = {
+        "processing_time_hours": math.nan,
+        "event_duration_hours": math.nan,
+        "subm_day_of_week": subm_date.weekday(),
+        "subm_hour": subm_date.hour,
+        "event_start_hour": math.nan,
+        "event_day_of_week": math.nan,
+        "days_until_event": math.nan,
+    }
+    if start is not None:
+        start = start.astimezone(datetime.timezone.utc)
+        features["processing_time_hours"] = (
+            start - subm_date
+        ).total_seconds() / 3600
+        features["event_start_hour"] = start.hour
+        features["event_day_of_week"] = start.weekday()
+        features["days_until_event"] = (start - subm_date).days
+        if end is not None:
+            features["event_duration_hours"] = (
+                end - start
+            ).total_seconds() / 3600
+    return features
+
+
+def aggregated_features(
+    description_len,
+    number_of_participants,
+    requires_technical_support,
+    subm_date,
+    first_start=None,
+    last_end=None,
+    schedule_count=0,
+    booked_time=None,
+):
+    """Возвращает признаки заявки по ее полям и агрегатам расписания"""
+    return {
+        "description_len": (
+            math.nan if description_len is None else description_len
+        ),
+        "number_of_participants": number_of_participants,
+        "requires_technical_support": int(requires_technical_support),
+        **time_features(subm_date, first_start, last_end),
+        "schedule_count": schedule_count,
+        "booked_hours": (
+            math.nan
+            if booked_time is None
+            else booked_time.total_seconds() / 3600
+        ),
+    }
+
+
+def application_features(application):
+    """Возвращает признаки заявки в виде словаря.
+
+    Агрегаты расписания вычисляются так же, как schedule_aggregates, но
+    по загруженному расписанию заявки.
+    """
+    schedules = list(application.event_schedule.all())
+    starts = [s.start for s in schedules if s.start is not None]
+    ends = [s.end for s in schedules if s.end is not None]
+    booked = [
+        s.end - s.start
+        for s in schedules
+        if s.start is not None and s.end is not None
+    ]
+    description = application.e_description
+
+    return aggregated_features(
+        description_len=None if description is None else len(description),
+        number_of_participants=application.number_of_participants,
+        requires_technical_support=application.requires_technical_support,
+        subm_date=application.subm_date,
+        first_start=min(starts, default=None),
+        last_end=max(ends, default=None),
+        schedule_count=len(schedules),
+        booked_time=sum(booked, datetime.timedelta()) if booked else None,
+    )
@@ -0,0 +1,52 @@
+from CogNeural.evaluation import N_SPLITS, compare_models
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает модели прогнозирования статуса на скользящем разбиении "
+        "по дате подачи заявок"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--splits",
+            type=int,
+            default=N_SPLITS,
+            help="Количество разбиений",
+        )
+        parser.add_argument(
+            "--jobs",
+            type=int,
+            default=-1,
+            help="Количество параллельных процессов (-1 — все ядра)",
+        )
+        parser.add_argument(
+            "--refresh",
+            action="store_true",
+            help="Пересчитать, даже если результат есть в кэше",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            comparison = compare_models(
+                n_splits=options["splits"],
+                n_jobs=options["jobs"],
+                refresh=options["refresh"],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f"Отпечаток данных: {comparison['fingerprint']}")
+        for result in comparison["results"]:
+            if result["f1_macro"] is None:
+                self.stdout.write(f"{result['model']:<24} нет результатов")
+                continue
+            self.stdout.write(
+                f"{result['model']:<24} "
+                f"F1 {result['f1_macro']:.3f} ± {result['f1_macro_std']:.3f}  "
+                "сбалансированная точность "
+                f"{result['balanced_accuracy']:.3f} "
+                f"± {result['balanced_accuracy_std']:.3f}"
+            )
+        self.stdout.write(f"Лучшая модель: {comparison['best']}")
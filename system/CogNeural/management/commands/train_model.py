@@ -0,0 +1,51 @@
+from CogNeural.registry import publish
+from CogNeural.streaming import STREAM_CHUNK_SIZE, train_streaming
+from CogNeural.tasks import request_training
+from CogNeural.training import train_model
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Обучает модель прогнозирования статуса и публикует новую версию"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--background",
+            action="store_true",
+            help="Поставить обучение в очередь Celery",
+        )
+        parser.add_argument(
+            "--streaming",
+            action="store_true",
+            help=(
+                "Обучать SGDClassifier по порциям, не загружая все заявки "
+                "в память"
+            ),
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=STREAM_CHUNK_SIZE,
+            help="Количество строк в порции при потоковом обучении",
+        )
+
+    def handle(self, *args, **options):
+        if options["background"]:
+            if request_training(options["streaming"]):
+                self.stdout.write("Обучение поставлено в очередь")
+            else:
+                self.stdout.write("Обучение уже выполняется")
+            return
+
+        try:
+            if options["streaming"]:
+                bundle = train_streaming(chunk_size=options["chunk_size"])
+            else:
+                bundle = train_model()
+        except ValueError as e:
+            raise CommandError(str(e))
+        path = publish(bundle)
+        self.stdout.write(
+            f"Опубликована модель {bundle.version} "
+            f"({bundle.samples} записей): {path}"
+        )
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('CogEditor', '0019_alter_application_technical_requirements'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationFeatures',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'schema_version',
+                    models.PositiveSmallIntegerField(
+                        default=1, verbose_name='Версия набора признаков'
+                    ),
+                ),
+                ('description_len', models.IntegerField(null=True)),
+                ('number_of_participants', models.IntegerField()),
+                ('requires_technical_support', models.SmallIntegerField()),
+                ('processing_time_hours', models.FloatField(null=True)),
+                ('event_duration_hours', models.FloatField(null=True)),
+                ('subm_day_of_week', models.SmallIntegerField()),
+                ('subm_hour', models.SmallIntegerField()),
+                ('event_start_hour', models.SmallIntegerField(null=True)),
+                ('event_day_of_week', models.SmallIntegerField(null=True)),
+                ('days_until_event', models.IntegerField(null=True)),
+                (
+                    'updated_at',
+                    models.DateTimeField(
+                        auto_now=True, verbose_name='Время обновления'
+                    ),
+                ),
+                (
+                    'application',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='ml_features',
+                        to='CogEditor.application',
+                        verbose_name='Заявка',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'признаки заявки',
+                'verbose_name_plural': 'Признаки заявок',
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('application', 'schema_version'),
+                        name='unique_application_features_version',
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:47
+
+from django.db import migrations, models
+
+
+def delete_stale_features(apps, schema_editor):
+    # Признаки версии 1 не содержат агрегатов расписания и пересчитываются
+    # перед обучением
+    ApplicationFeatures = apps.get_model('CogNeural', 'ApplicationFeatures')
+    ApplicationFeatures.objects.filter(schema_version__lt=2).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CogNeural', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='applicationfeatures',
+            name='booked_hours',
+            field=models.FloatField(null=True),
+        ),
+        migrations.AddField(
+            model_name='applicationfeatures',
+            name='schedule_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='applicationfeatures',
+            name='schema_version',
+            field=models.PositiveSmallIntegerField(
+                default=2, verbose_name='Версия набора признаков'
+            ),
+        ),
+        migrations.RunPython(
+            delete_stale_features, migrations.RunPython.noop
+        ),
+    ]
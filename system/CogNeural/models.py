@@ -0,0 +1,121 @@
+import math
+from itertools import islice
+
+from CogEditor.models import Application
+from CogNeural.features import (
+    FEATURE_COLUMNS,
+    FEATURE_SCHEMA_VERSION,
+    aggregated_features,
+    schedule_aggregates,
+)
+from django.db import models
+from django.db.models.functions import Length
+
+# Количество заявок, обновляемых за один запрос
+FEATURES_CHUNK_SIZE = 2000
+
+
+class ApplicationFeatures(models.Model):
+    """Признаки заявки для обучения и применения модели"""
+
+    application = models.ForeignKey(
+        Application,
+        on_delete=models.CASCADE,
+        related_name="ml_features",
+        verbose_name="Заявка",
+    )
+    schema_version = models.PositiveSmallIntegerField(
+        default=FEATURE_SCHEMA_VERSION,
+        verbose_name="Версия набора признаков",
+    )
+    description_len = models.IntegerField(null=True)
+    number_of_participants = models.IntegerField()
+    requires_technical_support = models.SmallIntegerField()
+    processing_time_hours = models.FloatField(null=True)
+    event_duration_hours = models.FloatField(null=True)
+    subm_day_of_week = models.SmallIntegerField()
+    subm_hour = models.SmallIntegerField()
+    event_start_hour = models.SmallIntegerField(null=True)
+    event_day_of_week = models.SmallIntegerField(null=True)
+    days_until_event = models.IntegerField(null=True)
+    schedule_count = models.PositiveIntegerField(default=0)
+    booked_hours = models.FloatField(null=True)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Время обновления",
+    )
+
+    class Meta:
+        verbose_name = "признаки заявки"
+        verbose_name_plural = "Признаки заявок"
+        constraints = [
+            models.UniqueConstraint(
+                fields=["application", "schema_version"],
+                name="unique_application_features_version",
+            )
+        ]
+
+    def __str__(self):
+        return f"Признаки заявки {self.application_id}"
+
+    @classmethod
+    def from_row(cls, application_id, **fields):
+        features = {
+            name: (
+                None
+                if isinstance(value, float) and math.isnan(value)
+                else value
+            )
+            for name, value in aggregated_features(**fields).items()
+        }
+        return cls(
+            application_id=application_id,
+            schema_version=FEATURE_SCHEMA_VERSION,
+            **features,
+        )
+
+    @classmethod
+    def refresh(cls, application_ids):
+        """Пересчитывает признаки заявок с указанными id.
+
+        Расписание агрегируется в базе данных (GROUP BY по заявке),
+        поэтому на каждую заявку приходится одна строка.
+        """
+        ids = iter(application_ids)
+        while chunk := list(islice(ids, FEATURES_CHUNK_SIZE)):
+            rows = (
+                Application.objects.filter(pk__in=chunk)
+                .order_by()
+                .annotate(
+                    description_len=Length("e_description"),
+                    **schedule_aggregates(),
+                )
+                .values(
+                    "pk",
+                    "description_len",
+                    "number_of_participants",
+                    "requires_technical_support",
+                    "subm_date",
+                    "first_start",
+                    "last_end",
+                    "schedule_count",
+                    "booked_time",
+                )
+            )
+            cls.objects.bulk_create(
+                [cls.from_row(row.pop("pk"), **row) for row in rows],
+                update_conflicts=True,
+                unique_fields=["application", "schema_version"],
+                update_fields=FEATURE_COLUMNS + ["updated_at"],
+            )
+
+    @classmethod
+    def refresh_missing(cls):
+        """Заполняет признаки заявок, для которых их еще нет"""
+        cls.refresh(
+            list(
+                Application.objects.exclude(
+                    ml_features__schema_version=FEATURE_SCHEMA_VERSION
+                ).values_list("pk", flat=True)
+            )
+        )
@@ -0,0 +1,109 @@
+"""Прогноз статуса заявки обученной моделью.
+
+Признаки сохраненных заявок читаются из ApplicationFeatures одним
+запросом, для остальных вычисляются без DataFrame, поэтому прогноз одной
+заявки занимает единицы миллисекунд. predict_many оценивает несколько заявок
+одним вызовом predict_proba.
+"""
+
+import numpy as np
+from CogEditor.models import Application
+from CogNeural.features import FEATURE_SCHEMA_VERSION, application_features
+from CogNeural.models import ApplicationFeatures
+from CogNeural.registry import get_model
+
+# Наименование статуса, вероятность которого считается вероятностью
+# согласования
+APPROVED_STATUS = "Согласовано"
+# Количество заявок, оцениваемых одним вызовом predict_proba
+PREDICT_CHUNK_SIZE = 1000
+
+
+def predict_many(applications, bundle=None):
+    """Возвращает прогнозы для списка заявок в том же порядке.
+
+    Для заявок без полного набора признаков (например, без расписания)
+    возвращается None. Если модель еще не обучена, возвращается None
+    вместо списка.
+    """
+    if bundle is None:
+        bundle = get_model()
+    if bundle is None:
+        return None
+
+    applications = list(applications)
+    if not applications:
+        return []
+
+    stored = _stored_features(applications, bundle.feature_columns)
+    rows = np.array(
+        [
+            stored.get(app.pk)
+            or [application_features(app)[c] for c in bundle.feature_columns]
+            for app in applications
+        ],
+        dtype=float,
+    )
+    complete = ~np.isnan(rows).any(axis=1)
+    predictions = [None] * len(applications)
+    if not complete.any():
+        return predictions
+
+    probabilities = bundle.model.predict_proba(
+        bundle.transform(rows[complete])
+    )
+    classes = bundle.model.classes_.tolist()
+    approved = np.array(
+        [bundle.class_names.get(cls) == APPROVED_STATUS for cls in classes]
+    )
+
+    for index, proba in zip(np.flatnonzero(complete), probabilities):
+        predictions[index] = {
+            "application_id": applications[index].pk,
+            "model_version": bundle.version,
+            "status_id": classes[int(proba.argmax())],
+            "probabilities": dict(zip(classes, proba.tolist())),
+            "approval_probability": (
+                float(proba[approved].sum()) if approved.any() else None
+            ),
+        }
+    return predictions
+
+
+def _stored_features(applications, columns):
+    """Возвращает сохраненные признаки заявок по id"""
+    ids = [app.pk for app in applications if app.pk is not None]
+    if not ids:
+        return {}
+    rows = ApplicationFeatures.objects.filter(
+        application_id__in=ids, schema_version=FEATURE_SCHEMA_VERSION
+    ).values_list("application_id", *columns)
+    return {pk: list(values) for pk, *values in rows}
+
+
+def predict(application, bundle=None):
+    """Возвращает прогноз статуса заявки или None"""
+    predictions = predict_many([application], bundle)
+    return predictions[0] if predictions else None
+
+
+def predict_queryset(queryset=None, chunk_size=PREDICT_CHUNK_SIZE):
+    """Оценивает заявки порциями по chunk_size.
+
+    Возвращает генератор пар (заявка, прогноз).
+    """
+    if queryset is None:
+        queryset = Application.objects.all()
+    bundle = get_model()
+    if bundle is None:
+        return
+
+    applications = queryset.iterator(chunk_size=chunk_size)
+    chunk = []
+    for application in applications:
+        chunk.append(application)
+        if len(chunk) == chunk_size:
+            yield from zip(chunk, predict_many(chunk, bundle))
+            chunk = []
+    if chunk:
+        yield from zip(chunk, predict_many(chunk, bundle))
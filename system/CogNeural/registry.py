@@ -0,0 +1,133 @@
+"""Хранилище обученных моделей CogNeural.
+
+Модель обучается вне веб-запросов (команда train_model или задача Celery)
+и сохраняется в файл joblib. Файл current содержит версию опубликованной
+модели: каждый процесс загружает ее один раз и перечитывает только после
+публикации новой версии.
+
+joblib и NumPy импортируются при первом обращении к модели, чтобы не
+замедлять запуск процессов, которым модель не нужна.
+"""
+
+import os
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from django.conf import settings
+from django.utils import timezone
+
+CURRENT_FILE = "current"
+# Количество хранимых версий модели
+KEEP_VERSIONS = 3
+
+
+@dataclass(eq=False)
+class ModelBundle:
+    """Обученная модель вместе со всем, что нужно для ее применения"""
+
+    version: str
+    scaler: object
+    model: object
+    # Порядок признаков, на котором обучалась модель
+    feature_columns: list
+    # Признаки, которые масштабируются scaler
+    scaled_columns: list
+    # classification_report, матрица ошибок и метки классов
+    metrics: dict
+    # Пары (признак, коэффициент) по убыванию модуля коэффициента
+    importance: list
+    # Первые строки обучающих данных
+    preview: object = None
+    # Наименования статусов по id класса
+    class_names: dict = field(default_factory=dict)
+    # PNG-изображения графиков по имени
+    plots: dict = field(default_factory=dict)
+    samples: int = 0
+    trained_at: object = field(default_factory=timezone.now)
+
+    def transform(self, features):
+        """Масштабирует матрицу признаков в порядке feature_columns"""
+        import numpy as np
+
+        features = np.array(features, dtype=float)
+        index = [self.feature_columns.index(c) for c in self.scaled_columns]
+        features[:, index] = self.scaler.transform(features[:, index])
+        return features
+
+
+def model_dir():
+    return Path(settings.COGNEURAL_MODEL_DIR)
+
+
+def new_version():
+    return timezone.now().strftime("%Y%m%d%H%M%S%f")
+
+
+def current_version():
+    """Возвращает версию опубликованной модели или None"""
+    try:
+        return (model_dir() / CURRENT_FILE).read_text().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _write_atomic(path, write):
+    # Уникальное имя временного файла: процессы, публикующие модели
+    # одновременно, не пишут в один файл
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent, prefix=f"{path.name}.", suffix=".tmp", delete=False
+    ) as file:
+        tmp = Path(file.name)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def publish(bundle):
+    """Сохраняет модель и делает ее текущей"""
+    import joblib
+
+    directory = model_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    path = directory / f"{bundle.version}.joblib"
+    _write_atomic(path, lambda tmp: joblib.dump(bundle, tmp))
+    _write_atomic(
+        directory / CURRENT_FILE, lambda tmp: tmp.write_text(bundle.version)
+    )
+
+    for old in sorted(directory.glob("*.joblib"))[:-KEEP_VERSIONS]:
+        old.unlink(missing_ok=True)
+    return path
+
+
+_lock = threading.Lock()
+_loaded = None
+
+
+def get_model():
+    """Возвращает текущую модель или None, если она еще не обучена.
+
+    Модель загружается с диска один раз на процесс и заменяется при
+    публикации новой версии.
+    """
+    global _loaded
+    version = current_version()
+    if version is None:
+        return None
+
+    loaded = _loaded
+    if loaded is not None and loaded.version == version:
+        return loaded
+
+    import joblib
+
+    with _lock:
+        if _loaded is None or _loaded.version != version:
+            _loaded = joblib.load(model_dir() / f"{version}.joblib")
+        return _loaded
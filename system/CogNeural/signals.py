@@ -0,0 +1,63 @@
+"""Обновление признаков заявок при их изменении"""
+
+from CogEditor.models import Application, Schedule
+from CogNeural.models import ApplicationFeatures
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender=Application)
+def application_saved(sender, instance, update_fields=None, **kwargs):
+    # Статус не входит в признаки
+    if update_fields is not None and set(update_fields) <= {"status"}:
+        return
+    ApplicationFeatures.refresh([instance.pk])
+
+
+@receiver(m2m_changed, sender=Application.event_schedule.through)
+def application_schedule_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not reverse:
+        if action.startswith("post_"):
+            ApplicationFeatures.refresh([instance.pk])
+        return
+
+    # Изменение со стороны расписания
+    if action == "pre_clear":
+        instance._feature_application_ids = list(
+            instance.event_applications.values_list("pk", flat=True)
+        )
+    elif action == "post_clear":
+        ApplicationFeatures.refresh(
+            getattr(instance, "_feature_application_ids", ())
+        )
+    elif action in ("post_add", "post_remove"):
+        ApplicationFeatures.refresh(pk_set)
+
+
+@receiver(post_save, sender=Schedule)
+def schedule_saved(sender, instance, created, **kwargs):
+    if not created:
+        ApplicationFeatures.refresh(
+            instance.event_applications.values_list("pk", flat=True)
+        )
+
+
+@receiver(pre_delete, sender=Schedule)
+def schedule_pre_delete(sender, instance, **kwargs):
+    instance._feature_application_ids = list(
+        instance.event_applications.values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Schedule)
+def schedule_deleted(sender, instance, **kwargs):
+    ApplicationFeatures.refresh(
+        getattr(instance, "_feature_application_ids", ())
+    )
@@ -0,0 +1,213 @@
+"""Потоковое обучение модели без загрузки всей таблицы в память.
+
+Признаки заявок читаются из ApplicationFeatures порциями через
+iterator(), каждая порция сразу переводится в типизированные массивы
+NumPy. Масштабирование (StandardScaler.partial_fit) и обучение
+(SGDClassifier.partial_fit) выполняются по порциям, поэтому расход
+памяти не зависит от объема архива.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from CogEditor.models import AgreedStatus
+from CogNeural.features import FEATURE_COLUMNS, FEATURE_SCHEMA_VERSION
+from CogNeural.models import ApplicationFeatures
+from CogNeural.registry import ModelBundle, new_version
+from CogNeural.training import NUM_COLS, PREVIEW_ROWS, render_plots
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.preprocessing import StandardScaler
+
+# Количество строк, загружаемых из базы данных за один запрос
+STREAM_CHUNK_SIZE = 10000
+# Доля заявок (по остатку от деления id на 10), отложенных для проверки
+TEST_BUCKETS = 3
+
+# Типы признаков в порядке FEATURE_COLUMNS
+FEATURE_DTYPES = {
+    "description_len": np.int32,
+    "number_of_participants": np.int32,
+    "requires_technical_support": np.int8,
+    "processing_time_hours": np.float32,
+    "event_duration_hours": np.float32,
+    "subm_day_of_week": np.int8,
+    "subm_hour": np.int8,
+    "event_start_hour": np.int8,
+    "event_day_of_week": np.int8,
+    "days_until_event": np.int32,
+    "schedule_count": np.int32,
+    "booked_hours": np.float32,
+}
+
+
+@dataclass
+class FeatureChunk:
+    """Порция признаков: столбцы разных типов, метки и id заявок"""
+
+    ids: np.ndarray
+    columns: dict
+    labels: np.ndarray
+
+    def __len__(self):
+        return len(self.ids)
+
+    def matrix(self):
+        """Возвращает матрицу признаков float32 в порядке FEATURE_COLUMNS"""
+        return np.column_stack(
+            [self.columns[c].astype(np.float32) for c in FEATURE_COLUMNS]
+        )
+
+    def to_frame(self):
+        return pd.DataFrame(
+            {"id": self.ids, "status_id": self.labels, **self.columns}
+        )
+
+
+def _make_chunk(rows):
+    # Строки с пропусками (например, без расписания) модель не использует
+    rows = [row for row in rows if None not in row]
+    if not rows:
+        return None
+
+    ids, labels, *columns = zip(*rows)
+    return FeatureChunk(
+        ids=np.array(ids, dtype=np.int64),
+        columns={
+            name: np.array(column, dtype=FEATURE_DTYPES[name])
+            for name, column in zip(FEATURE_COLUMNS, columns)
+        },
+        labels=np.array(labels, dtype=np.int64),
+    )
+
+
+def iter_feature_chunks(queryset=None, chunk_size=STREAM_CHUNK_SIZE):
+    """Возвращает генератор порций признаков FeatureChunk.
+
+    Признаки читаются из ApplicationFeatures, queryset ограничивает
+    набор заявок.
+    """
+    features = ApplicationFeatures.objects.filter(
+        schema_version=FEATURE_SCHEMA_VERSION
+    )
+    if queryset is not None:
+        features = features.filter(application__in=queryset)
+
+    rows = (
+        features.order_by()
+        .values_list(
+            "application_id", "application__status_id", *FEATURE_COLUMNS
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == chunk_size:
+            if chunk := _make_chunk(batch):
+                yield chunk
+            batch = []
+    if batch and (chunk := _make_chunk(batch)):
+        yield chunk
+
+
+def train_streaming(queryset=None, chunk_size=STREAM_CHUNK_SIZE, epochs=3):
+    """Обучает SGDClassifier по порциям и возвращает ModelBundle.
+
+    Первый проход вычисляет по обучающим заявкам параметры
+    масштабирования и веса классов, следующие epochs проходов обучают
+    модель. Заявки с остатком от деления id на 10 меньше TEST_BUCKETS
+    используются для проверки.
+    """
+    ApplicationFeatures.refresh_missing()
+    scaled_index = [FEATURE_COLUMNS.index(c) for c in NUM_COLS]
+    scaler = StandardScaler()
+    class_counts = {}
+    preview = None
+    samples = 0
+
+    for chunk in iter_feature_chunks(queryset, chunk_size):
+        if preview is None:
+            preview = chunk.to_frame().head(PREVIEW_ROWS)
+        samples += len(chunk)
+        train = chunk.ids % 10 >= TEST_BUCKETS
+        if not train.any():
+            continue
+        # Параметры масштабирования - только по обучающим заявкам
+        scaler.partial_fit(chunk.matrix()[train][:, scaled_index])
+        for label, count in zip(
+            *np.unique(chunk.labels[train], return_counts=True)
+        ):
+            class_counts[int(label)] = class_counts.get(int(label), 0) + count
+
+    if not class_counts:
+        raise ValueError("Нет заявок для обучения модели")
+
+    classes = np.array(sorted(class_counts))
+    total = sum(class_counts.values())
+    # Аналог class_weight="balanced", который partial_fit не поддерживает
+    class_weight = {
+        label: total / (len(classes) * count)
+        for label, count in class_counts.items()
+    }
+
+    model = SGDClassifier(loss="log_loss", random_state=42)
+
+    def prepared(chunk):
+        features = chunk.matrix()
+        features[:, scaled_index] = scaler.transform(features[:, scaled_index])
+        return features, chunk.ids % 10 >= TEST_BUCKETS
+
+    for _ in range(epochs):
+        for chunk in iter_feature_chunks(queryset, chunk_size):
+            features, train = prepared(chunk)
+            if not train.any():
+                continue
+            labels = chunk.labels[train]
+            model.partial_fit(
+                features[train],
+                labels,
+                classes=classes,
+                sample_weight=np.vectorize(class_weight.get)(labels),
+            )
+
+    y_test, y_pred = [], []
+    for chunk in iter_feature_chunks(queryset, chunk_size):
+        features, train = prepared(chunk)
+        if (~train).any():
+            y_test.append(chunk.labels[~train])
+            y_pred.append(model.predict(features[~train]))
+    y_test = np.concatenate(y_test) if y_test else np.array([], np.int64)
+    y_pred = np.concatenate(y_pred) if y_pred else np.array([], np.int64)
+
+    importance = pd.DataFrame(
+        {"Признак": FEATURE_COLUMNS, "Коэффициент": model.coef_[0]}
+    ).sort_values("Коэффициент", key=abs, ascending=False)
+
+    return ModelBundle(
+        version=new_version(),
+        scaler=scaler,
+        model=model,
+        feature_columns=list(FEATURE_COLUMNS),
+        scaled_columns=list(NUM_COLS),
+        metrics={
+            "classification_report": classification_report(
+                y_test, y_pred, output_dict=True, zero_division=0
+            ),
+            "confusion_matrix": confusion_matrix(
+                y_test, y_pred, labels=classes
+            ).tolist(),
+            "labels": classes.tolist(),
+        },
+        importance=list(importance.itertuples(index=False, name=None)),
+        class_names=dict(
+            AgreedStatus.objects.filter(pk__in=classes.tolist()).values_list(
+                "pk", "status"
+            )
+        ),
+        preview=preview,
+        plots=render_plots(y_test, y_pred, importance),
+        samples=samples,
+    )
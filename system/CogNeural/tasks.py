@@ -0,0 +1,37 @@
+"""Фоновое обучение модели CogNeural"""
+
+from celery import shared_task
+from CogNeural.registry import publish
+from django.core.cache import cache
+
+TRAINING_LOCK_KEY = "cogneural:training"
+# Максимальное время обучения, после которого блокировка снимается, с
+TRAINING_TIMEOUT = 60 * 60
+
+
+def request_training(streaming=False):
+    """Ставит обучение в очередь, если оно еще не запущено.
+
+    Возвращает False, если обучение уже выполняется.
+    """
+    if not cache.add(TRAINING_LOCK_KEY, True, TRAINING_TIMEOUT):
+        return False
+    train_model_task.delay(streaming)
+    return True
+
+
+@shared_task
+def train_model_task(streaming=False):
+    """Обучает модель и публикует новую версию.
+
+    При streaming=True модель обучается по порциям (CogNeural/streaming.py).
+    """
+    if streaming:
+        from CogNeural.streaming import train_streaming as train
+    else:
+        from CogNeural.training import train_model as train
+
+    try:
+        return publish(train()).name
+    finally:
+        cache.delete(TRAINING_LOCK_KEY)
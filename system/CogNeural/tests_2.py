@@ -0,0 +1,422 @@
+import datetime
+import shutil
+import tempfile
+
+import numpy as np
+from CogEditor.models import (
+    AgreedStatus,
+    Application,
+    Schedule,
+    StructuralUnit,
+)
+from CogNeural import registry
+from CogNeural.evaluation import compare_models, time_splits
+from CogNeural.features import (
+    FEATURE_COLUMNS,
+    FEATURE_SCHEMA_VERSION,
+    application_features,
+)
+from CogNeural.LogisticRegression import load_frame
+from CogNeural.models import ApplicationFeatures
+from CogNeural.prediction import predict, predict_many, predict_queryset
+from CogNeural.streaming import (
+    TEST_BUCKETS,
+    iter_feature_chunks,
+    train_streaming,
+)
+from CogNeural.tasks import TRAINING_LOCK_KEY, request_training
+from CogNeural.training import NUM_COLS, load_dataset, train_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from mysite import celery_app
+from mysite.importtime import DEFAULT_BUDGET_MS, measure_startup
+from mysite.testing import LOCMEM_CACHES
+
+
+def create_applications(count=30):
+    """Создает заявки двух статусов с расписанием"""
+    statuses = [
+        AgreedStatus.objects.create(status=f"Статус {i}", n_stage=i)
+        for i in (1, 2)
+    ]
+    unit = StructuralUnit.objects.create(unit="Тестовое подразделение")
+    now = timezone.now()
+    for i in range(count):
+        application = Application.objects.create(
+            subm_date=now - datetime.timedelta(days=i, hours=i % 5),
+            e_title=f"Мероприятие {i}",
+            e_description="Описание " * (i % 7 + 1),
+            organizer=unit,
+            status=statuses[i % 2],
+            number_of_participants=10 + i * (i % 2 + 1),
+            requires_technical_support=bool(i % 3),
+        )
+        start = now + datetime.timedelta(days=i % 10 + (i % 2) * 5)
+        application.event_schedule.add(
+            Schedule.objects.create(
+                start=start, end=start + datetime.timedelta(hours=i % 4 + 1)
+            )
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ModelRegistryTest(TestCase):
+    def setUp(self):
+        self.model_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            COGNEURAL_MODEL_DIR=self.model_dir
+        )
+        self.settings_override.enable()
+        celery_app.conf.CELERY_TASK_ALWAYS_EAGER = True
+        registry._loaded = None
+        create_applications()
+
+    def tearDown(self):
+        celery_app.conf.CELERY_TASK_ALWAYS_EAGER = False
+        self.settings_override.disable()
+        shutil.rmtree(self.model_dir)
+        registry._loaded = None
+
+    def test_publish_and_reload(self):
+        self.assertIsNone(registry.get_model())
+
+        first = train_model()
+        registry.publish(first)
+        loaded = registry.get_model()
+        self.assertEqual(loaded.version, first.version)
+        self.assertIs(registry.get_model(), loaded)
+        self.assertEqual(loaded.samples, 30)
+
+        second = train_model()
+        registry.publish(second)
+        self.assertEqual(registry.get_model().version, second.version)
+
+    def test_concurrent_writes_use_separate_files(self):
+        path = registry.model_dir() / "model.joblib"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = []
+
+        def write(tmp):
+            temporary.append(tmp)
+            tmp.write_text(str(len(temporary)))
+            if len(temporary) == 1:
+                # Вторая публикация начинается до завершения первой
+                registry._write_atomic(path, write)
+
+        registry._write_atomic(path, write)
+
+        self.assertNotEqual(temporary[0], temporary[1])
+        self.assertEqual(path.read_text(), "1")
+        self.assertEqual(
+            [p.name for p in path.parent.iterdir()], ["model.joblib"]
+        )
+
+    def test_failed_write_removes_temporary_file(self):
+        path = registry.model_dir() / "model.joblib"
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        def write(tmp):
+            raise OSError("disk full")
+
+        with self.assertRaises(OSError):
+            registry._write_atomic(path, write)
+        self.assertEqual(list(path.parent.iterdir()), [])
+
+    def test_training_is_not_started_twice(self):
+        cache.add(TRAINING_LOCK_KEY, True)
+        self.assertFalse(request_training())
+        self.assertIsNone(registry.current_version())
+
+        cache.delete(TRAINING_LOCK_KEY)
+        self.assertTrue(request_training())
+        self.assertIsNotNone(registry.current_version())
+
+    def test_index_uses_published_model(self):
+        registry.publish(train_model())
+        self.client.get(reverse("CogNeural:index"))
+
+        # Модель уже загружена, заявки не запрашиваются
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("CogNeural:index"))
+
+        self.assertFalse(
+            any(
+                "CogEditor_application" in q["sql"]
+                for q in queries.captured_queries
+            )
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(
+            response,
+            reverse(
+                "CogNeural:plot",
+                args=[registry.current_version(), "confusion_matrix"],
+            ),
+        )
+
+    def test_plot_served_with_etag(self):
+        bundle = train_model()
+        registry.publish(bundle)
+        url = reverse(
+            "CogNeural:plot", args=[bundle.version, "confusion_matrix"]
+        )
+
+        response = self.client.get(url)
+        self.assertEqual(response["Content-Type"], "image/png")
+        self.assertEqual(response.content, bundle.plots["confusion_matrix"])
+        self.assertIn("immutable", response["Cache-Control"])
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+        registry.publish(train_model())
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_startup_does_not_import_scientific_stack(self):
+        startup = measure_startup()
+
+        self.assertEqual(startup["heavy"], [])
+        # Запас на медленные тестовые окружения; точная проверка бюджета —
+        # python -m mysite.importtime
+        self.assertLess(startup["total_ms"], DEFAULT_BUDGET_MS * 2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class PredictionTest(TestCase):
+    def setUp(self):
+        self.model_dir = tempfile.mkdtemp()
+        self.settings_override = override_settings(
+            COGNEURAL_MODEL_DIR=self.model_dir
+        )
+        self.settings_override.enable()
+        celery_app.conf.CELERY_TASK_ALWAYS_EAGER = True
+        registry._loaded = None
+        create_applications()
+
+    def tearDown(self):
+        celery_app.conf.CELERY_TASK_ALWAYS_EAGER = False
+        self.settings_override.disable()
+        shutil.rmtree(self.model_dir)
+        registry._loaded = None
+
+    def test_features_match_dataset(self):
+        df = load_dataset().set_index("id")
+        for application in Application.objects.prefetch_related(
+            "event_schedule"
+        ):
+            features = application_features(application)
+            row = df.loc[application.pk]
+            for column, value in features.items():
+                self.assertAlmostEqual(value, row[column], msg=column)
+
+    def test_predict_without_model(self):
+        application = Application.objects.first()
+        self.assertIsNone(predict(application))
+
+        response = self.client.get(
+            reverse("CogNeural:predict_application", args=[application.pk])
+        )
+        self.assertEqual(response.status_code, 503)
+
+    def test_predict_single_and_batch(self):
+        bundle = train_model()
+        registry.publish(bundle)
+        applications = list(
+            Application.objects.prefetch_related("event_schedule")
+        )
+
+        batch = predict_many(applications)
+        for application, prediction in zip(applications, batch):
+            single = predict(application)
+            self.assertEqual(prediction["status_id"], single["status_id"])
+            self.assertAlmostEqual(
+                sum(prediction["probabilities"].values()), 1
+            )
+            self.assertIn(prediction["status_id"], bundle.class_names)
+        self.assertEqual(
+            [p["status_id"] for _, p in predict_queryset(chunk_size=7)],
+            [p["status_id"] for p in batch],
+        )
+
+        response = self.client.get(
+            reverse("CogNeural:predict"),
+            {"ids": ",".join(str(app.pk) for app in applications[:3])},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["predictions"]), 3)
+
+    def test_application_without_schedule(self):
+        registry.publish(train_model())
+        application = Application.objects.first()
+        application.event_schedule.clear()
+
+        self.assertIsNone(predict(application))
+
+
+class FeatureStoreTest(TestCase):
+    def setUp(self):
+        create_applications(10)
+
+    def stored(self, application):
+        return ApplicationFeatures.objects.get(
+            application=application, schema_version=FEATURE_SCHEMA_VERSION
+        )
+
+    def test_features_refreshed_by_signals(self):
+        application = Application.objects.first()
+        schedule = application.event_schedule.get()
+        self.assertEqual(
+            self.stored(application).event_start_hour,
+            schedule.start.astimezone(datetime.timezone.utc).hour,
+        )
+
+        schedule.start -= datetime.timedelta(hours=3)
+        schedule.save()
+        self.assertEqual(
+            self.stored(application).event_start_hour,
+            schedule.start.astimezone(datetime.timezone.utc).hour,
+        )
+
+        schedule.delete()
+        self.assertIsNone(self.stored(application).event_start_hour)
+
+        application.e_description = "Другое описание"
+        application.save()
+        self.assertEqual(
+            self.stored(application).description_len,
+            len("Другое описание"),
+        )
+
+    def test_schedule_aggregated_per_application(self):
+        application = Application.objects.first()
+        first = application.event_schedule.get()
+        start = first.end + datetime.timedelta(days=1)
+        application.event_schedule.add(
+            Schedule.objects.create(
+                start=start, end=start + datetime.timedelta(hours=2)
+            )
+        )
+
+        df = load_dataset().set_index("id")
+        self.assertEqual(len(df), 10)
+        row = df.loc[application.pk]
+        self.assertEqual(row["schedule_count"], 2)
+        self.assertAlmostEqual(
+            row["booked_hours"],
+            (first.end - first.start).total_seconds() / 3600 + 2,
+        )
+        self.assertAlmostEqual(
+            row["event_duration_hours"],
+            (start - first.start).total_seconds() / 3600 + 2,
+        )
+        application = Application.objects.get(pk=application.pk)
+        for column, value in application_features(application).items():
+            self.assertAlmostEqual(value, row[column], msg=column)
+
+    def test_analysis_frame_without_schedules(self):
+        Schedule.objects.all().delete()
+
+        df = load_frame()
+
+        self.assertEqual(len(df), 10)
+        for column in (
+            "booked_hours",
+            "processing_time_hours",
+            "event_duration_hours",
+        ):
+            self.assertTrue(df[column].isna().all(), column)
+
+    def test_load_dataset_reads_store(self):
+        ApplicationFeatures.objects.all().delete()
+
+        df = load_dataset()
+        self.assertEqual(len(df), 10)
+        self.assertEqual(df["id"].nunique(), 10)
+        self.assertEqual(ApplicationFeatures.objects.count(), 10)
+
+        # Признаки уже сохранены, пересчет не нужен
+        with self.assertNumQueries(2):
+            load_dataset()
+
+
+class StreamingTrainingTest(TestCase):
+    def setUp(self):
+        create_applications()
+
+    def test_chunks_match_dataset(self):
+        df = load_dataset().set_index("id")
+        chunks = list(iter_feature_chunks(chunk_size=7))
+
+        self.assertEqual(sum(len(chunk) for chunk in chunks), 30)
+        self.assertEqual(
+            chunks[0].columns["subm_hour"].dtype.name,
+            "int8",
+        )
+        for chunk in chunks:
+            for i, pk in enumerate(chunk.ids):
+                for column in FEATURE_COLUMNS:
+                    self.assertAlmostEqual(
+                        chunk.columns[column][i],
+                        df.loc[pk, column],
+                        places=3,
+                        msg=column,
+                    )
+
+    def test_train_streaming(self):
+        bundle = train_streaming(chunk_size=7)
+
+        self.assertEqual(bundle.samples, 30)
+        self.assertEqual(bundle.feature_columns, FEATURE_COLUMNS)
+        predictions = predict_many(
+            Application.objects.prefetch_related("event_schedule"), bundle
+        )
+        self.assertTrue(
+            all(p["status_id"] in bundle.class_names for p in predictions)
+        )
+
+    def test_scaler_fitted_on_training_rows(self):
+        bundle = train_streaming(chunk_size=7)
+
+        df = load_dataset()
+        train = df[df["id"] % 10 >= TEST_BUCKETS]
+        np.testing.assert_allclose(
+            bundle.scaler.mean_, train[NUM_COLS].mean().to_numpy()
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ModelComparisonTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_applications(60)
+
+    def test_time_splits_do_not_leak_future(self):
+        df = load_dataset()
+        dates = dict(Application.objects.values_list("pk", "subm_date"))
+        for train, test in time_splits(df["id"], n_splits=3):
+            self.assertLess(
+                max(dates[pk] for pk in df["id"][train]),
+                min(dates[pk] for pk in df["id"][test]),
+            )
+
+    def test_compare_models_cached(self):
+        comparison = compare_models(n_splits=3, n_jobs=1)
+
+        self.assertEqual(
+            {r["model"] for r in comparison["results"]},
+            {
+                "logistic_regression",
+                "gradient_boosting",
+                "calibrated_linear_svm",
+            },
+        )
+        self.assertIsNotNone(comparison["best"])
+
+        # Поиск заявок без признаков и чтение признаков
+        with self.assertNumQueries(2):
+            self.assertEqual(compare_models(n_splits=3, n_jobs=1), comparison)
@@ -0,0 +1,138 @@
+"""Обучение модели прогнозирования статуса заявки"""
+
+from io import BytesIO
+
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+from CogEditor.models import AgreedStatus
+from CogNeural.features import FEATURE_COLUMNS, FEATURE_SCHEMA_VERSION
+from CogNeural.models import ApplicationFeatures
+from CogNeural.registry import ModelBundle, new_version
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+# Масштабируемые числовые признаки
+NUM_COLS = [
+    "number_of_participants",
+    "processing_time_hours",
+    "event_duration_hours",
+    "days_until_event",
+    "schedule_count",
+    "booked_hours",
+]
+# Количество строк данных, сохраняемых вместе с моделью
+PREVIEW_ROWS = 10
+
+
+def load_dataset():
+    """Загружает признаки заявок в DataFrame одним запросом.
+
+    Признаки берутся из ApplicationFeatures; недостающие вычисляются
+    перед загрузкой. Строки упорядочены по дате подачи заявки.
+    """
+    ApplicationFeatures.refresh_missing()
+    rows = (
+        ApplicationFeatures.objects.filter(
+            schema_version=FEATURE_SCHEMA_VERSION
+        )
+        # Порядок по дате подачи нужен для разбиения по времени
+        # (evaluation.py)
+        .order_by("application__subm_date", "application_id").values_list(
+            "application_id", "application__status_id", *FEATURE_COLUMNS
+        )
+    )
+
+    df = pd.DataFrame.from_records(
+        rows, columns=["id", "status_id", *FEATURE_COLUMNS]
+    )
+    if df.empty:
+        raise ValueError("Нет заявок для обучения модели")
+    df[FEATURE_COLUMNS] = df[FEATURE_COLUMNS].astype(float)
+    return df
+
+
+def _render_png(draw):
+    plt.switch_backend("Agg")
+    draw()
+    image = BytesIO()
+    plt.savefig(image, format="png")
+    plt.close()
+    return image.getvalue()
+
+
+def render_plots(y_test, y_pred, importance):
+    """Строит матрицу ошибок и график важности признаков в PNG"""
+
+    def draw_confusion_matrix():
+        plt.figure(figsize=(8, 6))
+        cm = confusion_matrix(y_test, y_pred)
+        sns.heatmap(cm, annot=True, fmt="d", cmap="Blues")
+        plt.title("Матрица ошибок")
+        plt.xlabel("Предсказанные")
+        plt.ylabel("Фактические")
+
+    def draw_importance():
+        plt.figure(figsize=(10, 6))
+        sns.barplot(x="Коэффициент", y="Признак", data=importance)
+        plt.title("Важность признаков в логистической регрессии")
+
+    return {
+        "confusion_matrix": _render_png(draw_confusion_matrix),
+        "feature_importance": _render_png(draw_importance),
+    }
+
+
+def train_model(df=None):
+    """Обучает модель и возвращает ModelBundle, готовый к публикации"""
+    if df is None:
+        df = load_dataset()
+    # Строки с пропусками (например, без расписания) модель не использует
+    df = df.dropna()
+
+    X = df.drop(columns=["id", "status_id"])
+    y = df["status_id"]
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.3, random_state=42
+    )
+
+    # Масштабирование и обучение модели
+    scaler = StandardScaler()
+    X_train[NUM_COLS] = scaler.fit_transform(X_train[NUM_COLS].to_numpy())
+    X_test[NUM_COLS] = scaler.transform(X_test[NUM_COLS].to_numpy())
+
+    model = LogisticRegression(
+        max_iter=1000, random_state=42, class_weight="balanced"
+    )
+    model.fit(X_train.to_numpy(), y_train)
+    y_pred = model.predict(X_test.to_numpy())
+
+    importance = pd.DataFrame(
+        {"Признак": X.columns, "Коэффициент": model.coef_[0]}
+    ).sort_values("Коэффициент", key=abs, ascending=False)
+
+    return ModelBundle(
+        version=new_version(),
+        scaler=scaler,
+        model=model,
+        feature_columns=list(X.columns),
+        scaled_columns=list(NUM_COLS),
+        metrics={
+            "classification_report": classification_report(
+                y_test, y_pred, output_dict=True, zero_division=0
+            ),
+            "confusion_matrix": confusion_matrix(y_test, y_pred).tolist(),
+            "labels": model.classes_.tolist(),
+        },
+        importance=list(importance.itertuples(index=False, name=None)),
+        class_names=dict(
+            AgreedStatus.objects.filter(
+                pk__in=model.classes_.tolist()
+            ).values_list("pk", "status")
+        ),
+        preview=df.head(PREVIEW_ROWS),
+        plots=render_plots(y_test, y_pred, importance),
+        samples=len(df),
+    )
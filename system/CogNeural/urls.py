@@ -6,4 +6,11 @@ app_name = "CogNeural"
 
 urlpatterns = [
     path("", views.index, name="index"),
+    path("plots/<str:version>/<slug:name>.png", views.plot, name="plot"),
+    path("predict/", views.predict_applications, name="predict"),
+    path(
+        "predict/<int:pk>/",
+        views.predict_application,
+        name="predict_application",
+    ),
 ]
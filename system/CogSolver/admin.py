@@ -1,5 +1,14 @@
-from CogSolver.models import ClassificationSettings, Rule
+from CogEditor.models import AgreedStatus
+from CogSolver.compiled import CompiledRule
+from CogSolver.models import (
+    ClassificationResult,
+    ClassificationSettings,
+    Rule,
+    RuleEngine,
+)
 from django.contrib import admin
+from django.contrib.admin.utils import unquote
+from django.template.response import TemplateResponse
 from django.urls import path
 
 from .views import rules_report  # Импорт view
@@ -49,6 +58,73 @@ class RuleAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
 
     change_list_template = 'CogSolver/admin/change_list.html'
+    change_form_template = 'CogSolver/admin/change_form.html'
+    # Количество id заявок, показываемых для каждой пары статусов
+    simulation_preview_size = 50
+
+    def changeform_view(
+        self, request, object_id=None, form_url='', extra_context=None
+    ):
+        if request.method == 'POST' and '_simulate' in request.POST:
+            response = self.simulate_view(request, object_id)
+            if response is not None:
+                return response
+        return super().changeform_view(
+            request, object_id, form_url, extra_context
+        )
+
+    def simulate_view(self, request, object_id):
+        """Показывает изменения статусов без сохранения правила.
+
+        Возвращает None, если форма заполнена с ошибками или нет прав, —
+        тогда ответ формирует стандартная форма редактирования.
+        """
+        obj = None
+        if object_id is not None:
+            obj = self.get_object(request, unquote(object_id))
+            if obj is None or not self.has_change_permission(request, obj):
+                return None
+        elif not self.has_add_permission(request):
+            return None
+
+        form = self.get_form(request, obj, change=obj is not None)(
+            request.POST, request.FILES, instance=obj
+        )
+        if not form.is_valid():
+            return None
+
+        rule = form.save(commit=False)
+        candidate = rule
+        if rule.is_active:
+            candidate = CompiledRule.from_rule(
+                rule,
+                role_ids=[role.pk for role in form.cleaned_data['role_id']],
+            )
+        diff = RuleEngine.simulate([candidate])
+
+        statuses = AgreedStatus.objects.in_bulk(
+            {status_id for pair in diff for status_id in pair}
+        )
+        groups = [
+            {
+                'current_status': statuses.get(old, old),
+                'new_status': statuses.get(new, new),
+                'count': len(ids),
+                'ids': ids[: self.simulation_preview_size],
+            }
+            for (old, new), ids in diff.items()
+        ]
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.opts,
+            'title': f'Проверка правила «{rule.name}»',
+            'rule': rule,
+            'groups': groups,
+            'changed_count': sum(group['count'] for group in groups),
+        }
+        return TemplateResponse(
+            request, 'CogSolver/admin/simulation.html', context
+        )
 
     def get_urls(self):
         urls = super().get_urls()
@@ -69,3 +145,30 @@ class RuleAdmin(admin.ModelAdmin):
         def has_add_permission(self, request):
             # Разрешаем только одну запись настроек
             return not ClassificationSettings.objects.exists()
+
+
+@admin.register(ClassificationResult)
+class ClassificationResultAdmin(admin.ModelAdmin):
+    list_display = (
+        'application',
+        'rule',
+        'current_status',
+        'new_status',
+        'status_changed',
+        'rule_set_version',
+        'classified_at',
+    )
+    list_filter = ('status_changed', 'rule', 'rule_set_version')
+    list_select_related = (
+        'application',
+        'rule',
+        'current_status',
+        'new_status',
+    )
+
+    def has_add_permission(self, request):
+        # Результаты создаются только классификатором
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
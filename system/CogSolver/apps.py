@@ -5,3 +5,6 @@ class CogsolverConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'CogSolver'
     verbose_name = 'Решатель задач'
+
+    def ready(self):
+        from CogSolver import signals  # noqa: F401
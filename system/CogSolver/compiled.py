@@ -0,0 +1,290 @@
+"""Скомпилированный набор правил классификации.
+
+Правила и заявки переводятся в неизменяемые объекты Python, после чего
+проверка условий выполняется без обращений к базе данных. Те же условия
+можно передать в базу данных в виде выражений Q (см. CompiledRule.as_q).
+"""
+
+import datetime
+import hashlib
+import logging
+from dataclasses import dataclass, field
+
+from CogEditor.models import Application
+from django.db.models import Exists, OuterRef, Q
+from django.db.models.functions import Coalesce, Length
+from django.db.models.lookups import LessThan
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Условия, которые никогда или всегда выполняются
+NEVER = Q(pk__in=[])
+ALWAYS = Q(pk__isnull=False)
+
+
+def _aware(value):
+    """Приводит дату к осознанному (aware) виду"""
+    if value is not None and timezone.is_naive(value):
+        return timezone.make_aware(value)
+    return value
+
+
+@dataclass(frozen=True, slots=True)
+class ApplicationSnapshot:
+    """Данные заявки, необходимые для проверки правил"""
+
+    id: int
+    status_id: int
+    subm_date: datetime.datetime | None
+    description: str | None
+    role_ids: frozenset = frozenset()
+    event_starts: tuple = ()
+
+    @classmethod
+    def from_application(cls, application):
+        """Создает снимок заявки.
+
+        Использует кэш prefetch_related для ролей и расписания, если он
+        заполнен; иначе выполняет по одному запросу на каждую связь.
+        """
+        return cls(
+            id=application.pk,
+            status_id=application.status_id,
+            subm_date=_aware(application.subm_date),
+            description=application.e_description,
+            role_ids=frozenset(role.pk for role in application.roles.all()),
+            event_starts=tuple(
+                _aware(schedule.start)
+                for schedule in application.event_schedule.all()
+            ),
+        )
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledRule:
+    """Правило, не требующее обращений к базе данных при проверке"""
+
+    id: int
+    name: str
+    priority: int
+    condition_type: str
+    new_status_id: int
+    days_threshold: int | None = None
+    role_ids: frozenset = frozenset()
+    min_text_length: int | None = None
+
+    @classmethod
+    def from_rule(cls, rule, role_ids=None):
+        """Компилирует модель Rule.
+
+        role_ids можно передать заранее, чтобы не запрашивать роли
+        правила повторно.
+        """
+        if role_ids is None:
+            role_ids = (role.pk for role in rule.role_id.all())
+        return cls(
+            id=rule.pk,
+            name=rule.name,
+            priority=rule.priority,
+            condition_type=rule.condition_type,
+            new_status_id=rule.new_status_id,
+            days_threshold=rule.days_threshold,
+            role_ids=frozenset(role_ids),
+            min_text_length=rule.min_text_length,
+        )
+
+    def _threshold(self, snapshot):
+        return snapshot.subm_date + datetime.timedelta(
+            days=self.days_threshold
+        )
+
+    def _date_compare(self, snapshot):
+        if self.days_threshold is None or not snapshot.event_starts:
+            return False
+        threshold_date = self._threshold(snapshot)
+        # Если хотя бы одно мероприятие позже пороговой даты -
+        # правило не выполняется
+        return all(
+            start < threshold_date
+            for start in snapshot.event_starts
+            if start is not None
+        )
+
+    def _combined_date(self, snapshot):
+        if snapshot.subm_date is None:
+            return False
+        threshold_date = self._threshold(snapshot)
+        starts = [s for s in snapshot.event_starts if s is not None]
+        return bool(starts) and all(start < threshold_date for start in starts)
+
+    def _role_check(self, snapshot):
+        return not self.role_ids.isdisjoint(snapshot.role_ids)
+
+    def _schedules(self):
+        return Application.event_schedule.through.objects.filter(
+            application_id=OuterRef("pk")
+        )
+
+    def _late_schedule_q(self):
+        """Есть мероприятие не раньше пороговой даты"""
+        threshold_date = OuterRef("subm_date") + datetime.timedelta(
+            days=self.days_threshold
+        )
+        return Exists(
+            self._schedules().filter(schedule__start__gte=threshold_date)
+        )
+
+    def _role_q(self):
+        return Exists(
+            Application.roles.through.objects.filter(
+                application_id=OuterRef("pk"),
+                participatoryrole_id__in=self.role_ids,
+            )
+        )
+
+    def as_q(self):
+        """Возвращает условие правила в виде выражения Q для Application.
+
+        Результат фильтрации совпадает с matches(); заявки, на которых
+        matches() завершается ошибкой, условию не удовлетворяют.
+        """
+        if self.condition_type == "date_compare":
+            if self.days_threshold is None:
+                return NEVER
+            return Q(Exists(self._schedules())) & ~Q(self._late_schedule_q())
+
+        if self.condition_type == "role_check":
+            return Q(self._role_q()) if self.role_ids else NEVER
+
+        if self.condition_type == "text_length":
+            if self.min_text_length is None:
+                return NEVER
+            return Q(LessThan(Length("e_description"), self.min_text_length))
+
+        if self.condition_type == "combined":
+            q = ALWAYS
+            if self.days_threshold is not None:
+                q &= Q(
+                    Exists(
+                        self._schedules().filter(schedule__start__isnull=False)
+                    )
+                ) & ~Q(self._late_schedule_q())
+            if self.role_ids:
+                q &= Q(self._role_q())
+            if self.min_text_length is not None:
+                q &= Q(
+                    LessThan(
+                        Coalesce(Length("e_description"), 0),
+                        self.min_text_length,
+                    )
+                )
+            return q
+
+        return NEVER
+
+    def matches(self, snapshot):
+        """Возвращает True, если заявка удовлетворяет условию правила"""
+        if self.condition_type == "date_compare":
+            return self._date_compare(snapshot)
+
+        if self.condition_type == "role_check":
+            return self._role_check(snapshot)
+
+        if self.condition_type == "text_length":
+            if self.min_text_length is None:
+                return False
+            return len(snapshot.description) < self.min_text_length
+
+        if self.condition_type == "combined":
+            if self.days_threshold is not None and not self._combined_date(
+                snapshot
+            ):
+                return False
+            if self.role_ids and not self._role_check(snapshot):
+                return False
+            if self.min_text_length is not None:
+                return len(snapshot.description or "") < self.min_text_length
+            return True
+
+        return False
+
+
+def rules_version(rules):
+    """Возвращает хэш версии набора правил.
+
+    Хэш зависит только от параметров правил и их порядка, поэтому
+    одинаков в разных процессах для одного и того же набора.
+    """
+    digest = hashlib.sha256()
+    for rule in rules:
+        digest.update(
+            repr(
+                (
+                    rule.id,
+                    rule.priority,
+                    rule.condition_type,
+                    rule.new_status_id,
+                    rule.days_threshold,
+                    sorted(rule.role_ids),
+                    rule.min_text_length,
+                )
+            ).encode()
+        )
+    return digest.hexdigest()[:16]
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledRuleSet:
+    """Активные правила в порядке убывания приоритета"""
+
+    rules: tuple = ()
+    change_status: bool = True
+    version: str = ""
+    # Объекты AgreedStatus по id, чтобы не запрашивать их при применении
+    statuses: dict = field(default_factory=dict, compare=False)
+
+    @classmethod
+    def from_rules(cls, rules, **kwargs):
+        """Упорядочивает правила по приоритету и вычисляет версию набора"""
+        # Несохраненные правила получат id больше существующих
+        rules = tuple(
+            sorted(
+                rules,
+                key=lambda rule: (
+                    -rule.priority,
+                    rule.id is None,
+                    rule.id or 0,
+                ),
+            )
+        )
+        return cls(rules=rules, version=rules_version(rules), **kwargs)
+
+    def with_rules(self, rules, exclude_ids=()):
+        """Возвращает новый набор с измененными правилами.
+
+        Правила с id, уже входящим в набор, заменяют прежние, остальные
+        добавляются. Правила с id из exclude_ids исключаются.
+        """
+        rules = list(rules)
+        removed = set(exclude_ids) | {
+            rule.id for rule in rules if rule.id is not None
+        }
+        return CompiledRuleSet.from_rules(
+            [rule for rule in self.rules if rule.id not in removed] + rules,
+            change_status=self.change_status,
+            statuses=self.statuses,
+        )
+
+    def match(self, snapshot):
+        """Возвращает первое сработавшее правило или None"""
+        for rule in self.rules:
+            try:
+                if rule.matches(snapshot):
+                    return rule
+            except Exception as e:
+                logger.error(
+                    f"Error evaluating rule {rule.id} for application "
+                    f"{snapshot.id}: {str(e)}"
+                )
+        return None
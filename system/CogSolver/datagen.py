@@ -0,0 +1,274 @@
+"""Генератор синтетических данных для замеров производительности.
+
+Заявки создаются порциями через bulk_create вместе с расписанием (от
+одного до трех периодов), ролями, сотрудниками и подразделениями.
+bulk_create не вызывает сигналы, поэтому после генерации созданные
+заявки один раз отмечаются для классификации и кэш страниц сбрасывается,
+а признаки CogNeural заполняются перед обучением.
+"""
+
+import datetime
+import random
+from dataclasses import dataclass
+
+from CogEditor.caching import PAGES, invalidate
+from CogEditor.context_processors import invalidate_organizers
+from CogEditor.models import (
+    AgreedStatus,
+    Application,
+    Employee,
+    EmployeePosition,
+    EventFormat,
+    ParticipatoryRole,
+    Schedule,
+    Sources,
+    StructuralUnit,
+)
+from CogSolver.compiled import NEVER
+from CogSolver.models import Rule
+from CogSolver.signals import mark_queryset
+from django.db import transaction
+from django.utils import timezone
+
+# Префикс наименований справочников, созданных генератором
+PREFIX = "Бенчмарк"
+# Количество заявок, создаваемых в одной транзакции
+GENERATE_CHUNK_SIZE = 10_000
+STATUSES = [
+    (1, "Отклонено"),
+    (2, "На доработке"),
+    (3, "Согласовано"),
+    (4, "Направлена на согласование администратору"),
+]
+WORDS = (
+    "конференция семинар лекция встреча студентов выставка концерт "
+    "презентация круглый стол мастер-класс защита проектов олимпиада"
+).split()
+
+
+@dataclass
+class ReferenceData:
+    """Справочники, на которые ссылаются синтетические заявки"""
+
+    statuses: list
+    units: list
+    employees: list
+    roles: list
+    sources: list
+    formats: list
+
+
+def _get_or_create_status(n_stage, status):
+    # n_stage не уникален, поэтому get_or_create может найти несколько
+    # статусов
+    agreed_status = AgreedStatus.objects.filter(n_stage=n_stage).first()
+    if agreed_status is None:
+        agreed_status = AgreedStatus.objects.create(
+            n_stage=n_stage, status=status, description="-"
+        )
+    return agreed_status
+
+
+def _get_or_create_all(model, field, names, **defaults):
+    model.objects.bulk_create(
+        [model(**{field: name}, **defaults) for name in names],
+        ignore_conflicts=True,
+    )
+    return list(model.objects.filter(**{f"{field}__in": names}))
+
+
+def generate_reference_data(units=50, employees=500, roles=10):
+    """Создает справочники генератора или возвращает существующие"""
+    statuses = [
+        _get_or_create_status(n_stage, status) for n_stage, status in STATUSES
+    ]
+    structural_units = _get_or_create_all(
+        StructuralUnit,
+        "unit",
+        [f"{PREFIX}: подразделение {i}" for i in range(units)],
+    )
+    # bulk_create не вызывает сигналы StructuralUnit
+    invalidate_organizers()
+    position = EmployeePosition.objects.get_or_create(position=PREFIX)[0]
+    rnd = random.Random(0)
+    Employee.objects.bulk_create(
+        [
+            Employee(
+                full_name=f"{PREFIX}: сотрудник {i}",
+                position=position,
+                structural_unit=rnd.choice(structural_units),
+            )
+            for i in range(employees)
+        ],
+        ignore_conflicts=True,
+    )
+    return ReferenceData(
+        statuses=statuses,
+        units=structural_units,
+        employees=list(
+            Employee.objects.filter(full_name__startswith=f"{PREFIX}:")
+        ),
+        roles=_get_or_create_all(
+            ParticipatoryRole,
+            "role",
+            [f"{PREFIX} {i}" for i in range(roles)],
+        ),
+        sources=[Sources.objects.get_or_create(name="Сайт")[0]],
+        formats=[
+            EventFormat.objects.get_or_create(name=f"{PREFIX}: {name}")[0]
+            for name in ("очно", "онлайн", "смешанный")
+        ],
+    )
+
+
+def generate_rules(roles):
+    """Создает по одному правилу каждого типа условия.
+
+    Правила создаются через bulk_create, а заявки, которые они
+    затрагивают, отмечаются для классификации одним запросом.
+    """
+    statuses = [
+        _get_or_create_status(n_stage, f"{PREFIX} {n_stage}")
+        for n_stage in (1, 2, 3)
+    ]
+    rules = Rule.objects.bulk_create(
+        [
+            Rule(
+                name=f"{PREFIX}: даты",
+                condition_type="date_compare",
+                days_threshold=3,
+                new_status=statuses[0],
+                priority=4,
+            ),
+            Rule(
+                name=f"{PREFIX}: описание",
+                condition_type="text_length",
+                min_text_length=20,
+                new_status=statuses[1],
+                priority=3,
+            ),
+            Rule(
+                name=f"{PREFIX}: роли",
+                condition_type="role_check",
+                new_status=statuses[2],
+                priority=2,
+            ),
+            Rule(
+                name=f"{PREFIX}: комбинированное",
+                condition_type="combined",
+                days_threshold=10,
+                min_text_length=100,
+                new_status=statuses[0],
+                priority=1,
+            ),
+        ]
+    )
+    Rule.role_id.through.objects.bulk_create(
+        [
+            Rule.role_id.through(
+                rule_id=rules[2].pk, participatoryrole_id=roles[0].pk
+            ),
+            Rule.role_id.through(
+                rule_id=rules[3].pk, participatoryrole_id=roles[1].pk
+            ),
+        ]
+    )
+
+    q = NEVER
+    for rule in rules:
+        q |= rule.as_q()
+    mark_queryset(Application.objects.filter(q))
+    return rules
+
+
+def _generate_chunk(rnd, refs, start, count, now):
+    applications = []
+    schedules = []
+    for i in range(start, start + count):
+        subm_date = now - datetime.timedelta(
+            days=rnd.randint(0, 730), minutes=rnd.randint(0, 24 * 60)
+        )
+        begin = (
+            subm_date + datetime.timedelta(days=rnd.randint(1, 60))
+        ).replace(hour=rnd.randint(8, 19), minute=rnd.choice((0, 30)))
+        # Многодневные мероприятия занимают несколько периодов
+        schedules.append(
+            [
+                Schedule(
+                    start=begin + datetime.timedelta(days=day),
+                    end=begin
+                    + datetime.timedelta(days=day, hours=rnd.randint(1, 4)),
+                )
+                for day in range(rnd.choices((1, 2, 3), (8, 3, 1))[0])
+            ]
+        )
+        employee = rnd.choice(refs.employees)
+        applications.append(
+            Application(
+                subm_date=subm_date,
+                application_source=rnd.choice(refs.sources),
+                e_title=f"{rnd.choice(WORDS).capitalize()} {i}",
+                e_description=" ".join(
+                    rnd.choices(WORDS, k=rnd.randint(0, 60))
+                ),
+                e_format=rnd.choice(refs.formats),
+                number_of_participants=int(rnd.lognormvariate(3.5, 0.8)),
+                organizer_id=employee.structural_unit_id,
+                organizer_employee=employee,
+                requires_technical_support=rnd.random() < 0.4,
+                status=rnd.choice(refs.statuses),
+            )
+        )
+
+    Schedule.objects.bulk_create(
+        [schedule for periods in schedules for schedule in periods]
+    )
+    Application.objects.bulk_create(applications)
+    Application.event_schedule.through.objects.bulk_create(
+        Application.event_schedule.through(
+            application_id=app.pk, schedule_id=schedule.pk
+        )
+        for app, periods in zip(applications, schedules)
+        for schedule in periods
+    )
+    Application.roles.through.objects.bulk_create(
+        Application.roles.through(
+            application_id=app.pk, participatoryrole_id=role.pk
+        )
+        for app in applications
+        for role in rnd.sample(refs.roles, rnd.randint(1, 3))
+    )
+    return applications
+
+
+def generate_applications(
+    count, refs=None, seed=42, chunk_size=GENERATE_CHUNK_SIZE, progress=None
+):
+    """Создает count синтетических заявок порциями по chunk_size.
+
+    Каждая порция создается в отдельной транзакции; progress вызывается
+    с количеством созданных заявок после каждой порции. После генерации
+    созданные заявки отмечаются для классификации.
+    """
+    if refs is None:
+        refs = generate_reference_data()
+    rnd = random.Random(seed)
+    now = timezone.now()
+    created = []
+    for start in range(0, count, chunk_size):
+        with transaction.atomic():
+            applications = _generate_chunk(
+                rnd, refs, start, min(chunk_size, count - start), now
+            )
+        created.append((applications[0].pk, applications[-1].pk))
+        if progress is not None:
+            progress(min(start + chunk_size, count))
+
+    if created:
+        mark_queryset(
+            Application.objects.filter(
+                pk__range=(created[0][0], created[-1][1])
+            )
+        )
+        invalidate(PAGES)
+    return refs
@@ -0,0 +1,74 @@
+from time import perf_counter
+
+from CogEditor.models import Application
+from CogSolver.datagen import (
+    generate_applications,
+    generate_reference_data,
+    generate_rules,
+)
+from CogSolver.models import RuleEngine
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+
+class Command(BaseCommand):
+    help = (
+        "Замеряет время RuleEngine.batch_apply_rules на синтетических "
+        "данных разного объема. Данные создаются в транзакции, которая "
+        "откатывается после замера."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            nargs="+",
+            type=int,
+            default=[10_000, 100_000, 1_000_000],
+            help="Количества заявок для замера",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=None,
+            help="Размер порции для batch_apply_rules",
+        )
+
+    def handle(self, *args, **options):
+        kwargs = {}
+        if options["chunk_size"]:
+            kwargs["chunk_size"] = options["chunk_size"]
+
+        baseline = None
+        with transaction.atomic():
+            refs = generate_reference_data()
+            generate_rules(refs.roles)
+
+            for size in options["sizes"]:
+                with transaction.atomic():
+                    # Замеряются только созданные для замера заявки, даже
+                    # если в базе данных уже есть другие
+                    last_id = Application.objects.aggregate(last=Max("pk"))[
+                        "last"
+                    ]
+                    generate_applications(size, refs)
+                    queryset = Application.objects.filter(pk__gt=last_id or 0)
+
+                    started = perf_counter()
+                    results = RuleEngine.batch_apply_rules(queryset, **kwargs)
+                    elapsed = perf_counter() - started
+
+                    transaction.set_rollback(True)
+
+                if not results:
+                    self.stdout.write(f"{size:>9} заявок: нет данных")
+                    continue
+                per_app = elapsed / len(results) * 1_000_000
+                baseline = baseline or per_app
+                self.stdout.write(
+                    f"{len(results):>9} заявок: {elapsed:8.2f} с, "
+                    f"{per_app:7.1f} мкс/заявка "
+                    f"(x{per_app / baseline:.2f} к первому замеру)"
+                )
+
+            transaction.set_rollback(True)
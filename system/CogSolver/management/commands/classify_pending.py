@@ -0,0 +1,29 @@
+from CogSolver.models import BATCH_CHUNK_SIZE, RuleEngine
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Повторно классифицирует заявки, измененные с момента последней "
+        "классификации"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=BATCH_CHUNK_SIZE,
+            help="Количество заявок, обрабатываемых за одну транзакцию",
+        )
+
+    def handle(self, *args, **options):
+        processed = changed = 0
+        while results := RuleEngine.apply_rules_to_pending(
+            options["chunk_size"]
+        ):
+            processed += len(results)
+            changed += sum(1 for r in results if r["status_changed"])
+
+        self.stdout.write(
+            f"Обработано заявок: {processed}, изменено статусов: {changed}"
+        )
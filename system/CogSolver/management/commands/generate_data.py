@@ -0,0 +1,55 @@
+from CogSolver.datagen import (
+    GENERATE_CHUNK_SIZE,
+    generate_applications,
+    generate_reference_data,
+    generate_rules,
+)
+from CogSolver.models import Rule
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Создает синтетические заявки с расписанием, ролями, сотрудниками "
+        "и подразделениями для замеров производительности"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "count", type=int, help="Количество заявок (например, 10000)"
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=GENERATE_CHUNK_SIZE,
+            help="Количество заявок в одной транзакции",
+        )
+        parser.add_argument("--units", type=int, default=50)
+        parser.add_argument("--employees", type=int, default=500)
+        parser.add_argument(
+            "--no-rules",
+            action="store_true",
+            help="Не создавать набор правил",
+        )
+
+    def handle(self, *args, **options):
+        refs = generate_reference_data(
+            units=options["units"], employees=options["employees"]
+        )
+        if (
+            not options["no_rules"]
+            and not Rule.objects.filter(name__startswith="Бенчмарк:").exists()
+        ):
+            generate_rules(refs.roles)
+
+        count = options["count"]
+        generate_applications(
+            count,
+            refs,
+            seed=options["seed"],
+            chunk_size=options["chunk_size"],
+            progress=lambda done: self.stdout.write(
+                f"Создано заявок: {done}/{count}"
+            ),
+        )
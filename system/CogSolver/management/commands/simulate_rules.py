@@ -0,0 +1,113 @@
+import json
+import sys
+
+from CogEditor.models import AgreedStatus
+from CogSolver.compiled import CompiledRule
+from CogSolver.models import Rule, RuleEngine
+from django.core.management.base import BaseCommand, CommandError
+
+# Поля правила, которые можно задать в файле
+RULE_FIELDS = (
+    "name",
+    "priority",
+    "is_active",
+    "condition_type",
+    "days_threshold",
+    "min_text_length",
+)
+
+
+def load_candidate(data):
+    """Создает несохраненное правило из словаря.
+
+    Если указан id, незаданные поля берутся из сохраненного правила.
+    """
+    if data.get("id") is not None:
+        try:
+            rule = Rule.objects.get(pk=data["id"])
+        except Rule.DoesNotExist:
+            raise CommandError(f"Правило {data['id']} не найдено")
+        role_ids = data.get("roles", rule.role_id.values_list("pk", flat=True))
+    else:
+        rule = Rule(name="Новое правило")
+        role_ids = data.get("roles", ())
+
+    for name in RULE_FIELDS:
+        if name in data:
+            setattr(rule, name, data[name])
+    if "new_status" in data:
+        rule.new_status_id = data["new_status"]
+    if rule.new_status_id is None:
+        raise CommandError(f"Для правила {rule.name} не указан new_status")
+
+    if not rule.is_active:
+        return rule
+    return CompiledRule.from_rule(rule, role_ids=role_ids)
+
+
+class Command(BaseCommand):
+    help = (
+        "Показывает, как изменятся статусы заявок при изменении правил, "
+        "ничего не сохраняя"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "file",
+            nargs="?",
+            help=(
+                "JSON-файл со списком правил ('-' — стандартный ввод). "
+                "Правила с id заменяют сохраненные, остальные добавляются"
+            ),
+        )
+        parser.add_argument(
+            "--exclude",
+            type=int,
+            action="append",
+            default=[],
+            help="id правила, которое нужно отключить",
+        )
+        parser.add_argument(
+            "--only",
+            action="store_true",
+            help="Проверять только правила из файла",
+        )
+        parser.add_argument(
+            "--show",
+            type=int,
+            default=20,
+            help="Количество id заявок, выводимых для каждой пары статусов",
+        )
+
+    def handle(self, *args, **options):
+        candidates = []
+        if options["file"]:
+            try:
+                if options["file"] == "-":
+                    data = json.load(sys.stdin)
+                else:
+                    with open(options["file"], encoding="utf-8") as f:
+                        data = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Не удалось прочитать правила: {e}")
+            candidates = [load_candidate(item) for item in data]
+
+        diff = RuleEngine.simulate(
+            candidates, exclude_ids=options["exclude"], only=options["only"]
+        )
+
+        statuses = AgreedStatus.objects.in_bulk(
+            {status_id for pair in diff for status_id in pair}
+        )
+        for (old, new), ids in diff.items():
+            shown = ", ".join(map(str, ids[: options["show"]]))
+            if len(ids) > options["show"]:
+                shown += ", …"
+            self.stdout.write(
+                f"{statuses.get(old, old)} → {statuses.get(new, new)}: "
+                f"{len(ids)}\n  {shown}"
+            )
+
+        self.stdout.write(
+            f"Изменится статусов: {sum(len(ids) for ids in diff.values())}"
+        )
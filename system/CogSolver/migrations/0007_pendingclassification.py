@@ -0,0 +1,59 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def mark_existing_applications(apps, schema_editor):
+    """Ставит все существующие заявки в очередь на классификацию"""
+    Application = apps.get_model('CogEditor', 'Application')
+    PendingClassification = apps.get_model(
+        'CogSolver', 'PendingClassification'
+    )
+    PendingClassification.objects.bulk_create(
+        (
+            PendingClassification(application_id=pk)
+            for pk in Application.objects.values_list('pk', flat=True)
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CogEditor', '0019_alter_application_technical_requirements'),
+        ('CogSolver', '0006_classificationsettings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingClassification',
+            fields=[
+                (
+                    'application',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='pending_classification',
+                        serialize=False,
+                        to='CogEditor.application',
+                        verbose_name='Заявка',
+                    ),
+                ),
+                (
+                    'marked_at',
+                    models.DateTimeField(
+                        auto_now=True, verbose_name='Время отметки'
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'заявка для повторной классификации',
+                'verbose_name_plural': 'Заявки для повторной классификации',
+            },
+        ),
+        migrations.RunPython(
+            mark_existing_applications, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('CogEditor', '0019_alter_application_technical_requirements'),
+        ('CogSolver', '0007_pendingclassification'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassificationResult',
+            fields=[
+                (
+                    'application',
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name='classification_result',
+                        serialize=False,
+                        to='CogEditor.application',
+                        verbose_name='Заявка',
+                    ),
+                ),
+                (
+                    'status_changed',
+                    models.BooleanField(
+                        default=False, verbose_name='Статус изменен'
+                    ),
+                ),
+                (
+                    'rule_set_version',
+                    models.CharField(
+                        db_index=True,
+                        max_length=16,
+                        verbose_name='Версия набора правил',
+                    ),
+                ),
+                (
+                    'classified_at',
+                    models.DateTimeField(
+                        auto_now=True, verbose_name='Время классификации'
+                    ),
+                ),
+                (
+                    'current_status',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to='CogEditor.agreedstatus',
+                        verbose_name='Статус до классификации',
+                    ),
+                ),
+                (
+                    'new_status',
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name='+',
+                        to='CogEditor.agreedstatus',
+                        verbose_name='Статус классификатора',
+                    ),
+                ),
+                (
+                    'rule',
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name='classification_results',
+                        to='CogSolver.rule',
+                        verbose_name='Сработавшее правило',
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'результат классификации',
+                'verbose_name_plural': 'Результаты классификации',
+                'ordering': ['-application_id'],
+                'indexes': [
+                    models.Index(
+                        fields=['rule', 'status_changed'],
+                        name='CogSolver_c_rule_id_0ee662_idx',
+                    ),
+                    models.Index(
+                        fields=['status_changed', 'application'],
+                        name='CogSolver_c_status__508f2d_idx',
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -1,12 +1,28 @@
-import datetime
 import logging
+import os
+from itertools import islice
 
+from CogEditor.caching import PAGES, invalidate
 from CogEditor.models import AgreedStatus, Application, ParticipatoryRole
+from CogSolver.compiled import (
+    NEVER,
+    ApplicationSnapshot,
+    CompiledRule,
+    CompiledRuleSet,
+    rules_version,
+)
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Case, Count, F, Value, When
+from django.utils import timezone
 
 logger = logging.getLogger(__name__)
 
+# Количество заявок, загружаемых и сохраняемых за один раз
+BATCH_CHUNK_SIZE = 2000
+# Количество заявок в диапазоне, обрабатываемом одним процессом
+SHARD_SIZE = 20000
+
 
 class Rule(models.Model):
     name = models.CharField(
@@ -79,121 +95,23 @@ class Rule(models.Model):
             return False
 
         try:
-            if self.condition_type == "date_compare":
-                if self.days_threshold is None:
-                    return False
-
-                # Получаем все даты мероприятий
-                event_schedules = application.event_schedule.all()
-                if not event_schedules.exists():
-                    return False
-
-                from django.utils import timezone
-
-                # Преобразуем дату подачи заявки в осознанную (aware) дату,
-                # если необходимо
-                subm_date = application.subm_date
-                if timezone.is_naive(subm_date):
-                    subm_date = timezone.make_aware(subm_date)
-
-                # Вычисляем пороговую дату
-                threshold_date = subm_date + datetime.timedelta(
-                    days=self.days_threshold
-                )
-
-                # Проверяем все даты мероприятий
-                for schedule in event_schedules:
-                    if schedule.start is None:
-                        continue
-
-                    # Приводим дату мероприятия к тому же типу временной зоны
-                    event_date = schedule.start
-                    if timezone.is_naive(event_date):
-                        event_date = timezone.make_aware(event_date)
-
-                    # Если хотя бы одно мероприятие раньше пороговой даты -
-                    # правило не выполняется
-                    if event_date >= threshold_date:
-                        return False
-
-                return True
-
-            elif self.condition_type == "role_check":
-                if not self.role_id.exists():
-                    return False
-                role_ids = self.role_id.values_list("id", flat=True)
-                return application.roles.filter(id__in=role_ids).exists()
-
-            elif self.condition_type == "text_length":
-                if self.min_text_length is None:
-                    return False
-                return len(application.e_description) < self.min_text_length
-
-            elif self.condition_type == "combined":
-                # Инициализация флагов
-                date_ok = role_ok = text_ok = True
-
-                # Проверка дат (исправленная часть)
-                if self.days_threshold is not None:
-                    if application.subm_date is None:
-                        date_ok = False
-                    else:
-                        from django.utils import timezone
-
-                        # Нормализуем дату подачи заявки
-                        subm_date = application.subm_date
-                        if timezone.is_naive(subm_date):
-                            subm_date = timezone.make_aware(subm_date)
-
-                        threshold_date = subm_date + datetime.timedelta(
-                            days=self.days_threshold
-                        )
-
-                        # Проверяем все расписания
-                        has_valid_dates = False
-                        for schedule in application.event_schedule.all():
-                            if schedule.start is None:
-                                continue
-
-                            event_date = schedule.start
-                            if timezone.is_naive(event_date):
-                                event_date = timezone.make_aware(event_date)
-
-                            # Приводим обе даты к UTC для корректного сравнения
-                            event_date_utc = event_date.astimezone(
-                                datetime.timezone.utc
-                            )
-                            threshold_date_utc = threshold_date.astimezone(
-                                datetime.timezone.utc
-                            )
-
-                            if event_date_utc >= threshold_date_utc:
-                                date_ok = False
-                                break
-
-                            has_valid_dates = True
-
-                        date_ok = date_ok and has_valid_dates
-                        # Проверка ролей
-                    if self.role_id.exists():  # Упрощенная проверка
-                        role_ok = application.roles.filter(
-                            id__in=self.role_id.values_list("id", flat=True)
-                        ).exists()
-
-                # Проверка длины текста
-                if self.min_text_length is not None:
-                    text_ok = (
-                        len(application.e_description or "")
-                        < self.min_text_length
-                    )
-
-                return date_ok and role_ok and text_ok
-
+            return CompiledRule.from_rule(self).matches(
+                ApplicationSnapshot.from_application(application)
+            )
         except (TypeError, ValueError):
             raise TypeError
-            return False
 
-        return False
+    def as_q(self):
+        """Возвращает условие правила в виде выражения Q для Application"""
+        if not self.is_active:
+            return NEVER
+        return CompiledRule.from_rule(self).as_q()
+
+    def as_queryset_filter(self, queryset=None):
+        """Отбирает заявки, удовлетворяющие условию правила"""
+        if queryset is None:
+            queryset = Application.objects.all()
+        return queryset.filter(self.as_q())
 
     def clean(self):
         if (
@@ -226,52 +144,339 @@ class RuleEngine:
     """Применяет все активные правила к заявке"""
 
     @staticmethod
-    def apply_rules_to_application(
-        application,
-    ):
+    def compile_rules():
+        """Загружает активные правила и настройки в CompiledRuleSet"""
         settings = ClassificationSettings.objects.first()
         change_status = (
             settings.change_status_on_classify if settings else True
         )
 
-        rules = Rule.objects.filter(is_active=True).order_by("-priority")
+        rules = (
+            Rule.objects.filter(is_active=True)
+            .select_related("new_status")
+            .prefetch_related("role_id")
+            .order_by("-priority", "id")
+        )
+
+        compiled = tuple(CompiledRule.from_rule(rule) for rule in rules)
+        return CompiledRuleSet(
+            rules=compiled,
+            change_status=change_status,
+            version=rules_version(compiled),
+            statuses={rule.new_status_id: rule.new_status for rule in rules},
+        )
+
+    @staticmethod
+    def apply_rules_to_application(application, rule_set=None):
+        """Возвращает новый статус заявки.
+
+        Скомпилированный набор правил можно передать заранее, чтобы не
+        загружать правила для каждой заявки.
+        """
+        if rule_set is None:
+            rule_set = RuleEngine.compile_rules()
+
+        rule = rule_set.match(
+            ApplicationSnapshot.from_application(application)
+        )
+
+        if rule is None:
+            # Возвращаем исходный статус, если правила не сработали
+            return application.status
+
+        new_status = rule_set.statuses[rule.new_status_id]
+        # Возвращаем новый статус и обновляем заявку
+        if rule_set.change_status:
+            application.status = new_status
+            application.save(update_fields=["status"])
+        return new_status
 
+    @staticmethod
+    def annotate_matched_rule(queryset, rule_set=None):
+        """Добавляет к заявкам поле matched_rule_id.
+
+        Поле содержит id первого сработавшего правила в порядке
+        приоритета или NULL, если ни одно правило не сработало.
+        """
+        if rule_set is None:
+            rule_set = RuleEngine.compile_rules()
+        return queryset.annotate(
+            matched_rule_id=Case(
+                *(
+                    When(rule.as_q(), then=Value(rule.id))
+                    for rule in rule_set.rules
+                ),
+                default=None,
+                output_field=models.BigIntegerField(),
+            )
+        )
+
+    @staticmethod
+    def apply_rules_in_db(queryset=None):
+        """Классифицирует заявки на стороне базы данных.
+
+        Правила проверяются в порядке приоритета: правило обновляет только
+        те заявки, на которых не сработало ни одно правило с более высоким
+        приоритетом. Результаты классификации всех заявок queryset
+        перезаписываются одним INSERT ... SELECT до обновления статусов,
+        поэтому количество запросов не зависит от числа заявок.
+        Возвращает количество заявок со сменившимся (или, если изменение
+        статусов отключено, с подлежащим смене) статусом по id правила.
+        """
+        rule_set = RuleEngine.compile_rules()
+        if queryset is None:
+            queryset = Application.objects.all()
+        queryset = RuleEngine.annotate_matched_rule(
+            queryset, rule_set
+        ).annotate(
+            classified_status_id=Case(
+                *(
+                    When(matched_rule_id=rule.id, then=rule.new_status_id)
+                    for rule in rule_set.rules
+                ),
+                default=F("status_id"),
+                output_field=models.BigIntegerField(),
+            )
+        )
+        changed_rows = queryset.filter(matched_rule_id__isnull=False).exclude(
+            status_id=F("classified_status_id")
+        )
+
+        with transaction.atomic():
+            changed = dict.fromkeys((rule.id for rule in rule_set.rules), 0)
+            changed.update(
+                changed_rows.order_by()
+                .values_list("matched_rule_id")
+                .annotate(count=Count("pk"))
+            )
+            ClassificationResult.store_from_queryset(queryset, rule_set)
+            if rule_set.change_status:
+                for rule in rule_set.rules:
+                    if changed[rule.id]:
+                        changed_rows.filter(matched_rule_id=rule.id).update(
+                            status_id=rule.new_status_id
+                        )
+                # update() не вызывает сигналы моделей
+                if any(changed.values()):
+                    invalidate(PAGES)
+
+        return changed
+
+    @staticmethod
+    def split_id_ranges(queryset, chunk_size=BATCH_CHUNK_SIZE):
+        """Разбивает заявки на диапазоны первичных ключей.
+
+        Возвращает список пар (первый id, последний id), в каждый диапазон
+        попадает не более chunk_size заявок.
+        """
+        ids = (
+            queryset.order_by("pk")
+            .values_list("pk", flat=True)
+            .iterator(chunk_size=chunk_size)
+        )
+        ranges = []
+        while chunk := list(islice(ids, chunk_size)):
+            ranges.append((chunk[0], chunk[-1]))
+        return ranges
+
+    @staticmethod
+    def load_columns(queryset=None):
+        """Загружает заявки в столбцы NumPy для векторизованной проверки"""
+        from CogSolver.vectorized import ApplicationColumns
+
+        return ApplicationColumns.load(queryset)
+
+    @staticmethod
+    def evaluate_columns(columns, rule_set=None):
+        """Возвращает массив id статусов, присваиваемых заявкам.
+
+        Правила вычисляются как булевы маски над всеми заявками сразу, без
+        обращений к базе данных. Порядок совпадает с columns.ids.
+        """
+        from CogSolver.vectorized import new_status_ids
+
+        if rule_set is None:
+            rule_set = RuleEngine.compile_rules()
+        return new_status_ids(rule_set, columns)
+
+    @staticmethod
+    def simulate(
+        rules=(), exclude_ids=(), only=False, queryset=None, columns=None
+    ):
+        """Проверяет изменённые правила без записи в базу данных.
+
+        rules — модели Rule (в том числе несохраненные) или CompiledRule.
+        Они заменяют сохраненные правила с тем же id или добавляются к
+        активным правилам; при only=True проверяются только они.
+        Неактивные правила и правила с id из exclude_ids исключаются.
+        Снимок заявок columns можно загрузить заранее (load_columns) и
+        использовать для нескольких проверок.
+
+        Возвращает словарь {(id текущего статуса, id нового статуса):
+        [id заявок]} только для заявок, статус которых изменится.
+        """
+        from CogSolver.vectorized import status_diff
+
+        exclude_ids = set(exclude_ids)
+        candidates = []
         for rule in rules:
-            try:
-                if rule.evaluate(application):
-                    # Возвращаем новый статус и обновляем заявку
-                    if change_status:
-                        application.status = rule.new_status
-                        application.save()
-                    return rule.new_status
-
-            except Exception as e:
-                logger.error(
-                    f"Error evaluating rule {rule.id} for application "
-                    f"{application.id}: {str(e)}"
+            if isinstance(rule, Rule):
+                if not rule.is_active:
+                    exclude_ids.add(rule.pk)
+                    continue
+                # У несохраненного правила еще нет ролей
+                rule = CompiledRule.from_rule(
+                    rule, role_ids=None if rule.pk else ()
                 )
-                continue
+            candidates.append(rule)
 
-        # Возвращаем исходный статус при ошибках или если правила не сработали
-        return application.status
+        base = CompiledRuleSet() if only else RuleEngine.compile_rules()
+        rule_set = base.with_rules(candidates, exclude_ids)
+
+        if columns is None:
+            columns = RuleEngine.load_columns(queryset)
+        return status_diff(
+            columns, RuleEngine.evaluate_columns(columns, rule_set)
+        )
 
     @staticmethod
-    def batch_apply_rules():
-        """Применяет правила ко всем заявкам и возвращает результаты"""
-        results = []
-        applications = Application.objects.all().reverse()
-
-        for app in applications:
-            new_status = RuleEngine.apply_rules_to_application(app)
-            results.append(
-                {
-                    "application": app,
-                    "current_status": app.status,
-                    "new_status": new_status,
-                    "status_changed": new_status != app.status,
-                }
+    def apply_rules_to_pending(limit=BATCH_CHUNK_SIZE):
+        """Классифицирует до limit заявок, отмеченных как измененные.
+
+        Отметки снимаются в той же транзакции, поэтому при ошибке заявки
+        останутся в очереди, а изменения, сделанные во время
+        классификации, будут обработаны при следующем вызове.
+        """
+        with transaction.atomic():
+            ids = list(
+                PendingClassification.objects.select_for_update(
+                    skip_locked=True
+                ).values_list("application_id", flat=True)[:limit]
+            )
+            if not ids:
+                return []
+            PendingClassification.objects.filter(
+                application_id__in=ids
+            ).delete()
+            return RuleEngine.batch_apply_rules(
+                Application.objects.filter(pk__in=ids)
             )
 
+    @staticmethod
+    def sharded_apply_rules(
+        queryset=None, workers=None, shard_size=SHARD_SIZE
+    ):
+        """Применяет правила к заявкам в нескольких процессах.
+
+        Заявки делятся на диапазоны первичных ключей по shard_size, которые
+        проверяются в workers процессах (по умолчанию по числу ядер).
+        Результаты объединяются и сохраняются порциями в одной транзакции.
+        Возвращает список кортежей (id заявки, id текущего статуса,
+        id нового статуса, id правила).
+        """
+        from CogSolver.parallel import classify_shards
+
+        rule_set = RuleEngine.compile_rules()
+        if queryset is None:
+            queryset = Application.objects.all()
+        ranges = RuleEngine.split_id_ranges(queryset, shard_size)
+        rows = classify_shards(rule_set, ranges, workers or os.cpu_count())
+
+        with transaction.atomic():
+            if rule_set.change_status and any(
+                new_status_id != status_id
+                for _, status_id, new_status_id, _ in rows
+            ):
+                invalidate(PAGES)
+            pending = iter(rows)
+            while chunk := list(islice(pending, BATCH_CHUNK_SIZE)):
+                if rule_set.change_status:
+                    Application.objects.bulk_update(
+                        [
+                            Application(pk=app_id, status_id=new_status_id)
+                            for app_id, status_id, new_status_id, _ in chunk
+                            if new_status_id != status_id
+                        ],
+                        ["status"],
+                    )
+                ClassificationResult.store(
+                    [
+                        ClassificationResult(
+                            application_id=app_id,
+                            rule_id=rule_id,
+                            current_status_id=status_id,
+                            new_status_id=new_status_id,
+                            status_changed=new_status_id != status_id,
+                            rule_set_version=rule_set.version,
+                        )
+                        for app_id, status_id, new_status_id, rule_id in chunk
+                    ]
+                )
+
+        return rows
+
+    @staticmethod
+    def batch_apply_rules(queryset=None, chunk_size=BATCH_CHUNK_SIZE):
+        """Применяет правила ко всем заявкам и возвращает результаты.
+
+        Заявки загружаются порциями по chunk_size вместе с ролями и
+        расписанием, правила проверяются в памяти, а изменившиеся статусы
+        записываются одним bulk_update на порцию в общей транзакции.
+        """
+        results = []
+        rule_set = RuleEngine.compile_rules()
+        if queryset is None:
+            queryset = Application.objects.all().reverse()
+        applications = (
+            queryset.select_related("status")
+            .prefetch_related("roles", "event_schedule")
+            .iterator(chunk_size=chunk_size)
+        )
+
+        with transaction.atomic():
+            while chunk := list(islice(applications, chunk_size)):
+                changed = []
+                stored = []
+                for app in chunk:
+                    current_status = app.status
+                    rule = rule_set.match(
+                        ApplicationSnapshot.from_application(app)
+                    )
+                    new_status = (
+                        rule_set.statuses[rule.new_status_id]
+                        if rule
+                        else current_status
+                    )
+                    status_changed = new_status != current_status
+
+                    if status_changed and rule_set.change_status:
+                        app.status = new_status
+                        changed.append(app)
+
+                    results.append(
+                        {
+                            "application": app,
+                            "current_status": current_status,
+                            "new_status": new_status,
+                            "status_changed": status_changed,
+                        }
+                    )
+                    stored.append(
+                        ClassificationResult(
+                            application=app,
+                            rule_id=rule.id if rule else None,
+                            current_status=current_status,
+                            new_status=new_status,
+                            status_changed=status_changed,
+                            rule_set_version=rule_set.version,
+                        )
+                    )
+
+                if changed:
+                    Application.objects.bulk_update(changed, ["status"])
+                    invalidate(PAGES)
+                ClassificationResult.store(stored)
+
         return results
 
 
@@ -286,3 +491,161 @@ class ClassificationSettings(models.Model):
 
     def __str__(self):
         return "Настройки автоматической классификации"
+
+
+class PendingClassification(models.Model):
+    """Заявка, которую нужно классифицировать повторно"""
+
+    application = models.OneToOneField(
+        Application,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="pending_classification",
+        verbose_name="Заявка",
+    )
+    marked_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Время отметки",
+    )
+
+    class Meta:
+        verbose_name = "заявка для повторной классификации"
+        verbose_name_plural = "Заявки для повторной классификации"
+
+    def __str__(self):
+        return f"Заявка {self.application_id}"
+
+    @classmethod
+    def mark(cls, application_ids):
+        """Отмечает заявки для повторной классификации"""
+        ids = iter(application_ids)
+        while chunk := list(islice(ids, BATCH_CHUNK_SIZE)):
+            cls.objects.bulk_create(
+                (cls(application_id=pk) for pk in chunk),
+                ignore_conflicts=True,
+            )
+
+
+class ClassificationResult(models.Model):
+    """Результат последней классификации заявки"""
+
+    application = models.OneToOneField(
+        Application,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="classification_result",
+        verbose_name="Заявка",
+    )
+    rule = models.ForeignKey(
+        Rule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="classification_results",
+        verbose_name="Сработавшее правило",
+    )
+    current_status = models.ForeignKey(
+        AgreedStatus,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Статус до классификации",
+    )
+    new_status = models.ForeignKey(
+        AgreedStatus,
+        on_delete=models.CASCADE,
+        related_name="+",
+        verbose_name="Статус классификатора",
+    )
+    status_changed = models.BooleanField(
+        default=False,
+        verbose_name="Статус изменен",
+    )
+    rule_set_version = models.CharField(
+        max_length=16,
+        db_index=True,
+        verbose_name="Версия набора правил",
+    )
+    classified_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Время классификации",
+    )
+
+    class Meta:
+        verbose_name = "результат классификации"
+        verbose_name_plural = "Результаты классификации"
+        ordering = ["-application_id"]
+        indexes = [
+            models.Index(fields=["rule", "status_changed"]),
+            models.Index(fields=["status_changed", "application"]),
+        ]
+
+    def __str__(self):
+        return f"Заявка {self.application_id}: {self.new_status}"
+
+    @classmethod
+    def store_from_queryset(cls, queryset, rule_set):
+        """Перезаписывает результаты заявок queryset одним INSERT ... SELECT.
+
+        queryset - заявки с полями matched_rule_id и classified_status_id
+        (RuleEngine.apply_rules_in_db). Результаты заявок, на которых не
+        сработало ни одно правило, также заменяются, поэтому все
+        результаты соответствуют версии rule_set.
+        """
+        rows = (
+            queryset.order_by()
+            .annotate(
+                result_status_changed=Case(
+                    When(status_id=F("classified_status_id"), then=False),
+                    default=True,
+                ),
+                result_version=Value(rule_set.version),
+                result_time=Value(
+                    timezone.now(), output_field=models.DateTimeField()
+                ),
+            )
+            .values_list(
+                "pk",
+                "matched_rule_id",
+                "status_id",
+                "classified_status_id",
+                "result_status_changed",
+                "result_version",
+                "result_time",
+            )
+        )
+        cls.objects.filter(application__in=queryset.values("pk")).delete()
+
+        fields = [
+            "application_id",
+            "rule_id",
+            "current_status_id",
+            "new_status_id",
+            "status_changed",
+            "rule_set_version",
+            "classified_at",
+        ]
+        sql, params = rows.query.sql_with_params()
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {quote(cls._meta.db_table)} "
+                f"({', '.join(map(quote, fields))}) {sql}",
+                params,
+            )
+
+    @classmethod
+    def store(cls, results):
+        """Сохраняет результаты, заменяя предыдущие для тех же заявок"""
+        cls.objects.bulk_create(
+            results,
+            update_conflicts=True,
+            unique_fields=["application"],
+            update_fields=[
+                "rule",
+                "current_status",
+                "new_status",
+                "status_changed",
+                "rule_set_version",
+                "classified_at",
+            ],
+        )
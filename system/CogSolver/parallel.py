@@ -0,0 +1,85 @@
+"""Параллельная проверка правил в нескольких процессах.
+
+Каждый процесс открывает собственное соединение с базой данных, загружает
+свой диапазон заявок и возвращает компактные кортежи
+(id заявки, id текущего статуса, id нового статуса, id правила).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+
+import django
+from CogEditor.models import Application, ParticipatoryRole, Schedule
+from CogSolver.compiled import ApplicationSnapshot
+from django.apps import apps
+from django.db import connections
+from django.db.models import Prefetch
+
+# Количество заявок, загружаемых процессом за один запрос
+SHARD_FETCH_SIZE = 2000
+
+
+def _init_worker():
+    if not apps.ready:
+        django.setup()
+
+
+def classify_shard(rule_set, first_id, last_id):
+    """Проверяет правила для заявок с id из диапазона [first_id, last_id]"""
+    applications = (
+        Application.objects.filter(pk__range=(first_id, last_id))
+        .only("id", "status_id", "subm_date", "e_description")
+        .prefetch_related(
+            Prefetch("roles", queryset=ParticipatoryRole.objects.only("id")),
+            Prefetch(
+                "event_schedule", queryset=Schedule.objects.only("id", "start")
+            ),
+        )
+    )
+
+    rows = []
+    for app in applications.iterator(chunk_size=SHARD_FETCH_SIZE):
+        rule = rule_set.match(ApplicationSnapshot.from_application(app))
+        if rule is None:
+            rows.append((app.pk, app.status_id, app.status_id, None))
+        else:
+            rows.append((app.pk, app.status_id, rule.new_status_id, rule.id))
+    return rows
+
+
+def classify_shards(rule_set, ranges, workers):
+    """Проверяет правила для диапазонов заявок в workers процессах.
+
+    При workers=1 диапазоны обрабатываются в текущем процессе. Внутри
+    открытой транзакции несколько процессов не запускаются: закрытие
+    соединений прервало бы транзакцию вызывающего кода, а процессы не
+    увидели бы ее незафиксированные изменения.
+    """
+    if not ranges:
+        return []
+    if workers > 1 and any(
+        conn.in_atomic_block for conn in connections.all(initialized_only=True)
+    ):
+        raise RuntimeError(
+            "classify_shards с workers > 1 нельзя вызывать внутри "
+            "transaction.atomic()"
+        )
+
+    # Объекты AgreedStatus процессам не нужны
+    rule_set = replace(rule_set, statuses={})
+
+    if workers == 1:
+        shards = (classify_shard(rule_set, *bounds) for bounds in ranges)
+        return [row for shard in shards for row in shard]
+
+    # Дочерние процессы не должны использовать соединения родителя
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker
+    ) as executor:
+        shards = executor.map(
+            classify_shard,
+            [rule_set] * len(ranges),
+            *zip(*ranges),
+        )
+        return [row for shard in shards for row in shard]
@@ -0,0 +1,102 @@
+"""Отслеживание изменений, требующих повторной классификации заявок"""
+
+from CogEditor.models import Application, Schedule
+from CogSolver.compiled import NEVER
+from CogSolver.models import PendingClassification, Rule
+from django.db.models.signals import (
+    m2m_changed,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+
+def mark_queryset(queryset):
+    PendingClassification.mark(
+        queryset.values_list("pk", flat=True).iterator()
+    )
+
+
+@receiver(post_save, sender=Application)
+def application_saved(sender, instance, update_fields=None, **kwargs):
+    # Изменение одного только статуса не влияет на условия правил
+    if update_fields is not None and set(update_fields) <= {"status"}:
+        return
+    PendingClassification.mark([instance.pk])
+
+
+@receiver(m2m_changed, sender=Application.roles.through)
+@receiver(m2m_changed, sender=Application.event_schedule.through)
+def application_relations_changed(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if not reverse:
+        if action.startswith("post_"):
+            PendingClassification.mark([instance.pk])
+        return
+
+    # Изменение со стороны роли или расписания
+    related_name = (
+        "roles" if sender is Application.roles.through else "event_schedule"
+    )
+    if action == "pre_clear":
+        mark_queryset(Application.objects.filter(**{related_name: instance}))
+    elif action in ("post_add", "post_remove"):
+        PendingClassification.mark(pk_set)
+
+
+@receiver(post_save, sender=Schedule)
+def schedule_saved(sender, instance, created, **kwargs):
+    if not created:
+        mark_queryset(instance.event_applications.all())
+
+
+@receiver(pre_delete, sender=Schedule)
+def schedule_deleted(sender, instance, **kwargs):
+    # Связи с заявками удаляются каскадом без сигнала m2m_changed
+    mark_queryset(instance.event_applications.all())
+
+
+@receiver(pre_save, sender=Rule)
+def rule_pre_save(sender, instance, **kwargs):
+    previous = Rule.objects.filter(pk=instance.pk).first()
+    instance._previous_q = previous.as_q() if previous else None
+
+
+@receiver(post_save, sender=Rule)
+def rule_saved(sender, instance, **kwargs):
+    # Правило может затронуть только заявки, удовлетворяющие его условию
+    # до или после изменения
+    q = instance.as_q()
+    if getattr(instance, "_previous_q", None) is not None:
+        q |= instance._previous_q
+    mark_queryset(Application.objects.filter(q))
+
+
+@receiver(pre_delete, sender=Rule)
+def rule_deleted(sender, instance, **kwargs):
+    mark_queryset(instance.as_queryset_filter())
+
+
+@receiver(m2m_changed, sender=Rule.role_id.through)
+def rule_roles_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse:
+        # Изменение со стороны роли затрагивает несколько правил
+        rules = (
+            Rule.objects.filter(pk__in=pk_set)
+            if pk_set
+            else instance.rule_set.all()
+        )
+    else:
+        rules = [instance]
+
+    q = NEVER
+    for rule in rules:
+        q |= rule.as_q()
+
+    if action.startswith("pre_"):
+        instance._previous_q = q
+    else:
+        q |= getattr(instance, "_previous_q", NEVER)
+        mark_queryset(Application.objects.filter(q))
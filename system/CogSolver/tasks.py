@@ -0,0 +1,170 @@
+"""Фоновая классификация заявок в Celery.
+
+Запуск делится на порции, которые обрабатываются параллельно. Ход
+выполнения хранится в кэше и доступен по id запуска. Заявки, отмеченные
+как измененные, классифицируются периодической задачей classify_pending
+(CELERY_BEAT_SCHEDULE).
+"""
+
+import math
+import uuid
+from contextlib import contextmanager
+
+from celery import group, shared_task
+from CogEditor.models import Application
+from CogSolver.models import (
+    BATCH_CHUNK_SIZE,
+    PendingClassification,
+    RuleEngine,
+)
+from django.core.cache import cache
+
+# Время хранения сведений о запуске в кэше, с
+PROGRESS_TIMEOUT = 60 * 60
+CURRENT_RUN_KEY = "classification:current"
+PROGRESS_FIELDS = (
+    "total",
+    "done",
+    "changed",
+    "failed",
+    "chunks_total",
+    "chunks_done",
+)
+
+
+def _key(run_id, name):
+    return f"classification:{run_id}:{name}"
+
+
+def start_classification(full=False, chunk_size=BATCH_CHUNK_SIZE):
+    """Запускает фоновую классификацию и возвращает id запуска.
+
+    При full=True классифицируются все заявки, иначе только отмеченные
+    как измененные. Если классификация уже выполняется, новый запуск не
+    создается и возвращается id текущего.
+    """
+    run_id = uuid.uuid4().hex
+    if not cache.add(CURRENT_RUN_KEY, run_id, PROGRESS_TIMEOUT):
+        current = cache.get(CURRENT_RUN_KEY)
+        if current:
+            return current
+        cache.set(CURRENT_RUN_KEY, run_id, PROGRESS_TIMEOUT)
+
+    plan_classification.delay(run_id, full, chunk_size)
+    return run_id
+
+
+def get_progress(run_id):
+    """Возвращает ход выполнения запуска или None, если он неизвестен"""
+    values = cache.get_many([_key(run_id, name) for name in PROGRESS_FIELDS])
+    if not values:
+        return None
+
+    progress = {
+        name: values.get(_key(run_id, name), 0) for name in PROGRESS_FIELDS
+    }
+    planned = _key(run_id, "chunks_total") in values
+    progress["finished"] = (
+        planned and progress["chunks_done"] >= progress["chunks_total"]
+    )
+    progress["percent"] = (
+        100
+        if progress["finished"]
+        else int(progress["done"] * 100 / max(progress["total"], 1))
+    )
+    return progress
+
+
+def _finish_run(run_id):
+    if cache.get(CURRENT_RUN_KEY) == run_id:
+        cache.delete(CURRENT_RUN_KEY)
+
+
+def _incr(run_id, name, delta=1):
+    # Счетчики долгого запуска могут истечь раньше его окончания
+    key = _key(run_id, name)
+    cache.add(key, 0, PROGRESS_TIMEOUT)
+    return cache.incr(key, delta)
+
+
+@contextmanager
+def _chunk(run_id):
+    """Учитывает порцию в ходе выполнения, в том числе при ошибке.
+
+    В блоке результаты классификации добавляются в возвращаемый список.
+    """
+    results = []
+    try:
+        yield results
+    except Exception:
+        _incr(run_id, "failed")
+        raise
+    finally:
+        _incr(run_id, "done", len(results))
+        _incr(
+            run_id,
+            "changed",
+            sum(1 for r in results if r["status_changed"]),
+        )
+        chunks_done = _incr(run_id, "chunks_done")
+        if chunks_done >= cache.get(_key(run_id, "chunks_total"), 0):
+            _finish_run(run_id)
+
+
+@shared_task
+def plan_classification(run_id, full=False, chunk_size=BATCH_CHUNK_SIZE):
+    """Делит заявки на порции и ставит их обработку в очередь"""
+    if full:
+        ranges = RuleEngine.split_id_ranges(
+            Application.objects.all(), chunk_size
+        )
+        total = Application.objects.count()
+        tasks = [
+            classify_range.s(run_id, first, last) for first, last in ranges
+        ]
+    else:
+        total = PendingClassification.objects.count()
+        tasks = [
+            classify_pending_chunk.s(run_id, chunk_size)
+            for _ in range(math.ceil(total / chunk_size))
+        ]
+
+    cache.set_many(
+        {
+            _key(run_id, "total"): total,
+            _key(run_id, "done"): 0,
+            _key(run_id, "changed"): 0,
+            _key(run_id, "failed"): 0,
+            _key(run_id, "chunks_done"): 0,
+            _key(run_id, "chunks_total"): len(tasks),
+        },
+        PROGRESS_TIMEOUT,
+    )
+
+    if tasks:
+        group(tasks).apply_async()
+    else:
+        _finish_run(run_id)
+
+
+@shared_task
+def classify_range(run_id, first_id, last_id):
+    """Классифицирует заявки с первичными ключами из диапазона"""
+    with _chunk(run_id) as results:
+        results += RuleEngine.batch_apply_rules(
+            Application.objects.filter(pk__range=(first_id, last_id))
+        )
+
+
+@shared_task
+def classify_pending_chunk(run_id, chunk_size=BATCH_CHUNK_SIZE):
+    """Классифицирует очередную порцию измененных заявок"""
+    with _chunk(run_id) as results:
+        results += RuleEngine.apply_rules_to_pending(chunk_size)
+
+
+@shared_task
+def classify_pending():
+    """Запускает классификацию заявок, измененных с прошлого запуска"""
+    if PendingClassification.objects.exists():
+        return start_classification()
@@ -1,4 +1,7 @@
 import datetime
+from dataclasses import replace
+from io import StringIO
+from unittest import mock
 
 from CogEditor.models import (
     AgreedStatus,
@@ -11,10 +14,42 @@ from CogEditor.models import (
     Sources,
     StructuralUnit,
 )
-from CogSolver.models import Rule, RuleEngine
+from CogSolver.compiled import ApplicationSnapshot
+from CogSolver.datagen import (
+    generate_applications,
+    generate_reference_data,
+    generate_rules,
+)
+from CogSolver.models import (
+    ClassificationResult,
+    ClassificationSettings,
+    PendingClassification,
+    Rule,
+    RuleEngine,
+)
+from CogSolver.signals import mark_queryset
+from CogSolver.tasks import (
+    classify_pending,
+    classify_range,
+    get_progress,
+    start_classification,
+)
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test import (
+    Client,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from mysite import celery_app
+from mysite.testing import LOCMEM_CACHES
 
 
 class RuleModelTest(TestCase):
@@ -230,6 +265,788 @@ class RuleEngineTest(TestCase):
         self.assertEqual(results[0]['new_status'], self.status2)
 
 
+class CompiledRuleSetTest(TestCase):
+    def setUp(self):
+        self.status1 = AgreedStatus.objects.create(
+            status="Статус 1", n_stage=1
+        )
+        self.status2 = AgreedStatus.objects.create(
+            status="Статус 2", n_stage=2
+        )
+        self.role1 = ParticipatoryRole.objects.create(role="Роль 1")
+        self.role2 = ParticipatoryRole.objects.create(role="Роль 2")
+        self.unit = StructuralUnit.objects.create(
+            unit="Тестовое подразделение"
+        )
+
+        self.schedule = Schedule.objects.create(
+            start=timezone.now() + datetime.timedelta(days=1),
+            end=timezone.now() + datetime.timedelta(days=1, hours=2),
+        )
+        self.application = Application.objects.create(
+            subm_date=timezone.now(),
+            e_title="Тестовое мероприятие",
+            e_description="Тестовое описание",
+            organizer=self.unit,
+            status=self.status1,
+        )
+        self.application.roles.add(self.role1)
+        self.application.event_schedule.add(self.schedule)
+
+        ClassificationSettings.objects.create(change_status_on_classify=False)
+
+        for priority in range(20):
+            rule = Rule.objects.create(
+                name=f"Правило ролей {priority}",
+                condition_type="role_check",
+                new_status=self.status1,
+                priority=priority,
+            )
+            rule.role_id.add(self.role2)
+
+        self.date_rule = Rule.objects.create(
+            name="Правило сравнения дат",
+            condition_type="date_compare",
+            days_threshold=2,
+            new_status=self.status2,
+            priority=0,
+        )
+
+    def test_compile_rules_orders_by_priority(self):
+        rule_set = RuleEngine.compile_rules()
+        priorities = [rule.priority for rule in rule_set.rules]
+
+        self.assertEqual(priorities, sorted(priorities, reverse=True))
+        self.assertFalse(rule_set.change_status)
+        self.assertEqual(rule_set.rules[0].role_ids, {self.role2.id})
+
+    def test_apply_without_extra_queries(self):
+        rule_set = RuleEngine.compile_rules()
+        application = Application.objects.prefetch_related(
+            "roles", "event_schedule"
+        ).get(pk=self.application.pk)
+
+        with self.assertNumQueries(0):
+            new_status = RuleEngine.apply_rules_to_application(
+                application, rule_set
+            )
+
+        self.assertEqual(new_status, self.status2)
+
+    def test_compiled_rule_matches_evaluate(self):
+        rule_set = RuleEngine.compile_rules()
+        snapshot = ApplicationSnapshot.from_application(self.application)
+
+        for compiled, rule in zip(
+            rule_set.rules, Rule.objects.order_by("-priority", "id")
+        ):
+            self.assertEqual(
+                compiled.matches(snapshot), rule.evaluate(self.application)
+            )
+
+
+class BatchApplyRulesFixture:
+    def setUp(self):
+        self.status1 = AgreedStatus.objects.create(
+            status="Статус 1", n_stage=1
+        )
+        self.status2 = AgreedStatus.objects.create(
+            status="Статус 2", n_stage=2
+        )
+        self.role = ParticipatoryRole.objects.create(role="Роль 1")
+        self.unit = StructuralUnit.objects.create(
+            unit="Тестовое подразделение"
+        )
+        Rule.objects.create(
+            name="Правило длины текста",
+            condition_type="text_length",
+            min_text_length=10,
+            new_status=self.status2,
+        )
+
+    def create_applications(self, count):
+        for i in range(count):
+            application = Application.objects.create(
+                subm_date=timezone.now(),
+                e_title=f"Мероприятие {i}",
+                e_description="Кратко" if i % 2 else "Длинное описание",
+                organizer=self.unit,
+                status=self.status1,
+            )
+            application.roles.add(self.role)
+            application.event_schedule.add(
+                Schedule.objects.create(
+                    start=timezone.now() + datetime.timedelta(days=1)
+                )
+            )
+
+
+class BatchApplyRulesTest(BatchApplyRulesFixture, TestCase):
+    def test_results_and_bulk_update(self):
+        self.create_applications(4)
+
+        results = RuleEngine.batch_apply_rules(chunk_size=3)
+
+        self.assertEqual(len(results), 4)
+        changed = [r for r in results if r["status_changed"]]
+        self.assertEqual(len(changed), 2)
+        for result in changed:
+            self.assertEqual(result["current_status"], self.status1)
+            self.assertEqual(result["new_status"], self.status2)
+        self.assertEqual(
+            Application.objects.filter(status=self.status2).count(), 2
+        )
+
+    def test_sharded_apply_rules_matches_batch(self):
+        self.create_applications(5)
+        expected = {
+            r["application"].pk: r["new_status"].pk
+            for r in RuleEngine.batch_apply_rules()
+        }
+        Application.objects.update(status=self.status1)
+
+        rows = RuleEngine.sharded_apply_rules(workers=1, shard_size=2)
+
+        self.assertEqual(
+            {app_id: new_status_id for app_id, _, new_status_id, _ in rows},
+            expected,
+        )
+        self.assertEqual(
+            dict(Application.objects.values_list("pk", "status_id")),
+            expected,
+        )
+        self.assertEqual(
+            ClassificationResult.objects.filter(status_changed=True).count(),
+            2,
+        )
+
+    def test_sharded_apply_rules_without_changes_keeps_pages(self):
+        self.create_applications(3)
+        RuleEngine.sharded_apply_rules(workers=1)
+
+        with mock.patch("CogSolver.models.invalidate") as invalidate:
+            rows = RuleEngine.sharded_apply_rules(workers=1)
+
+        self.assertEqual(len(rows), 3)
+        invalidate.assert_not_called()
+
+    def test_workers_refused_inside_atomic(self):
+        self.create_applications(2)
+
+        with self.assertRaises(RuntimeError):
+            RuleEngine.sharded_apply_rules(workers=2)
+
+    def test_query_count_does_not_depend_on_size(self):
+        self.create_applications(2)
+        with CaptureQueriesContext(connection) as small:
+            RuleEngine.batch_apply_rules()
+
+        Application.objects.update(status=self.status1)
+        self.create_applications(10)
+        with CaptureQueriesContext(connection) as large:
+            RuleEngine.batch_apply_rules()
+
+        self.assertEqual(len(small), len(large))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ShardedApplyRulesTest(BatchApplyRulesFixture, TransactionTestCase):
+    def test_sharded_apply_rules_in_processes(self):
+        self.create_applications(5)
+
+        rows = RuleEngine.sharded_apply_rules(workers=2, shard_size=2)
+
+        expected = {
+            app.pk: (
+                self.status2.pk
+                if app.e_description == "Кратко"
+                else self.status1.pk
+            )
+            for app in Application.objects.all()
+        }
+        self.assertEqual(
+            {app_id: new_status_id for app_id, _, new_status_id, _ in rows},
+            expected,
+        )
+        self.assertEqual(
+            dict(Application.objects.values_list("pk", "status_id")),
+            expected,
+        )
+        self.assertEqual(
+            ClassificationResult.objects.filter(status_changed=True).count(),
+            2,
+        )
+
+
+class RulePushdownTest(TestCase):
+    def setUp(self):
+        self.status1 = AgreedStatus.objects.create(
+            status="Статус 1", n_stage=1
+        )
+        self.status2 = AgreedStatus.objects.create(
+            status="Статус 2", n_stage=2
+        )
+        self.status3 = AgreedStatus.objects.create(
+            status="Статус 3", n_stage=3
+        )
+        self.role1 = ParticipatoryRole.objects.create(role="Роль 1")
+        self.role2 = ParticipatoryRole.objects.create(role="Роль 2")
+        self.unit = StructuralUnit.objects.create(
+            unit="Тестовое подразделение"
+        )
+
+        now = timezone.now()
+        variants = [
+            ("Кратко", [1], [self.role1]),
+            ("Длинное описание мероприятия", [5], [self.role2]),
+            (None, [1, 6], [self.role1, self.role2]),
+            ("Кратко", [], [self.role2]),
+            ("", [None], []),
+        ]
+        for i, (description, days, roles) in enumerate(variants):
+            application = Application.objects.create(
+                subm_date=now,
+                e_title=f"Мероприятие {i}",
+                e_description=description,
+                organizer=self.unit,
+                status=self.status1,
+            )
+            application.roles.set(roles)
+            for day in days:
+                application.event_schedule.add(
+                    Schedule.objects.create(
+                        start=(
+                            None
+                            if day is None
+                            else now + datetime.timedelta(days=day)
+                        )
+                    )
+                )
+
+        Rule.objects.create(
+            name="Даты",
+            condition_type="date_compare",
+            days_threshold=3,
+            new_status=self.status2,
+            priority=3,
+        )
+        Rule.objects.create(
+            name="Длина текста",
+            condition_type="text_length",
+            min_text_length=10,
+            new_status=self.status3,
+            priority=2,
+        )
+        role_rule = Rule.objects.create(
+            name="Роли",
+            condition_type="role_check",
+            new_status=self.status3,
+            priority=1,
+        )
+        role_rule.role_id.add(self.role2)
+        combined_rule = Rule.objects.create(
+            name="Комбинированное",
+            condition_type="combined",
+            days_threshold=7,
+            min_text_length=10,
+            new_status=self.status2,
+            priority=0,
+        )
+        combined_rule.role_id.add(self.role1)
+
+    def test_as_q_matches_evaluate(self):
+        applications = Application.objects.prefetch_related(
+            "roles", "event_schedule"
+        )
+        for rule in Rule.objects.all():
+            expected = set()
+            for application in applications:
+                try:
+                    if rule.evaluate(application):
+                        expected.add(application.pk)
+                except TypeError:
+                    pass
+
+            matched = set(
+                rule.as_queryset_filter().values_list("pk", flat=True)
+            )
+            self.assertEqual(matched, expected, rule.name)
+
+    def test_vectorized_matches_batch(self):
+        columns = RuleEngine.load_columns()
+        expected = {
+            r["application"].pk: r["new_status"].pk
+            for r in RuleEngine.batch_apply_rules()
+        }
+
+        status_ids = RuleEngine.evaluate_columns(columns)
+
+        self.assertEqual(
+            dict(zip(columns.ids.tolist(), status_ids.tolist())), expected
+        )
+
+    def test_vectorized_what_if(self):
+        columns = RuleEngine.load_columns()
+        rule_set = RuleEngine.compile_rules()
+        date_rule = replace(rule_set.rules[0], days_threshold=10)
+        candidate = replace(rule_set, rules=(date_rule,) + rule_set.rules[1:])
+
+        with self.assertNumQueries(0):
+            status_ids = RuleEngine.evaluate_columns(columns, candidate)
+
+        Rule.objects.filter(pk=date_rule.id).update(days_threshold=10)
+        expected = {
+            r["application"].pk: r["new_status"].pk
+            for r in RuleEngine.batch_apply_rules()
+        }
+        self.assertEqual(
+            dict(zip(columns.ids.tolist(), status_ids.tolist())), expected
+        )
+
+    def test_apply_rules_in_db_matches_batch(self):
+        expected = {
+            r["application"].pk: r["new_status"]
+            for r in RuleEngine.batch_apply_rules()
+        }
+        Application.objects.update(status=self.status1)
+        # Результаты прошлой версии правил заменяются полностью
+        ClassificationResult.objects.update(
+            rule_set_version="old", status_changed=True
+        )
+        version = RuleEngine.compile_rules().version
+
+        # Загрузка правил, точка сохранения, подсчет, удаление и запись
+        # результатов и по UPDATE на каждое правило
+        with self.assertNumQueries(11):
+            changed = RuleEngine.apply_rules_in_db()
+
+        self.assertEqual(
+            sum(changed.values()),
+            sum(1 for status in expected.values() if status != self.status1),
+        )
+        for application in Application.objects.all():
+            self.assertEqual(application.status, expected[application.pk])
+        # Результаты совпадают со статусами, записанными в заявки
+        results = ClassificationResult.objects.all()
+        self.assertEqual(len(results), len(expected))
+        for result in results:
+            self.assertEqual(
+                result.new_status, expected[result.application_id]
+            )
+            self.assertEqual(result.current_status, self.status1)
+            self.assertEqual(
+                result.status_changed, result.new_status != self.status1
+            )
+            self.assertEqual(result.rule_set_version, version)
+        self.assertEqual(
+            sum(changed.values()),
+            ClassificationResult.objects.filter(status_changed=True).count(),
+        )
+
+
+class RuleSimulationTest(RulePushdownTest):
+    def test_simulate_matches_batch(self):
+        diff = RuleEngine.simulate()
+
+        expected = {}
+        for r in RuleEngine.batch_apply_rules():
+            if r["status_changed"]:
+                expected.setdefault(
+                    (r["current_status"].pk, r["new_status"].pk), []
+                ).append(r["application"].pk)
+        # simulate упорядочивает заявки в группе по id
+        self.assertEqual(
+            diff, {key: sorted(ids) for key, ids in expected.items()}
+        )
+
+    def test_simulate_does_not_save(self):
+        rule = Rule(
+            name="Кандидат",
+            condition_type="text_length",
+            min_text_length=100,
+            new_status=self.status3,
+            priority=10,
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            diff = RuleEngine.simulate([rule], only=True)
+
+        self.assertTrue(
+            all(
+                q["sql"].startswith("SELECT") for q in queries.captured_queries
+            )
+        )
+        self.assertEqual(
+            diff,
+            {
+                (self.status1.pk, self.status3.pk): list(
+                    Application.objects.exclude(e_description=None)
+                    .order_by("pk")
+                    .values_list("pk", flat=True)
+                )
+            },
+        )
+        self.assertFalse(
+            Application.objects.exclude(status=self.status1).exists()
+        )
+
+    def test_simulate_excluded_rules(self):
+        rule_ids = Rule.objects.values_list("pk", flat=True)
+        self.assertEqual(RuleEngine.simulate(exclude_ids=rule_ids), {})
+
+    @override_settings(CACHES=LOCMEM_CACHES)
+    def test_admin_simulate(self):
+        user = get_user_model().objects.create_superuser(
+            username="admin", password="password"
+        )
+        self.client.force_login(user)
+        rule = Rule.objects.get(name="Длина текста")
+
+        response = self.client.post(
+            reverse("admin:CogSolver_rule_change", args=[rule.pk]),
+            {
+                "name": rule.name,
+                "description": "-",
+                "priority": rule.priority,
+                "is_active": "on",
+                "new_status": self.status2.pk,
+                "condition_type": rule.condition_type,
+                "min_text_length": 100,
+                "_simulate": "1",
+            },
+        )
+
+        self.assertTemplateUsed(response, "CogSolver/admin/simulation.html")
+        self.assertGreater(response.context["changed_count"], 0)
+        rule.refresh_from_db()
+        self.assertEqual(rule.min_text_length, 10)
+        self.assertEqual(rule.new_status, self.status3)
+
+
+class IncrementalClassificationTest(TestCase):
+    def setUp(self):
+        self.status1 = AgreedStatus.objects.create(
+            status="Статус 1", n_stage=1
+        )
+        self.status2 = AgreedStatus.objects.create(
+            status="Статус 2", n_stage=2
+        )
+        self.role1 = ParticipatoryRole.objects.create(role="Роль 1")
+        self.role2 = ParticipatoryRole.objects.create(role="Роль 2")
+        self.unit = StructuralUnit.objects.create(
+            unit="Тестовое подразделение"
+        )
+        self.short = self.create_application("Кратко", self.role1)
+        self.long = self.create_application("Длинное описание", self.role2)
+        PendingClassification.objects.all().delete()
+
+    def create_application(self, description, role):
+        application = Application.objects.create(
+            subm_date=timezone.now(),
+            e_title="Тестовое мероприятие",
+            e_description=description,
+            organizer=self.unit,
+            status=self.status1,
+        )
+        application.roles.add(role)
+        return application
+
+    def pending_ids(self):
+        return set(
+            PendingClassification.objects.values_list(
+                "application_id", flat=True
+            )
+        )
+
+    def test_application_changes_mark_pending(self):
+        self.short.save()
+        self.long.roles.add(self.role1)
+        self.assertEqual(self.pending_ids(), {self.short.pk, self.long.pk})
+
+        PendingClassification.objects.all().delete()
+        self.short.status = self.status2
+        self.short.save(update_fields=["status"])
+        self.assertEqual(self.pending_ids(), set())
+
+    def test_schedule_delete_marks_applications(self):
+        schedule = Schedule.objects.create(start=timezone.now())
+        self.short.event_schedule.add(schedule)
+        PendingClassification.objects.all().delete()
+
+        schedule.delete()
+        self.assertEqual(self.pending_ids(), {self.short.pk})
+
+    def test_rule_changes_mark_affected_applications(self):
+        rule = Rule.objects.create(
+            name="Длина текста",
+            condition_type="text_length",
+            min_text_length=10,
+            new_status=self.status2,
+        )
+        self.assertEqual(self.pending_ids(), {self.short.pk})
+
+        PendingClassification.objects.all().delete()
+        role_rule = Rule.objects.create(
+            name="Роли",
+            condition_type="role_check",
+            new_status=self.status2,
+        )
+        self.assertEqual(self.pending_ids(), set())
+        role_rule.role_id.add(self.role2)
+        self.assertEqual(self.pending_ids(), {self.long.pk})
+
+        PendingClassification.objects.all().delete()
+        rule.delete()
+        self.assertEqual(self.pending_ids(), {self.short.pk})
+
+    def test_apply_rules_to_pending(self):
+        Rule.objects.create(
+            name="Длина текста",
+            condition_type="text_length",
+            min_text_length=10,
+            new_status=self.status2,
+        )
+        self.long.save()
+
+        results = RuleEngine.apply_rules_to_pending()
+
+        self.assertEqual(
+            {r["application"].pk for r in results},
+            {self.short.pk, self.long.pk},
+        )
+        self.assertEqual(self.pending_ids(), set())
+        self.short.refresh_from_db()
+        self.assertEqual(self.short.status, self.status2)
+        self.assertEqual(RuleEngine.apply_rules_to_pending(), [])
+
+
+class ClassificationResultTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.status1 = AgreedStatus.objects.create(
+            status="Статус 1", n_stage=1
+        )
+        self.status2 = AgreedStatus.objects.create(
+            status="Статус 2", n_stage=2
+        )
+        self.unit = StructuralUnit.objects.create(
+            unit="Тестовое подразделение"
+        )
+        self.rule = Rule.objects.create(
+            name="Длина текста",
+            condition_type="text_length",
+            min_text_length=10,
+            new_status=self.status2,
+        )
+        for description in ("Кратко", "Длинное описание"):
+            Application.objects.create(
+                subm_date=timezone.now(),
+                e_title="Тестовое мероприятие",
+                e_description=description,
+                organizer=self.unit,
+                status=self.status1,
+            )
+
+    def test_batch_stores_results(self):
+        rule_set = RuleEngine.compile_rules()
+        RuleEngine.batch_apply_rules()
+
+        results = ClassificationResult.objects.all()
+        self.assertEqual(results.count(), 2)
+        changed = results.get(status_changed=True)
+        self.assertEqual(changed.rule, self.rule)
+        self.assertEqual(changed.current_status, self.status1)
+        self.assertEqual(changed.new_status, self.status2)
+        self.assertEqual(changed.rule_set_version, rule_set.version)
+        self.assertIsNone(results.get(status_changed=False).rule)
+
+        # Повторная классификация заменяет результаты
+        RuleEngine.batch_apply_rules()
+        self.assertEqual(results.count(), 2)
+        self.assertFalse(results.filter(status_changed=True).exists())
+
+    def test_version_changes_with_rules(self):
+        version = RuleEngine.compile_rules().version
+        self.assertEqual(version, RuleEngine.compile_rules().version)
+
+        self.rule.min_text_length = 20
+        self.rule.save()
+        self.assertNotEqual(version, RuleEngine.compile_rules().version)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BackgroundClassificationTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        # Celery читает настройки Django с префиксом CELERY_
+        eager = celery_app.conf.task_always_eager
+        celery_app.conf.CELERY_TASK_ALWAYS_EAGER = True
+        self.addCleanup(
+            setattr, celery_app.conf, "CELERY_TASK_ALWAYS_EAGER", eager
+        )
+        cache.clear()
+
+        self.status1 = AgreedStatus.objects.create(
+            status="Статус 1", n_stage=1
+        )
+        self.status2 = AgreedStatus.objects.create(
+            status="Статус 2", n_stage=2
+        )
+        self.unit = StructuralUnit.objects.create(
+            unit="Тестовое подразделение"
+        )
+        Rule.objects.create(
+            name="Длина текста",
+            condition_type="text_length",
+            min_text_length=10,
+            new_status=self.status2,
+        )
+        for i in range(5):
+            Application.objects.create(
+                subm_date=timezone.now(),
+                e_title=f"Мероприятие {i}",
+                e_description="Кратко" if i % 2 else "Длинное описание",
+                organizer=self.unit,
+                status=self.status1,
+            )
+
+    def test_full_classification_in_chunks(self):
+        PendingClassification.objects.all().delete()
+
+        run_id = start_classification(full=True, chunk_size=2)
+
+        progress = get_progress(run_id)
+        self.assertTrue(progress["finished"])
+        self.assertEqual(progress["chunks_total"], 3)
+        self.assertEqual(progress["done"], 5)
+        self.assertEqual(progress["changed"], 2)
+        self.assertEqual(ClassificationResult.objects.count(), 5)
+        self.assertIsNone(cache.get("classification:current"))
+
+    def test_failed_chunk_finishes_run(self):
+        PendingClassification.objects.all().delete()
+
+        with mock.patch.object(
+            RuleEngine, "batch_apply_rules", side_effect=RuntimeError
+        ):
+            run_id = start_classification(full=True, chunk_size=2)
+
+        progress = get_progress(run_id)
+        self.assertTrue(progress["finished"])
+        self.assertEqual(progress["failed"], 3)
+        self.assertEqual(progress["done"], 0)
+        self.assertIsNone(cache.get("classification:current"))
+
+    def test_progress_counters_recreated_after_expiry(self):
+        PendingClassification.objects.all().delete()
+        run_id = start_classification(full=True, chunk_size=5)
+        cache.delete_many(
+            [f"classification:{run_id}:{name}" for name in ("done", "changed")]
+        )
+
+        classify_range(run_id, 0, 0)
+        self.assertEqual(get_progress(run_id)["done"], 0)
+
+    def test_report_does_not_start_classification(self):
+        response = self.client.get(reverse("CogSolver:rules_report"))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context["run_id"])
+        self.assertEqual(PendingClassification.objects.count(), 5)
+
+    def test_pending_classified_by_periodic_task(self):
+        run_id = classify_pending()
+
+        response = self.client.get(
+            reverse("CogSolver:rules_report"), {"run": run_id}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context["progress"]["finished"])
+        self.assertFalse(PendingClassification.objects.exists())
+        self.assertIsNone(classify_pending())
+
+        progress = self.client.get(
+            reverse("CogSolver:classification_progress", args=[run_id])
+        )
+        self.assertEqual(progress.json()["done"], 5)
+        progress = self.client.get(
+            reverse("CogSolver:classification_progress", args=["unknown"])
+        )
+        self.assertEqual(progress.status_code, 404)
+
+        response = self.client.get(reverse("CogSolver:rules_report"))
+        self.assertIsNone(response.context["run_id"])
+        self.assertEqual(response.context["total_count"], 5)
+        self.assertEqual(response.context["changed_count"], 2)
+        self.assertEqual(response.context["rules"][0]["changed_count"], 2)
+
+
+class DataGeneratorTest(TestCase):
+    def test_generate_applications(self):
+        call_command("generate_data", 25, "--chunk-size", 10, stdout=None)
+
+        self.assertEqual(Application.objects.count(), 25)
+        self.assertEqual(Rule.objects.count(), 4)
+        # Созданные заявки отмечаются для классификации после генерации
+        self.assertEqual(PendingClassification.objects.count(), 25)
+        for application in Application.objects.prefetch_related(
+            "event_schedule", "roles"
+        ):
+            self.assertIn(len(application.event_schedule.all()), (1, 2, 3))
+            self.assertTrue(application.roles.all())
+            self.assertEqual(
+                application.organizer_id,
+                application.organizer_employee.structural_unit_id,
+            )
+
+        # Повторный запуск использует те же справочники
+        refs = generate_applications(5)
+        self.assertEqual(Application.objects.count(), 30)
+        self.assertEqual(len(refs.employees), 500)
+
+    def test_bench_rules_measures_generated_applications(self):
+        generate_applications(7)
+        out = StringIO()
+
+        call_command("bench_rules", "--sizes", "0", "5", stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertIn("нет данных", lines[0])
+        self.assertEqual(lines[1].split()[0], "5")
+        # Созданные для замера данные откатываются
+        self.assertEqual(Application.objects.count(), 7)
+        self.assertFalse(Rule.objects.exists())
+
+    def test_generate_rules_reuses_statuses(self):
+        # Несколько статусов с одним этапом не мешают генерации
+        for _ in range(2):
+            AgreedStatus.objects.create(status="Дубль", n_stage=1)
+        refs = generate_reference_data(units=2, employees=2, roles=2)
+        generate_applications(10, refs)
+        PendingClassification.objects.all().delete()
+
+        with mock.patch(
+            "CogSolver.datagen.mark_queryset", wraps=mark_queryset
+        ) as mark:
+            rules = generate_rules(refs.roles)
+
+        mark.assert_called_once()
+        self.assertEqual(AgreedStatus.objects.filter(n_stage=1).count(), 2)
+        self.assertEqual(
+            PendingClassification.objects.count(),
+            Application.objects.filter(
+                rules[0].as_q()
+                | rules[1].as_q()
+                | rules[2].as_q()
+                | rules[3].as_q()
+            ).count(),
+        )
+        self.assertEqual(
+            list(rules[2].role_id.values_list("pk", flat=True)),
+            [refs.roles[0].pk],
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
 class CogSolverViewsTest(TestCase):
     def setUp(self):
         self.client = Client()
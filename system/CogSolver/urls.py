@@ -6,4 +6,14 @@ app_name = "CogSolver"
 
 urlpatterns = [
     path("", views.rules_report, name="rules_report"),
+    path(
+        "progress/<str:run_id>/",
+        views.classification_progress,
+        name="classification_progress",
+    ),
+    path(
+        "start/",
+        views.start_full_classification,
+        name="start_classification",
+    ),
 ]
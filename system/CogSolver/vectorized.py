@@ -0,0 +1,224 @@
+"""Векторизованная проверка правил на NumPy.
+
+Заявки загружаются один раз в столбцы NumPy (ApplicationColumns), после
+чего каждое правило вычисляется как булева маска над всеми заявками.
+Это позволяет быстро проверить, что изменится при правке правил, без
+повторного обхода базы данных.
+"""
+
+import datetime
+from dataclasses import dataclass
+
+import numpy as np
+from CogEditor.models import Application
+from CogSolver.compiled import _aware
+from django.db.models import Count, Max
+from django.db.models.functions import Length
+
+# Значение для отсутствующих дат и длин текста
+MISSING = -1
+MICROSECONDS_IN_DAY = 24 * 60 * 60 * 1_000_000
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def _epoch_us(value):
+    if value is None:
+        return MISSING
+    return (_aware(value) - EPOCH) // MICROSECOND
+
+
+@dataclass(frozen=True)
+class ApplicationColumns:
+    """Снимок заявок в виде столбцов NumPy"""
+
+    ids: np.ndarray
+    status_ids: np.ndarray
+    # Дата подачи в микросекундах от начала эпохи
+    subm_date: np.ndarray
+    # Самое позднее начало мероприятия (MISSING, если дат нет)
+    max_event_start: np.ndarray
+    schedule_count: np.ndarray
+    # Длина описания (MISSING, если описание не задано)
+    description_len: np.ndarray
+    # Битовая маска ролей, по 64 роли на столбец
+    role_bits: np.ndarray
+    # Номер бита для id роли
+    role_index: dict
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, queryset=None):
+        """Загружает заявки двумя запросами: поля заявок и их роли"""
+        if queryset is None:
+            queryset = Application.objects.all()
+
+        rows = list(
+            queryset.order_by("pk")
+            .annotate(
+                description_len=Length("e_description"),
+                max_event_start=Max("event_schedule__start"),
+                schedule_count=Count("event_schedule"),
+            )
+            .values_list(
+                "pk",
+                "status_id",
+                "subm_date",
+                "max_event_start",
+                "schedule_count",
+                "description_len",
+            )
+        )
+        count = len(rows)
+        ids = np.fromiter((row[0] for row in rows), np.int64, count)
+        columns = {
+            "ids": ids,
+            "status_ids": np.fromiter(
+                (row[1] for row in rows), np.int64, count
+            ),
+            "subm_date": np.fromiter(
+                (_epoch_us(row[2]) for row in rows), np.int64, count
+            ),
+            "max_event_start": np.fromiter(
+                (_epoch_us(row[3]) for row in rows), np.int64, count
+            ),
+            "schedule_count": np.fromiter(
+                (row[4] for row in rows), np.int32, count
+            ),
+            "description_len": np.fromiter(
+                (MISSING if row[5] is None else row[5] for row in rows),
+                np.int32,
+                count,
+            ),
+        }
+
+        pairs = np.array(
+            Application.roles.through.objects.filter(
+                application_id__in=queryset.values("pk")
+            ).values_list("application_id", "participatoryrole_id"),
+            dtype=np.int64,
+        ).reshape(-1, 2)
+        role_ids = np.unique(pairs[:, 1])
+        role_index = {
+            int(role_id): bit for bit, role_id in enumerate(role_ids)
+        }
+
+        role_bits = np.zeros(
+            (count, max(1, -(-len(role_ids) // 64))), np.uint64
+        )
+        if len(pairs):
+            rows_idx = np.searchsorted(ids, pairs[:, 0])
+            bits = np.searchsorted(role_ids, pairs[:, 1])
+            np.bitwise_or.at(
+                role_bits,
+                (rows_idx, bits // 64),
+                np.left_shift(np.uint64(1), (bits % 64).astype(np.uint64)),
+            )
+
+        return cls(role_bits=role_bits, role_index=role_index, **columns)
+
+    def role_mask(self, role_ids):
+        """Возвращает битовую маску для набора id ролей"""
+        mask = np.zeros(self.role_bits.shape[1], np.uint64)
+        for role_id in role_ids:
+            bit = self.role_index.get(role_id)
+            if bit is not None:
+                mask[bit // 64] |= np.uint64(1) << np.uint64(bit % 64)
+        return mask
+
+
+def rule_mask(rule, columns):
+    """Вычисляет правило для всех заявок и возвращает булеву маску"""
+    if rule.days_threshold is not None:
+        threshold = (
+            columns.subm_date + rule.days_threshold * MICROSECONDS_IN_DAY
+        )
+        has_start = columns.max_event_start != MISSING
+        before_threshold = columns.max_event_start < threshold
+    if rule.role_ids:
+        has_role = (
+            columns.role_bits & columns.role_mask(rule.role_ids) != 0
+        ).any(axis=1)
+
+    if rule.condition_type == "date_compare":
+        if rule.days_threshold is None:
+            return np.zeros(len(columns), bool)
+        return (columns.schedule_count > 0) & (~has_start | before_threshold)
+
+    if rule.condition_type == "role_check":
+        if not rule.role_ids:
+            return np.zeros(len(columns), bool)
+        return has_role
+
+    if rule.condition_type == "text_length":
+        if rule.min_text_length is None:
+            return np.zeros(len(columns), bool)
+        return (columns.description_len != MISSING) & (
+            columns.description_len < rule.min_text_length
+        )
+
+    if rule.condition_type == "combined":
+        mask = np.ones(len(columns), bool)
+        if rule.days_threshold is not None:
+            mask &= has_start & before_threshold
+        if rule.role_ids:
+            mask &= has_role
+        if rule.min_text_length is not None:
+            mask &= (
+                np.maximum(columns.description_len, 0) < rule.min_text_length
+            )
+        return mask
+
+    return np.zeros(len(columns), bool)
+
+
+def match_rules(rule_set, columns):
+    """Возвращает для каждой заявки номер первого сработавшего правила.
+
+    Номер соответствует позиции в rule_set.rules, -1 означает, что ни
+    одно правило не сработало.
+    """
+    if not rule_set.rules or not len(columns):
+        return np.full(len(columns), -1, np.int64)
+
+    masks = np.stack([rule_mask(rule, columns) for rule in rule_set.rules])
+    matched = masks.argmax(axis=0)
+    matched[~masks.any(axis=0)] = -1
+    return matched
+
+
+def new_status_ids(rule_set, columns, matched=None):
+    """Возвращает id статусов, которые присвоит заявкам набор правил"""
+    if matched is None:
+        matched = match_rules(rule_set, columns)
+    targets = np.array(
+        [rule.new_status_id for rule in rule_set.rules] + [0], np.int64
+    )
+    # Индекс -1 указывает на последний (фиктивный) элемент targets
+    return np.where(matched >= 0, targets[matched], columns.status_ids)
+
+
+def status_diff(columns, status_ids):
+    """Группирует заявки, статус которых изменится, по паре статусов.
+
+    Возвращает словарь {(id текущего статуса, id нового статуса): [id
+    заявок]}.
+    """
+    changed = status_ids != columns.status_ids
+    old = columns.status_ids[changed]
+    new = status_ids[changed]
+    ids = columns.ids[changed]
+
+    order = np.lexsort((ids, new, old))
+    old, new, ids = old[order], new[order], ids[order]
+    bounds = np.flatnonzero((np.diff(old) != 0) | (np.diff(new) != 0)) + 1
+
+    return {
+        (int(group_old[0]), int(group_new[0])): group_ids.tolist()
+        for group_old, group_new, group_ids in zip(
+            np.split(old, bounds), np.split(new, bounds), np.split(ids, bounds)
+        )
+        if len(group_ids)
+    }
@@ -1,32 +1,65 @@
-from CogSolver.models import Rule, RuleEngine
-from django.shortcuts import render
+from CogSolver.models import ClassificationResult, Rule
+from CogSolver.tasks import get_progress, start_classification
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.paginator import Paginator
+from django.db.models import Count, Q
+from django.http import Http404, JsonResponse
+from django.shortcuts import redirect, render
+from django.urls import reverse
+from django.utils.http import url_has_allowed_host_and_scheme
+from django.views.decorators.http import require_POST
+
+# Количество заявок на странице общего отчета
+REPORT_PAGE_SIZE = 50
+# Количество измененных заявок, показываемых для каждого правила
+RULE_PREVIEW_SIZE = 20
 
 
 def rules_report(request):
-    # FIXME - обновить логику после коммита d41f374
-    raw_results = RuleEngine.batch_apply_rules()
-    changed_count = sum(1 for r in raw_results if r["status_changed"])
+    # Измененные заявки классифицирует периодическая задача
+    # classify_pending, полный запуск - start_full_classification
+    run_id = request.GET.get("run")
+
+    results = ClassificationResult.objects.select_related(
+        "application", "current_status", "new_status"
+    )
+    changed = results.filter(status_changed=True)
+    changed_count = changed.count()
+
+    paginator = Paginator(results, REPORT_PAGE_SIZE)
+    page_obj = paginator.get_page(request.GET.get("page"))
 
     # Группировка по правилам
     rules = []
-    for rule in Rule.objects.filter(is_active=True):
-        changed_apps = [
-            r
-            for r in raw_results
-            if r["new_status"] == rule.new_status and r["status_changed"]
-        ]
+    for rule in (
+        Rule.objects.filter(is_active=True)
+        .select_related("new_status")
+        .annotate(
+            changed_count=Count(
+                "classification_results",
+                filter=Q(classification_results__status_changed=True),
+            )
+        )
+    ):
         rules.append(
             {
                 "name": rule.name,
                 "description": rule.description,
                 "new_status": rule.new_status,
-                "changed_applications": changed_apps,
-                "changed_count": len(changed_apps),
+                "changed_applications": changed.filter(rule=rule)[
+                    :RULE_PREVIEW_SIZE
+                ],
+                "changed_count": rule.changed_count,
             }
         )
 
     context = {
-        "results": raw_results,
+        "run_id": run_id,
+        "progress": get_progress(run_id) if run_id else None,
+        "results": page_obj,
+        "page_obj": page_obj,
+        "is_paginated": page_obj.has_other_pages(),
+        "total_count": paginator.count,
         "changed_count": changed_count,
         "rules": rules,
         "columns": [
@@ -36,6 +69,7 @@ def rules_report(request):
             {"name": "Статус в БД", "key": "current_status"},
             {"name": "Статус классификатора", "key": "new_status"},
             {"name": "Изменен?", "key": "status_changed"},
+            {"name": "Версия правил", "key": "rule_set_version"},
         ],
         "columns_changed": [
             {"name": "ID", "key": "application.id"},
@@ -47,3 +81,22 @@ def rules_report(request):
     }
 
     return render(request, "CogSolver/rules_report.html", context)
+
+
+def classification_progress(request, run_id):
+    progress = get_progress(run_id)
+    if progress is None:
+        raise Http404("Запуск классификации не найден")
+    return JsonResponse(progress)
+
+
+@staff_member_required
+@require_POST
+def start_full_classification(request):
+    run_id = start_classification(full=True)
+    next_url = request.POST.get("next")
+    if not url_has_allowed_host_and_scheme(
+        next_url, allowed_hosts={request.get_host()}
+    ):
+        next_url = reverse("CogSolver:rules_report")
+    return redirect(f"{next_url}?run={run_id}")
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 13:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Telegram', '0002_alter_telegramchat_phone'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='telegramchat',
+            name='telegram_chat',
+            field=models.CharField(
+                blank=None,
+                db_index=True,
+                null=None,
+                verbose_name='ID чата telegram',
+            ),
+        ),
+    ]
@@ -13,4 +13,5 @@ class TelegramChat(models.Model):
         verbose_name="ID чата telegram",
         blank=None,
         null=None,
+        db_index=True,
     )
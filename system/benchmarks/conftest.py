@@ -0,0 +1,61 @@
+"""Данные и настройки для замеров производительности.
+
+Синтетические заявки создаются один раз на сессию, их количество задается
+переменной окружения BENCHMARK_APPLICATIONS.
+"""
+
+import os
+import shutil
+import tempfile
+
+import pytest
+from django.test import override_settings
+from mysite.testing import LOCMEM_CACHES
+
+pytest.importorskip("pytest_benchmark")
+
+BENCHMARK_APPLICATIONS = int(os.environ.get("BENCHMARK_APPLICATIONS", 2000))
+
+
+@pytest.fixture(scope="session")
+def model_dir():
+    path = tempfile.mkdtemp()
+    yield path
+    shutil.rmtree(path)
+
+
+@pytest.fixture(autouse=True)
+def benchmark_settings(settings, model_dir):
+    from mysite import celery_app
+
+    settings.CACHES = LOCMEM_CACHES
+    settings.COGNEURAL_MODEL_DIR = model_dir
+    # Замеряется построение страниц, кэш страниц проверяется отдельно
+    settings.PAGE_CACHE_TIMEOUT = 0
+    celery_app.conf.CELERY_TASK_ALWAYS_EAGER = True
+    yield
+    celery_app.conf.CELERY_TASK_ALWAYS_EAGER = False
+
+
+@pytest.fixture(scope="session")
+def dataset(django_db_setup, django_db_blocker, model_dir):
+    """Заявки, правила, результаты классификации и обученная модель"""
+    from CogNeural import registry
+    from CogNeural.training import train_model
+    from CogSolver.datagen import (
+        generate_applications,
+        generate_reference_data,
+        generate_rules,
+    )
+    from CogSolver.models import RuleEngine
+
+    with (
+        django_db_blocker.unblock(),
+        override_settings(CACHES=LOCMEM_CACHES, COGNEURAL_MODEL_DIR=model_dir),
+    ):
+        refs = generate_reference_data()
+        generate_rules(refs.roles)
+        generate_applications(BENCHMARK_APPLICATIONS, refs)
+        RuleEngine.batch_apply_rules()
+        registry.publish(train_model())
+    return refs
@@ -0,0 +1,95 @@
+"""Замеры производительности основных операций.
+
+pytest system/benchmarks --no-cov --benchmark-autosave
+"""
+
+import datetime
+import itertools
+
+import pytest
+from CogEditor.forms import ApplicationForm
+from CogEditor.models import Application
+from CogSolver.models import RuleEngine
+from django.urls import reverse
+from django.utils import timezone
+
+pytestmark = pytest.mark.django_db
+
+
+def test_batch_apply_rules(benchmark, dataset):
+    results = benchmark.pedantic(
+        RuleEngine.batch_apply_rules, rounds=3, iterations=1
+    )
+    assert len(results) == Application.objects.count()
+
+
+def test_rules_report(benchmark, dataset, client):
+    response = benchmark(client.get, reverse("CogSolver:rules_report"))
+    assert response.status_code == 200
+
+
+def test_neural_index(benchmark, dataset, client):
+    response = benchmark(client.get, reverse("CogNeural:index"))
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "name",
+    ["archive", "archive_by_year", "archive_by_year_month", "organizer"],
+)
+def test_archive_list(benchmark, dataset, client, name):
+    now = timezone.now()
+    url = {
+        "archive": reverse("CogEditor:archive"),
+        "archive_by_year": reverse(
+            "CogEditor:archive_by_year", args=[now.year]
+        ),
+        "archive_by_year_month": reverse(
+            "CogEditor:archive_by_year_month", args=[now.year, now.month]
+        ),
+        "organizer": reverse(
+            "CogEditor:organizer_events", args=[dataset.units[0].pk]
+        ),
+    }[name]
+    # Последняя страница: стоимость не должна зависеть от глубины
+    response = benchmark(client.get, url, {"last": ""})
+    assert response.status_code == 200
+
+
+def test_archive_list_cached(benchmark, dataset, client, settings):
+    settings.PAGE_CACHE_TIMEOUT = 600
+    url = reverse("CogEditor:archive")
+    client.get(url, {"last": ""})
+    response = benchmark(client.get, url, {"last": ""})
+    assert response.status_code == 200
+
+
+def test_application_form_save(benchmark, dataset):
+    data = {
+        "e_title": "Мероприятие",
+        "e_description": "Описание мероприятия",
+        "organizer_employee_name": "Бенчмарк: сотрудник 0",
+        "event_time_start": datetime.time(10, 0),
+        "event_time_end": datetime.time(12, 0),
+        "organizer": dataset.units[0].pk,
+        "e_format": dataset.formats[0].pk,
+        "number_of_participants": 30,
+        "roles": [dataset.roles[0].pk],
+        "status": dataset.statuses[-1].pk,
+    }
+
+    # Каждый раунд бронирует свободный день, чтобы форма проверяла
+    # пересечения, но не находила их
+    days = itertools.count(3650)
+
+    def save():
+        event_date = timezone.now().date() + datetime.timedelta(
+            days=next(days)
+        )
+        form = ApplicationForm(data={**data, "event_date": event_date})
+        assert form.is_valid(), form.errors
+        assert not form.schedule_conflicts
+        return form.save()
+
+    application = benchmark(save)
+    assert application.pk is not None
@@ -2,7 +2,7 @@ import os
 from celery import Celery
 
 # Установите дефолтные настройки Django
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'system.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'mysite.settings')
 
 app = Celery('system')
 
@@ -0,0 +1,104 @@
+"""Замер времени запуска Django.
+
+Запускает в отдельном процессе django.setup() и загрузку URL-конфигурации
+с python -X importtime и проверяет, что запуск укладывается в бюджет и не
+импортирует научные библиотеки.
+
+    python -m mysite.importtime --budget-ms 1500
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# Библиотеки, которые должны загружаться только при обращении к модели
+HEAVY_MODULES = (
+    "joblib",
+    "matplotlib",
+    "numpy",
+    "pandas",
+    "scipy",
+    "seaborn",
+    "sklearn",
+)
+DEFAULT_BUDGET_MS = int(os.environ.get("STARTUP_BUDGET_MS", 1500))
+
+STARTUP_CODE = """
+import sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.urls import resolve
+resolve("/")
+print((time.perf_counter() - started) * 1000)
+print(",".join(sorted(sys.modules)))
+"""
+
+
+def measure_startup(settings_module="mysite.settings"):
+    """Возвращает время запуска и самые долгие импорты.
+
+    Результат: словарь с ключами total_ms (время django.setup() и
+    загрузки URL), imports (пары (модуль, мс) для модулей верхнего уровня
+    по убыванию времени) и heavy (загруженные тяжелые библиотеки).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_CODE],
+        cwd=BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": settings_module},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    total_ms, modules = result.stdout.strip().splitlines()[-2:]
+    modules = set(modules.split(","))
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.removeprefix("import time:").split("|")
+        # Вложенные импорты выводятся с отступом
+        if cumulative.strip().isdigit() and not name.startswith("  "):
+            imports.append((name.strip(), int(cumulative) / 1000))
+
+    return {
+        "total_ms": float(total_ms),
+        "imports": sorted(imports, key=lambda item: item[1], reverse=True),
+        "heavy": [
+            name
+            for name in HEAVY_MODULES
+            if any(m == name or m.startswith(name + ".") for m in modules)
+        ],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    startup = measure_startup()
+    print(
+        f"Запуск: {startup['total_ms']:.0f} мс (бюджет {args.budget_ms:.0f})"
+    )
+    for name, ms in startup["imports"][: args.top]:
+        print(f"{ms:10.1f} мс  {name}")
+
+    failed = False
+    if startup["heavy"]:
+        print("При запуске загружены: " + ", ".join(startup["heavy"]))
+        failed = True
+    if startup["total_ms"] > args.budget_ms:
+        print("Бюджет времени запуска превышен")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
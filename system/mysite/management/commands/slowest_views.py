@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from mysite.profiling import reset_stats, view_stats
+
+SORT_KEYS = ("p95_ms", "mean_ms", "db_ms", "queries", "requests")
+
+
+class Command(BaseCommand):
+    help = (
+        "Выводит самые медленные представления по данным "
+        "RequestProfilingMiddleware"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=10)
+        parser.add_argument(
+            "--sort",
+            choices=SORT_KEYS,
+            default="p95_ms",
+            help="Поле сортировки",
+        )
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Очистить накопленную статистику после вывода",
+        )
+
+    def handle(self, *args, **options):
+        stats = sorted(
+            view_stats(),
+            key=lambda s: (s[options["sort"]] or 0, s["mean_ms"]),
+            reverse=True,
+        )
+        if not stats:
+            self.stdout.write(
+                "Нет данных. Включите REQUEST_PROFILING=1 и выполните "
+                "запросы"
+            )
+        else:
+            self.stdout.write(
+                f"{'Представление':<40} {'запросов':>8} {'p50':>7} "
+                f"{'p95':>7} {'среднее':>8} {'БД':>7} {'шаблоны':>8} "
+                f"{'SQL':>6}"
+            )
+        for s in stats[: options["limit"]]:
+            self.stdout.write(
+                f"{s['view']:<40} {s['requests']:>8} "
+                f"{s['p50_ms']:>7.0f} {s['p95_ms']:>7.0f} "
+                f"{s['mean_ms']:>8.1f} {s['db_ms']:>7.1f} "
+                f"{s['template_ms']:>8.1f} {s['queries']:>6.1f}"
+            )
+
+        if options["reset"]:
+            reset_stats()
@@ -0,0 +1,248 @@
+"""Профилирование запросов: SQL, шаблоны и память.
+
+RequestProfilingMiddleware включается настройкой REQUEST_PROFILING
+(переменная окружения REQUEST_PROFILING=1). Для каждого запроса
+считаются количество и время SQL-запросов, время отрисовки шаблонов,
+пиковый объем памяти Python (tracemalloc) и общее время. Значения
+возвращаются в заголовке Server-Timing и накапливаются в кэше (Redis) в
+виде гистограмм по представлениям:
+
+    python manage.py slowest_views --limit 10
+"""
+
+import functools
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+PROFILING_KEY = "profiling:{}"
+VIEWS_KEY = PROFILING_KEY.format("views")
+# Верхние границы интервалов гистограмм
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+# Счетчики, суммируемые по представлению
+TOTALS = ("requests", "total_us", "db_us", "template_us", "queries")
+
+_timings = ContextVar("profiling_timings", default=None)
+
+
+def _timed_render(render):
+    @functools.wraps(render)
+    def wrapper(*args, **kwargs):
+        timings = _timings.get()
+        if timings is None:
+            return render(*args, **kwargs)
+        started = perf_counter()
+        try:
+            return render(*args, **kwargs)
+        finally:
+            timings["template"] += perf_counter() - started
+
+    wrapper.profiled = True
+    return wrapper
+
+
+def _instrument_templates():
+    """Оборачивает отрисовку шаблонов Django для подсчета времени.
+
+    Оборачивается шаблон бэкенда, поэтому вложенные {% include %} не
+    учитываются дважды.
+    """
+    from django.template.backends.django import Template
+
+    if not getattr(Template.render, "profiled", False):
+        Template.render = _timed_render(Template.render)
+
+
+def _bucket(value, bounds):
+    for bound in bounds:
+        if value <= bound:
+            return str(bound)
+    return "inf"
+
+
+class RequestProfilingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, "REQUEST_PROFILING", False):
+            raise MiddlewareNotUsed
+        _instrument_templates()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = {"db": 0.0, "queries": 0, "template": 0.0}
+
+        def execute(execute, sql, params, many, context):
+            started = perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                timings["db"] += perf_counter() - started
+                timings["queries"] += 1
+
+        # tracemalloc общий для процесса: при параллельных запросах в
+        # потоках пик относится ко всем запросам процесса
+        trace = not tracemalloc.is_tracing()
+        if trace:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        token = _timings.set(timings)
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(execute))
+                response = self.get_response(request)
+        finally:
+            _timings.reset(token)
+            timings["total"] = perf_counter() - started
+            timings["peak_memory"] = tracemalloc.get_traced_memory()[1]
+            if trace:
+                tracemalloc.stop()
+
+        response["Server-Timing"] = server_timing_header(timings)
+        if request.resolver_match is not None:
+            record(request.resolver_match.view_name, timings)
+        return response
+
+
+def server_timing_header(timings):
+    return ", ".join(
+        [
+            f"total;dur={timings['total'] * 1000:.1f}",
+            f'db;dur={timings["db"] * 1000:.1f};desc="{timings["queries"]}"',
+            f"tpl;dur={timings['template'] * 1000:.1f}",
+            f'mem;desc="{timings["peak_memory"] // 1024}"',
+        ]
+    )
+
+
+def parse_server_timing(header):
+    """Разбирает Server-Timing в словарь {метрика: {dur, desc}}"""
+    metrics = {}
+    for entry in header.split(","):
+        name, *params = entry.strip().split(";")
+        metrics[name] = {}
+        for param in params:
+            key, _, value = param.partition("=")
+            value = value.strip('"')
+            metrics[name][key] = float(value) if key == "dur" else value
+    return metrics
+
+
+def _metric_names():
+    return [
+        *TOTALS,
+        *(f"latency:{b}" for b in (*LATENCY_BUCKETS_MS, "inf")),
+        *(f"queries:{b}" for b in (*QUERY_BUCKETS, "inf")),
+    ]
+
+
+def _metric_key(view_name, name):
+    return PROFILING_KEY.format(f"{view_name}:{name}")
+
+
+def _incr(key, delta=1):
+    cache.add(key, 0, None)
+    cache.incr(key, delta)
+
+
+def record(view_name, timings):
+    """Добавляет замер запроса к гистограммам представления"""
+    views = cache.get(VIEWS_KEY) or set()
+    if view_name not in views:
+        cache.set(VIEWS_KEY, views | {view_name}, None)
+
+    total_ms = timings["total"] * 1000
+    for name, value in (
+        ("requests", 1),
+        ("total_us", int(timings["total"] * 1e6)),
+        ("db_us", int(timings["db"] * 1e6)),
+        ("template_us", int(timings["template"] * 1e6)),
+        ("queries", timings["queries"]),
+        (f"latency:{_bucket(total_ms, LATENCY_BUCKETS_MS)}", 1),
+        (f"queries:{_bucket(timings['queries'], QUERY_BUCKETS)}", 1),
+    ):
+        _incr(_metric_key(view_name, name), value)
+
+
+def _percentile(histogram, bounds, fraction):
+    total = sum(histogram.values())
+    seen = 0
+    for bound in [*map(str, bounds), "inf"]:
+        seen += histogram.get(bound, 0)
+        if total and seen >= total * fraction:
+            return float(bound)
+    return None
+
+
+def view_stats():
+    """Возвращает накопленную статистику по представлениям.
+
+    Процентили задержки приближенные: верхняя граница интервала
+    гистограммы, в который попадает процентиль.
+    """
+    stats = []
+    for view_name in sorted(cache.get(VIEWS_KEY) or ()):
+        names = _metric_names()
+        keys = [_metric_key(view_name, name) for name in names]
+        stored = cache.get_many(keys)
+        values = {name: stored.get(key, 0) for name, key in zip(names, keys)}
+        requests = values["requests"]
+        if not requests:
+            continue
+
+        latency = {
+            name.split(":")[1]: count
+            for name, count in values.items()
+            if name.startswith("latency:")
+        }
+        stats.append(
+            {
+                "view": view_name,
+                "requests": requests,
+                "mean_ms": values["total_us"] / requests / 1000,
+                "db_ms": values["db_us"] / requests / 1000,
+                "template_ms": values["template_us"] / requests / 1000,
+                "queries": values["queries"] / requests,
+                "p50_ms": _percentile(latency, LATENCY_BUCKETS_MS, 0.5),
+                "p95_ms": _percentile(latency, LATENCY_BUCKETS_MS, 0.95),
+                "latency": latency,
+                "query_histogram": {
+                    name.split(":")[1]: count
+                    for name, count in values.items()
+                    if name.startswith("queries:")
+                },
+            }
+        )
+    return stats
+
+
+def reset_stats():
+    keys = [VIEWS_KEY]
+    for view_name in cache.get(VIEWS_KEY) or ():
+        keys += [_metric_key(view_name, name) for name in _metric_names()]
+    cache.delete_many(keys)
+
+
+@contextmanager
+def query_budget(max_queries, using="default"):
+    """Проверяет в тестах, что блок выполняет не больше max_queries.
+
+    with query_budget(5):
+        self.client.get(url)
+    """
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connections[using]) as queries:
+        yield queries
+    if len(queries) > max_queries:
+        raise AssertionError(
+            f"{len(queries)} запросов при бюджете {max_queries}:\n"
+            + "\n".join(q["sql"] for q in queries.captured_queries)
+        )
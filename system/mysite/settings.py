@@ -38,6 +38,8 @@ INSTALLED_APPS = [
     "CogSolver.apps.CogsolverConfig",
     "CogNeural.apps.CogneuralConfig",
     "Telegram.apps.TelegramConfig",
+    # Команды проекта (mysite/management), например slowest_views
+    "mysite",
     "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
@@ -54,6 +56,8 @@ CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
 MIDDLEWARE = [
+    # Включается настройкой REQUEST_PROFILING
+    "mysite.profiling.RequestProfilingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -134,6 +138,40 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
+# Выполнять задачи синхронно, без брокера (для тестов и отладки)
+CELERY_TASK_ALWAYS_EAGER = os.environ.get('CELERY_TASK_ALWAYS_EAGER') == '1'
+# Классификация измененных заявок раз в минуту (CogSolver/tasks.py)
+CELERY_BEAT_SCHEDULE = {
+    'classify-pending': {
+        'task': 'CogSolver.tasks.classify_pending',
+        'schedule': 60.0,
+    },
+}
+
+# Профилирование запросов: заголовок Server-Timing и гистограммы по
+# представлениям в кэше (mysite/profiling.py)
+REQUEST_PROFILING = os.environ.get('REQUEST_PROFILING') == '1'
+
+# Время хранения страниц CogEditor в кэше, с; 0 отключает кэширование
+# страниц (CogEditor/caching.py)
+PAGE_CACHE_TIMEOUT = int(os.environ.get('PAGE_CACHE_TIMEOUT', 600))
+
+# Пересечение бронирования с другими заявками в форме заявки: flag -
+# предупреждение после отправки, reject - ошибка формы, off - без проверки
+SCHEDULE_CONFLICTS = os.environ.get('SCHEDULE_CONFLICTS', 'flag')
+
+# Этапы согласования, заявки на которых не занимают площадку, через запятую:
+# 1 - отклонено, можно добавить завершающие этапы (CogEditor/conflicts.py)
+SCHEDULE_RELEASED_STAGES = [
+    int(stage)
+    for stage in os.environ.get('SCHEDULE_RELEASED_STAGES', '1').split(',')
+    if stage
+]
+
+# Каталог обученных моделей CogNeural
+COGNEURAL_MODEL_DIR = Path(
+    os.environ.get('COGNEURAL_MODEL_DIR', BASE_DIR / 'ml_models')
+)
 
 
 # Internationalization
@@ -0,0 +1,8 @@
+"""Общие настройки для тестов и замеров производительности"""
+
+# Кэш в памяти процесса вместо Redis
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}